@@ -0,0 +1,30 @@
+''' Async ORM interface (aget(), acount(), async for) of querysets. Django 4.1
+    and later provide these methods, on older versions the sync methods are run
+    in a thread with sync_to_async() '''
+
+from asgiref.sync import sync_to_async
+
+
+
+async def aget(queryset, **kwargs):
+    if hasattr(queryset, 'aget'):
+        return await queryset.aget(**kwargs)
+
+    return await sync_to_async(queryset.get)(**kwargs)
+
+
+async def acount(queryset):
+    if hasattr(queryset, 'acount'):
+        return await queryset.acount()
+
+    return await sync_to_async(queryset.count)()
+
+
+async def alist(queryset):
+    ''' Evaluates a queryset. Async iteration does not support prefetching of
+        related objects, so such querysets are evaluated in a thread '''
+
+    if hasattr(queryset, '__aiter__') and not queryset._prefetch_related_lookups:
+        return [item async for item in queryset]
+
+    return await sync_to_async(list)(queryset)
@@ -0,0 +1,223 @@
+''' Async versions of the list, detail and random endpoints, for ASGI servers
+    (see API_ASYNC_VIEWS setting). They share querysets, filters, pagination
+    and serializers with the sync views in "views.py", only database access
+    is awaited (see "async_orm.py"). Rendering happens in the event loop too '''
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from . import async_orm, views
+from .caching import get_setting, response_cache
+from .instrumentation import measure
+from .models import DataVersion
+
+
+
+class AsyncAPIViewMixin:
+    ''' Serves GET and HEAD requests with async "aget" handler of a DRF view.
+        Does the same as ConditionalGetMixin, CachedResponseMixin and
+        APIView.dispatch() do for sync views, but without blocking the event
+        loop. Views are public, so requests are not authenticated (it would
+        need a database query to read the session) '''
+
+    authentication_classes = []
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = super().as_view(**initkwargs)
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            response = await self.adispatch(request, *args, **kwargs)
+
+            if isinstance(response, SimpleTemplateResponse):   # Already rendered, Django would render it again in a thread
+                response = HttpResponse(response.content, status=response.status_code, headers=dict(response.items()))
+
+            return response
+
+        view.view_class = sync_view.view_class
+        view.view_initkwargs = sync_view.view_initkwargs
+        view.cls = sync_view.cls
+        view.initkwargs = sync_view.initkwargs
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        request.snapshot = None   # Async views always query the database (see <SnapshotMixin>)
+
+        if self.is_deterministic(request):   # Looked up once per request, see <DataVersionMixin>
+            request.data_version = await sync_to_async(DataVersion.current)()
+
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            response = await self.adispatch_cached(request, *args, **kwargs)
+
+        if request.method in ('GET', 'HEAD'):
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+
+        return response
+
+    def get_validators(self, request, *args, **kwargs):
+        ''' (ETag, Last-Modified timestamp) the same as condition() decorator
+            of <ConditionalGetMixin> computes '''
+
+        etag = self.get_etag(request, *args, **kwargs)
+        last_modified = self.get_last_modified(request, *args, **kwargs)
+
+        if last_modified and not timezone.is_aware(last_modified):
+            last_modified = timezone.make_aware(last_modified, timezone.utc)
+
+        return quote_etag(etag) if etag else None, int(last_modified.timestamp()) if last_modified else None
+
+    async def adispatch_cached(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not get_setting('ENABLED') or not self.is_deterministic(request):
+            return await self.adispatch_view(request, *args, **kwargs)
+
+        key = response_cache.make_key(request, self.get_data_version(request).version)
+        entry = await self.access_cache(response_cache.get, key)
+
+        if entry is not None:
+            content, headers = entry
+            response = HttpResponse(content, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = await self.adispatch_view(request, *args, **kwargs)
+
+        if response.status_code == 200 and not response.streaming:
+            await self.access_cache(response_cache.set, key, (response.content, dict(response.items())))
+
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def access_cache(self, method, *args):
+        ''' In-process cache is used right away, the shared cache may need
+            network or database access, so it is used from a thread '''
+
+        if response_cache.shared is None:
+            return method(*args)
+
+        return await sync_to_async(method)(*args)
+
+    async def adispatch_view(self, request, *args, **kwargs):
+        ''' Same as APIView.dispatch(), but awaits "aget" handler and renders
+            the response '''
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+
+            if request.method in ('GET', 'HEAD'):
+                response = await self.aget(request, *args, **kwargs)
+            else:   # OPTIONS and "405 Method Not Allowed" do not need the database
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+                response = handler(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        self.response.render()
+        return self.response
+
+
+class AsyncListMixin(AsyncAPIViewMixin):
+    async def aget(self, request, *args, **kwargs):
+        with measure(request, 'queryset'):
+            queryset = self.filter_queryset(await self.aget_queryset())
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+
+        with measure(request, 'serialize'):
+            serializer = self.get_serializer(page, many=True)
+            data = await serializer.adata() if hasattr(serializer, 'adata') else serializer.data
+
+        return self.get_paginated_response(data)
+
+    async def aget_queryset(self):
+        ''' Queryset of the view. Querysets are lazy, so it is built in the
+            event loop unless the view overrides it '''
+
+        return self.get_queryset()
+
+
+class AsyncDetailsMixin(AsyncAPIViewMixin):
+    async def aget(self, request, pk, format=None):
+        with measure(request, 'queryset'):
+            try:
+                item = await async_orm.aget(self.filter_queryset(self.get_queryset()), pk=pk)
+            except self.queryset.model.DoesNotExist:
+                raise NotFound()
+
+        with measure(request, 'serialize'):
+            data = self.get_serializer(item).data
+
+        return Response(data)
+
+
+class AuthorList(AsyncListMixin, views.AuthorList):
+    pass
+
+
+class AuthorDetails(AsyncDetailsMixin, views.AuthorDetails):
+    pass
+
+
+class BookList(AsyncListMixin, views.BookList):
+    pass
+
+
+class BookDetails(AsyncDetailsMixin, views.BookDetails):
+    pass
+
+
+class QuoteList(AsyncListMixin, views.QuoteList):
+    async def aget(self, request, *args, **kwargs):
+        names = self.get_facet_names()
+
+        if names:   # Counting may query the database, so it runs in a thread
+            await sync_to_async(self.get_facet_counts)(names)
+
+        return await super().aget(request, *args, **kwargs)
+
+
+class QuoteDetails(AsyncDetailsMixin, views.QuoteDetails):
+    pass
+
+
+class TagList(AsyncListMixin, views.TagList):
+    async def aget_queryset(self):
+        if 'similar_to' in self.request.query_params:   # Loads the tag index and evaluates the filters
+            return await sync_to_async(self.get_queryset)()
+
+        return self.get_queryset()
+
+
+class TagDetails(AsyncDetailsMixin, views.TagDetails):
+    pass
+
+
+class RandomQuoteDetails(AsyncAPIViewMixin, views.RandomQuoteDetails):
+    async def aget(self, request, format=None):
+        count, seed = self.get_count_and_seed(request)
+
+        with measure(request, 'queryset'):   # Sampling may reload quote ids and retry, so it runs in a thread
+            random_quotes = await sync_to_async(self.get_random_quotes)(1 if count is None else count, seed)
+
+        return self.get_random_response(request, random_quotes, count)
@@ -0,0 +1,17 @@
+''' Benchmarks are run with "python manage.py benchmark <name>". Each benchmark
+    is a module which provides add_arguments(parser) and run(options, stdout)
+    functions. Benchmarks never touch the configured database: data is
+    generated in a throwaway test database '''
+
+from . import asgi, endpoints, serializers, sqlite, tag_filter, throttling
+
+
+
+BENCHMARKS = {
+    'asgi': asgi,
+    'endpoints': endpoints,
+    'serializers': serializers,
+    'sqlite': sqlite,
+    'tag_filter': tag_filter,
+    'throttling': throttling,
+}
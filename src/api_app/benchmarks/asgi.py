@@ -0,0 +1,153 @@
+''' Compare throughput of concurrent requests served by WSGI handler (sync
+    views in a pool of threads, like a threaded WSGI server), ASGI handler with
+    sync views and ASGI handler with async views (see "async_views.py") '''
+
+import asyncio
+import concurrent.futures
+import itertools
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.test import override_settings
+from django.urls import include, path, reverse
+
+from api_app.models import Quote
+from api_app.urls import get_urlpatterns
+
+from . import dataset
+
+
+
+MODES = ['wsgi', 'asgi-sync', 'asgi-async']
+
+
+class URLConf:
+    ''' Root URLconf with sync or async views of the API '''
+
+    def __init__(self, asynchronous):
+        self.urlpatterns = [path('api/v1/', include(get_urlpatterns(asynchronous)))]
+
+
+def get_urls():
+    quote = Quote.objects.order_by('id').first()
+
+    return [
+        reverse('list-of-quotes'),
+        f"{reverse('list-of-quotes')}?page_size=100&expand=author",
+        reverse('quote-details', args=[quote.id]),
+        f"{reverse('random-quote-details')}?count=10",
+        reverse('list-of-tags'),
+    ]
+
+
+def wsgi_request(handler, url):
+    ''' Returns status code and latency (ms) of a request '''
+
+    path, _, query = url.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    statuses = []
+
+    start = time.perf_counter()
+    content = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+
+    for _ in content:
+        pass
+
+    content.close()   # Sends request_finished signal
+    return int(statuses[0].split()[0]), (time.perf_counter() - start) * 1000
+
+
+async def asgi_request(handler, url):
+    ''' Returns status code and latency (ms) of a request '''
+
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ['127.0.0.1', 0],
+        'server': ['localhost', 80],
+    }
+    messages = asyncio.Queue()
+    messages.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})   # Then the client never disconnects
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    start = time.perf_counter()
+    await handler(scope, messages.get, send)
+    return sent[0]['status'], (time.perf_counter() - start) * 1000
+
+
+def run_wsgi(urls, concurrency):
+    handler = WSGIHandler()
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(lambda url: wsgi_request(handler, url), urls))
+
+
+async def run_asgi(urls, concurrency):
+    handler = ASGIHandler()
+    semaphore = asyncio.Semaphore(concurrency)   # Number of requests in flight, like connections of a load generator
+
+    async def request(url):
+        async with semaphore:
+            return await asgi_request(handler, url)
+
+    return await asyncio.gather(*(request(url) for url in urls))
+
+
+def measure(mode, urls, concurrency):
+    ''' Returns requests per second and median and p95 latency (ms) '''
+
+    with override_settings(ROOT_URLCONF=URLConf(asynchronous=mode == 'asgi-async')):
+        run = (lambda: run_wsgi(urls, concurrency)) if mode == 'wsgi' else (lambda: asyncio.run(run_asgi(urls, concurrency)))
+        run()   # Warm up
+
+        start = time.perf_counter()
+        results = run()
+        duration = time.perf_counter() - start
+
+    failed = [(url, status) for url, (status, latency) in zip(urls, results) if status != 200]
+
+    if failed:
+        raise CommandError(f'{mode}: {failed[0][0]} responded with {failed[0][1]}')
+
+    latencies = sorted(latency for status, latency in results)
+    return len(urls) / duration, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', choices=dataset.SIZES, default='10k', help='Size of generated dataset (number of quotes)')
+    parser.add_argument('--requests', type=int, default=500, help='Number of requests per measurement')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Number of requests in flight')
+    parser.add_argument('--modes', choices=MODES, nargs='+', default=MODES, help='Handlers and views to compare')
+
+
+def run(options, stdout):
+    quote_count = dataset.SIZES[options['size']]
+    stdout.write(f'Generating dataset of {quote_count} quotes...')
+    dataset.generate(quote_count)
+
+    urls = list(itertools.islice(itertools.cycle(get_urls()), options['requests']))   # A mix of list, detail and random requests
+
+    stdout.write(f"{'Mode':<12}{'Concurrency':>12}{'Requests/s':>12}{'Median, ms':>12}{'p95, ms':>10}")
+
+    with override_settings(API_RESPONSE_CACHE={'ENABLED': False}, API_PERFORMANCE={'SAMPLE_RATE': 0.0}):
+        for concurrency in options['concurrency']:
+            for mode in options['modes']:
+                throughput, median, p95 = measure(mode, urls, concurrency)
+                stdout.write(f'{mode:<12}{concurrency:>12}{throughput:>12.0f}{median:>12.1f}{p95:>10.1f}')
@@ -0,0 +1,104 @@
+import factory.random
+import numpy
+from faker.providers.lorem.en_US import Provider as LoremProvider
+
+from api_app.models import Author, Book, Quote, QuoteTag, Tag
+from api_app.signals import fill_folded_fields, refresh_derived_data
+
+from .factories import AuthorFactory, BookFactory, QuoteFactory, TagFactory
+
+
+
+SIZES = {   # Number of quotes in named datasets
+    '10k': 10000,
+    '100k': 100000,
+    '1M': 1000000,
+}
+
+WORDS = numpy.array(LoremProvider.word_list)
+
+
+def zipf_weights(size, exponent=1.1):
+    ''' Popularity of tags roughly follows Zipf's law: a few tags are used very
+        often while most of the tags are rare '''
+
+    weights = 1 / numpy.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def random_texts(rng, count, min_words=5, max_words=40):
+    ''' Generating texts with Faker is too slow for millions of quotes, so
+        texts are made of random words '''
+
+    lengths = rng.integers(min_words, max_words + 1, size=count)
+    words = WORDS[rng.integers(0, len(WORDS), size=int(lengths.sum()))]
+    ends = numpy.cumsum(lengths)
+
+    for start, end in zip(ends - lengths, ends):
+        yield ' '.join(words[start:end]).capitalize() + '.'
+
+
+def bulk_create(model, objects, batch_size):
+    objects = list(objects)
+
+    if hasattr(model, 'folded_fields'):   # bulk_create() does not send pre_save signals
+        for obj in objects:
+            fill_folded_fields(model, obj)
+
+    model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def generate(quote_count, quote_tag_count=None, tag_count=None, seed=0, batch_size=10000):
+    ''' Fill the database with synthetic data. By default there is an author
+        per 100 quotes with 5 books each, a tag per 100 quotes and 3 tags per
+        quote on average. Quote tags are distributed according to Zipf's law.
+        Returns ids of tags, the most popular ones first '''
+
+    rng = numpy.random.default_rng(seed)
+    factory.random.reseed_random(seed)
+
+    quote_tag_count = quote_tag_count if quote_tag_count is not None else quote_count * 3
+    tag_count = tag_count or max(quote_count // 100, 10)
+    author_count = max(quote_count // 100, 1)
+
+    bulk_create(Author, AuthorFactory.build_batch(author_count), batch_size)
+    author_ids = list(Author.objects.order_by('id').values_list('id', flat=True))
+
+    bulk_create(Book, (BookFactory.build(author_id=author_id, author=None) for author_id in author_ids for _ in range(5)), batch_size)
+    books = numpy.array(Book.objects.order_by('id').values_list('id', 'author_id'))
+
+    bulk_create(Tag, (TagFactory.build(name=name) for name in tag_names(tag_count)), batch_size)
+    tag_ids = numpy.array(Tag.objects.order_by('id').values_list('id', flat=True))
+
+    # Texts and books of quotes are generated in bulk, the factory fills in the rest
+    book_choices = books[rng.integers(0, len(books), size=quote_count)]
+
+    for start in range(0, quote_count, batch_size):
+        end = min(start + batch_size, quote_count)
+        texts = random_texts(rng, end - start)
+        bulk_create(Quote, (
+            QuoteFactory.build(text=text, book=None, author=None, book_id=int(book_id), author_id=int(author_id))
+            for text, (book_id, author_id) in zip(texts, book_choices[start:end])),
+            batch_size)
+
+    quote_ids = numpy.array(Quote.objects.order_by('id').values_list('id', flat=True))
+
+    # Draw (quote, tag) pairs and drop duplicates, so the number of rows is
+    # slightly less than requested
+    quote_choices = quote_ids[rng.integers(0, len(quote_ids), size=quote_tag_count)]
+    tag_choices = rng.choice(tag_ids, size=quote_tag_count, p=zipf_weights(len(tag_ids)))
+    pairs = numpy.unique(numpy.stack([quote_choices, tag_choices], axis=1), axis=0)
+
+    for start in range(0, len(pairs), batch_size):
+        bulk_create(QuoteTag, (QuoteTag(quote_id=int(q), tag_id=int(t)) for q, t in pairs[start:start + batch_size]), batch_size)
+
+    refresh_derived_data()
+    return [int(t) for t in tag_ids]
+
+
+def tag_names(count):
+    ''' Unique tag names made of dictionary words, e.g. "lorem", "lorem2" '''
+
+    for i in range(count):
+        suffix = i // len(WORDS)
+        yield f'{WORDS[i % len(WORDS)]}{suffix + 1 if suffix else ""}'
@@ -0,0 +1,185 @@
+''' Measure latency, number of queries and peak memory of every public API
+    endpoint and filter combination, save baselines and compare against them.
+    "stats/response-cache/" is left out: it is an admin-only view of counters
+    of the process, not a part of the public API '''
+
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api_app.models import Author, Book, Quote, Tag
+
+from . import dataset
+
+
+
+def get_cases(tag_ids):
+    ''' (name, URL) of requests to measure. Filters use real values of the
+        generated dataset, e.g. the most popular tags '''
+
+    author = Author.objects.order_by('id').first()
+    book = Book.objects.order_by('id').first()
+    quote = Quote.objects.order_by('id').first()
+    tag = Tag.objects.get(pk=tag_ids[0])
+    word = quote.text.split()[1]
+
+    return [
+        ('authors', reverse('list-of-authors')),
+        ('authors?contains', f"{reverse('list-of-authors')}?contains={author.last_name[:3]}"),
+        ('authors?page=last', f"{reverse('list-of-authors')}?page=last"),
+        ('authors/<id>', reverse('author-details', args=[author.id])),
+        ('books', reverse('list-of-books')),
+        ('books?contains', f"{reverse('list-of-books')}?contains={word}"),
+        ('books?year', f"{reverse('list-of-books')}?year={book.year}"),
+        ('books?isbn', f"{reverse('list-of-books')}?isbn={book.isbn}"),
+        ('books?author', f"{reverse('list-of-books')}?author={author.id}"),
+        ('books/<id>', reverse('book-details', args=[book.id])),
+        ('quotes', reverse('list-of-quotes')),
+        ('quotes?page=last', f"{reverse('list-of-quotes')}?page=last"),
+        ('quotes?pagination=cursor', f"{reverse('list-of-quotes')}?pagination=cursor"),
+        ('quotes?page_size=100', f"{reverse('list-of-quotes')}?page_size=100"),
+        ('quotes?page_size=100&fields', f"{reverse('list-of-quotes')}?page_size=100&fields=id,text"),
+        ('quotes?page_size=5000', f"{reverse('list-of-quotes')}?page_size=5000"),   # Streamed
+        ('quotes?contains', f"{reverse('list-of-quotes')}?contains={word}"),
+        ('quotes?search', f"{reverse('list-of-quotes')}?search={word}"),
+        ('quotes?author', f"{reverse('list-of-quotes')}?author={author.id}"),
+        ('quotes?book', f"{reverse('list-of-quotes')}?book={book.id}"),
+        ('quotes?tags=1 popular', f"{reverse('list-of-quotes')}?tags={tag_ids[0]}"),
+        ('quotes?tags=2 popular', f"{reverse('list-of-quotes')}?tags={tag_ids[0]},{tag_ids[1]}"),
+        ('quotes?tags=popular+rare', f"{reverse('list-of-quotes')}?tags={tag_ids[0]},{tag_ids[-1]}"),
+        ('quotes?tags&author', f"{reverse('list-of-quotes')}?tags={tag_ids[0]}&author={author.id}"),
+        ('quotes?facets', f"{reverse('list-of-quotes')}?facets=tags,language,author,rating,year"),   # Cached after the first request
+        ('quotes?contains&facets', f"{reverse('list-of-quotes')}?contains={word}&facets=tags,language,author,rating,year"),
+        ('quotes/<id>', reverse('quote-details', args=[quote.id])),
+        ('quotes/random', reverse('random-quote-details')),
+        ('quotes/random?count=25', f"{reverse('random-quote-details')}?count=25"),
+        ('tags', reverse('list-of-tags')),
+        ('tags?starts_with', f"{reverse('list-of-tags')}?starts_with={tag.name[:2]}"),
+        ('tags?contains', f"{reverse('list-of-tags')}?contains={tag.name[1:3]}"),
+        ('tags?similar_to', f"{reverse('list-of-tags')}?similar_to={tag.name[:4]}"),
+        ('tags/<id>', reverse('tag-details', args=[tag.id])),
+        ('export/authors', reverse('export-of-authors')),
+        ('export/books', reverse('export-of-books')),
+        ('export/quotes', reverse('export-of-quotes')),
+        ('export/quotes?tags', f"{reverse('export-of-quotes')}?tags={tag_ids[0]}"),
+        ('export/tags', reverse('export-of-tags')),
+    ]
+
+
+def get(client, url):
+    response = client.get(url)
+
+    if response.streaming:   # Consume the content the same way as a server would
+        for _ in response.streaming_content:
+            pass
+
+    return response
+
+
+def get_percentile(values, percent):
+    ''' Nearest-rank percentile, so it is never below the median '''
+
+    return sorted(values)[math.ceil(percent / 100 * len(values)) - 1]
+
+
+def measure_request(client, url, repeat):
+    get(client, url)   # Warm up (load in-memory indexes, etc.)
+    durations = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = get(client, url)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    if response.status_code != 200:
+        raise CommandError(f'{url} responded with {response.status_code}')
+
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        get(client, url)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'latency_ms': round(statistics.median(durations), 3),
+        'p95_latency_ms': round(get_percentile(durations, 95), 3),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak_memory / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    ''' Returns a list of regressions, i.e. measurements which are worse than
+        baseline by more than <tolerance> (a fraction). Query counts must not
+        grow at all '''
+
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        base = baseline[name]
+
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: queries {base['queries']} -> {result['queries']}")
+
+        for metric in ['latency_ms', 'peak_memory_kb']:
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{name}: {metric} {base[metric]} -> {result[metric]}')
+
+    return regressions
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', choices=dataset.SIZES, default='10k', help='Size of generated dataset (number of quotes)')
+    parser.add_argument('--cache', action='store_true', help='Keep response cache enabled (it is disabled by default)')
+    parser.add_argument('--snapshot', action='store_true', help='Serve requests from the in-memory snapshot (see API_SNAPSHOT setting)')
+    parser.add_argument('--only', help='Measure only the cases which names contain this string, e.g. "quotes?tags"')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Save results as JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Compare results with JSON baseline and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown / memory growth compared to baseline (default: 0.25)')
+
+
+def run(options, stdout):
+    quote_count = dataset.SIZES[options['size']]
+    stdout.write(f'Generating dataset of {quote_count} quotes...')
+    tag_ids = dataset.generate(quote_count)
+
+    client = Client(HTTP_HOST='localhost')
+    cases = [(name, url) for name, url in get_cases(tag_ids) if not options['only'] or options['only'] in name]
+    results = {}
+
+    stdout.write(f"{'Case':<28}{'Latency, ms':>13}{'p95, ms':>10}{'Queries':>9}{'Peak memory, KB':>17}")
+
+    with override_settings(API_RESPONSE_CACHE={'ENABLED': options['cache']}, API_SNAPSHOT={'ENABLED': options['snapshot']}):
+        for name, url in cases:
+            result = measure_request(client, url, options['repeat'])
+            results[name] = result
+            stdout.write(f"{name:<28}{result['latency_ms']:>13.1f}{result['p95_latency_ms']:>10.1f}{result['queries']:>9}{result['peak_memory_kb']:>17.1f}")
+
+    if options['save_baseline']:
+        with open(options['save_baseline'], 'w') as f:
+            json.dump({'size': options['size'], 'results': results}, f, indent=2)
+
+    if options['compare']:
+        with open(options['compare']) as f:
+            baseline = json.load(f)
+
+        if baseline['size'] != options['size']:
+            raise CommandError(f"Baseline was measured with dataset of size {baseline['size']}")
+
+        regressions = compare(results, baseline['results'], options['tolerance'])
+
+        if regressions:
+            raise CommandError('Regressions found:\n' + '\n'.join(regressions))
+
+        stdout.write('No regressions found')
@@ -0,0 +1,68 @@
+import factory
+import factory.fuzzy
+
+from api_app.models import Author, Book, Quote, QuoteTag, Tag
+
+
+
+class AuthorFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Author
+
+    class Params:
+        has_middle_name = factory.fuzzy.FuzzyChoice([True, False, False, False, False])
+
+    first_name = factory.Faker('first_name')
+    middle_name = factory.Maybe('has_middle_name', factory.Faker('first_name'), None)
+    last_name = factory.Faker('last_name')
+    date_of_birth = factory.Faker('date_of_birth', minimum_age=20, maximum_age=500)
+    nationality = factory.Faker('country')
+
+
+class BookFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Book
+
+    class Params:
+        has_subtitle = factory.fuzzy.FuzzyChoice([True, False, False])
+
+    author = factory.SubFactory(AuthorFactory)
+    title = factory.Faker('sentence', nb_words=4, variable_nb_words=True)
+    subtitle = factory.Maybe('has_subtitle', factory.Faker('sentence', nb_words=3), None)
+    year = factory.Faker('pyint', min_value=1500, max_value=2022)
+    publisher = factory.Faker('company')
+    isbn = factory.Faker('isbn10', separator='')
+
+
+class QuoteFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Quote
+
+    class Params:
+        has_date = factory.fuzzy.FuzzyChoice([True] + [False] * 9)
+        has_comment = factory.fuzzy.FuzzyChoice([True] + [False] * 19)
+
+    text = factory.Faker('paragraph', nb_sentences=2)
+    book = factory.SubFactory(BookFactory)
+    author = factory.SelfAttribute('book.author')
+    date = factory.Maybe('has_date', factory.Faker('date_object'), None)
+    language = factory.fuzzy.FuzzyChoice(['English', 'English', 'English', 'Lithuanian', 'Latvian', 'German'])
+    length_in_words = factory.LazyAttribute(lambda quote: len(quote.text.split()))
+    editors_comment = factory.Maybe('has_comment', factory.Faker('sentence'), None)
+    rating = factory.Faker('pyint', min_value=1, max_value=5)
+
+
+class TagFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Tag
+        django_get_or_create = ['name']
+
+    name = factory.Sequence(lambda n: f'tag{n}')
+
+
+class QuoteTagFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = QuoteTag
+
+    quote = factory.SubFactory(QuoteFactory)
+    tag = factory.SubFactory(TagFactory)
@@ -0,0 +1,59 @@
+''' Compare throughput of serializing pages of list views: DRF model
+    serializers on model instances vs <ValuesSerializer> on .values() rows '''
+
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api_app.models import Author, Book, Quote, Tag
+from api_app.serializers import (
+    AuthorSerializer, AuthorValuesSerializer, BookSerializer, BookValuesSerializer,
+    QuoteSerializer, QuoteValuesSerializer, TagSerializer, TagValuesSerializer)
+
+from . import dataset
+from .utils import measure
+
+
+
+CASES = [
+    ('authors', Author.objects.order_by('last_name'), AuthorSerializer, AuthorValuesSerializer),
+    ('books', Book.objects.order_by('title'), BookSerializer, BookValuesSerializer),
+    ('quotes', Quote.objects.order_by('text'), QuoteSerializer, QuoteValuesSerializer),
+    ('tags', Tag.objects.order_by('name'), TagSerializer, TagValuesSerializer),
+]
+
+
+def serialize(queryset, serializer_class, context):
+    ''' Do the same work as a list view does with a page: fetch it, serialize
+        and render it '''
+
+    return JSONRenderer().render(serializer_class(list(queryset), many=True, context=context).data)
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', choices=dataset.SIZES, default='10k', help='Size of generated dataset (number of quotes)')
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[25, 100, 1000], help='Number of items per page')
+
+
+def run(options, stdout):
+    quote_count = dataset.SIZES[options['size']]
+    stdout.write(f'Generating dataset of {quote_count} quotes...')
+    dataset.generate(quote_count)
+
+    context = {'request': Request(RequestFactory().get('/', HTTP_HOST='localhost'))}
+
+    stdout.write(f"{'Case':<20}{'DRF, items/s':>16}{'Values, items/s':>18}{'Speedup':>10}")
+
+    for name, queryset, serializer_class, values_serializer_class in CASES:
+        for page_size in options['page_sizes']:
+            page = queryset[:page_size]
+            values_page = values_serializer_class.values(queryset)[:page_size]
+
+            drf_ms, _, drf_content = measure(lambda: serialize(page, serializer_class, context), options['repeat'])
+            values_ms, _, values_content = measure(lambda: serialize(values_page, values_serializer_class, context), options['repeat'])
+
+            if drf_content != values_content:
+                raise AssertionError(f'Serializers disagree on "{name}" page of {page_size} items')
+
+            item_count = len(page)
+            stdout.write(f'{name + " x" + str(page_size):<20}{item_count / drf_ms * 1000:>16.0f}{item_count / values_ms * 1000:>18.0f}{drf_ms / values_ms:>9.1f}x')
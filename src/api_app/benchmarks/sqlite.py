@@ -0,0 +1,108 @@
+''' Compare throughput of concurrent API requests served from a SQLite
+    database file with default connections (opened on every request),
+    persistent connections and an immutable snapshot of the database (see
+    "api_app/backends/sqlite3") '''
+
+import concurrent.futures
+import itertools
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import override_settings
+
+from api_app.models import DataVersion
+
+from . import dataset
+from .asgi import get_urls, wsgi_request
+from .endpoints import get_percentile
+
+
+
+VARIANTS = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0, 'OPTIONS': {}},
+    'persistent': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': None, 'OPTIONS': {}},
+    'immutable': {'ENGINE': 'api_app.backends.sqlite3', 'CONN_MAX_AGE': None, 'OPTIONS': {'immutable': True}},
+}
+
+
+class Router:
+    ''' Routes all the queries to the database being measured '''
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def db_for_read(self, model, **hints):
+        return self.alias
+
+    def db_for_write(self, model, **hints):
+        return self.alias
+
+
+def copy_database(path):
+    ''' Copy the generated (in-memory) database to a file. Every variant gets
+        a fresh copy, because journal mode persists in the file '''
+
+    connection.ensure_connection()
+    target = connection.Database.connect(path)
+
+    with target:
+        connection.connection.backup(target)
+
+    target.close()
+
+
+def measure(alias, urls, threads):
+    ''' Returns requests per second and median and p95 latency (ms) '''
+
+    handler = WSGIHandler()
+
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda url: wsgi_request(handler, url), urls[:threads * 2]))   # Warm up
+
+        start = time.perf_counter()
+        results = list(executor.map(lambda url: wsgi_request(handler, url), urls))
+        duration = time.perf_counter() - start
+
+    failed = [(url, status) for url, (status, latency) in zip(urls, results) if status != 200]
+
+    if failed:
+        raise CommandError(f'{alias}: {failed[0][0]} responded with {failed[0][1]}')
+
+    latencies = sorted(latency for status, latency in results)
+    return len(urls) / duration, statistics.median(latencies), get_percentile(latencies, 95)
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', choices=dataset.SIZES, default='10k', help='Size of generated dataset (number of quotes)')
+    parser.add_argument('--requests', type=int, default=500, help='Number of requests per measurement')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16], help='Number of threads serving requests')
+    parser.add_argument('--variants', choices=VARIANTS, nargs='+', default=list(VARIANTS), help='Connection setups to compare')
+
+
+def run(options, stdout):
+    quote_count = dataset.SIZES[options['size']]
+    stdout.write(f'Generating dataset of {quote_count} quotes...')
+    dataset.generate(quote_count)
+    DataVersion.current()   # Read-only databases must already have it
+
+    urls = list(itertools.islice(itertools.cycle(get_urls()), options['requests']))   # A mix of list, detail and random requests
+
+    stdout.write(f"{'Variant':<12}{'Threads':>9}{'Requests/s':>12}{'Median, ms':>12}{'p95, ms':>10}")
+
+    with tempfile.TemporaryDirectory() as directory, \
+            override_settings(API_RESPONSE_CACHE={'ENABLED': False}, API_PERFORMANCE={'SAMPLE_RATE': 0.0}):
+        for variant in options['variants']:
+            alias = f'benchmark_{variant}'
+            path = Path(directory) / f'{variant}.sqlite3'
+            copy_database(path)
+            connections.settings[alias] = {**connection.settings_dict, **VARIANTS[variant], 'NAME': path}
+
+            with override_settings(DATABASE_ROUTERS=[Router(alias)]):
+                for threads in options['threads']:
+                    throughput, median, p95 = measure(alias, urls, threads)
+                    stdout.write(f'{variant:<12}{threads:>9}{throughput:>12.0f}{median:>12.1f}{p95:>10.1f}')
@@ -0,0 +1,62 @@
+''' Compare searching for quotes tagged with all of the given tags: grouping
+    subquery (<QuoteQuerySet.tagged_with_all()>) vs matching tags in Python
+    (implementation used by <QuoteList> before) '''
+
+from api_app.models import Quote, QuoteTag
+
+from . import dataset
+from .utils import measure
+
+
+
+def tagged_with_all_in_python(tag_ids):
+    tag_ids = set(tag_ids)
+    quote_tag_matches = QuoteTag.objects.filter(tag_id__in=tag_ids).values_list('quote_id', 'tag_id')
+    tags_by_quote = {}
+
+    for q_id, t_id in quote_tag_matches:
+        tags_by_quote.setdefault(q_id, set()).add(t_id)
+
+    matching_quote_ids = [q_id for q_id, t_ids in tags_by_quote.items() if t_ids == tag_ids]
+    return Quote.objects.filter(id__in=matching_quote_ids)
+
+
+def tagged_with_all_in_sql(tag_ids):
+    return Quote.objects.tagged_with_all(tag_ids)
+
+
+def fetch_first_page(quotes):
+    ''' Do the same work as <QuoteList> does to respond with the first page '''
+
+    quotes = quotes.order_by('text')
+    return quotes.count(), list(quotes[:25])
+
+
+def add_arguments(parser):
+    parser.add_argument('--quotes', type=int, default=100000, help='Number of quotes to generate')
+    parser.add_argument('--quote-tags', type=int, default=1000000, help='Number of quote tags to generate')
+    parser.add_argument('--tags', type=int, default=1000, help='Number of tags to generate')
+
+
+def run(options, stdout):
+    stdout.write(f"Generating {options['quotes']} quotes with {options['quote_tags']} tags...")
+    tag_ids = [int(t) for t in dataset.generate(options['quotes'], options['quote_tags'], tag_count=options['tags'])]
+
+    cases = [
+        ('1 popular tag', tag_ids[:1]),
+        ('2 popular tags', tag_ids[:2]),
+        ('popular + rare tag', [tag_ids[0], tag_ids[-1]]),
+        ('3 popular tags', tag_ids[:3]),
+        ('5 tags', tag_ids[:5]),
+    ]
+
+    stdout.write(f"{'Case':<24}{'Matches':>10}{'Python, ms':>14}{'SQL, ms':>14}{'Speedup':>10}")
+
+    for name, case_tag_ids in cases:
+        python_ms, _, (python_count, _) = measure(lambda: fetch_first_page(tagged_with_all_in_python(case_tag_ids)), options['repeat'])
+        sql_ms, _, (sql_count, _) = measure(lambda: fetch_first_page(tagged_with_all_in_sql(case_tag_ids)), options['repeat'])
+
+        if python_count != sql_count:
+            raise AssertionError(f'Implementations disagree on "{name}": {python_count} != {sql_count}')
+
+        stdout.write(f'{name:<24}{sql_count:>10}{python_ms:>14.1f}{sql_ms:>14.1f}{python_ms / sql_ms:>9.1f}x')
@@ -0,0 +1,101 @@
+''' Measure overhead of throttling (see "throttling.py") and load shedding (see
+    "shedding.py"): throughput and latency of concurrent requests served by
+    WSGI handler with each of them enabled, but with limits which are never
+    reached, and cost of a single token bucket update '''
+
+import itertools
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import CommandError
+from django.test import override_settings
+
+from api_app.throttling import LocalBuckets, SharedBuckets
+
+from . import dataset
+from .asgi import get_urls, run_wsgi
+from .utils import measure
+
+
+
+NO_LIMITS = {'RATE': 1e9, 'BURST': 1e9}
+
+CONFIGURATIONS = {
+    'off': {},
+    'throttle': {'API_THROTTLING': {'ENABLED': True, **NO_LIMITS}},
+    'throttle-shared': {'API_THROTTLING': {'ENABLED': True, 'SHARED_CACHE': 'default', **NO_LIMITS}},
+    'shedding': {'API_LOAD_SHEDDING': {'ENABLED': True, 'MAX_IN_FLIGHT': 10 ** 6, 'MAX_QUEUE_TIME': 60}},
+    'both': {
+        'API_THROTTLING': {'ENABLED': True, **NO_LIMITS},
+        'API_LOAD_SHEDDING': {'ENABLED': True, 'MAX_IN_FLIGHT': 10 ** 6, 'MAX_QUEUE_TIME': 60},
+    },
+}
+
+
+def measure_requests(urls, concurrency, repeat):
+    ''' Returns the best requests per second of <repeat> runs, and median and
+        p95 latency (ms) of the best run '''
+
+    run_wsgi(urls, concurrency)   # Warm up
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = run_wsgi(urls, concurrency)
+        duration = time.perf_counter() - start
+
+        failed = [(url, status) for url, (status, latency) in zip(urls, results) if status != 200]
+
+        if failed:
+            raise CommandError(f'{failed[0][0]} responded with {failed[0][1]}')
+
+        if best is None or duration < best[0]:
+            best = (duration, sorted(latency for status, latency in results))
+
+    duration, latencies = best
+    return len(urls) / duration, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def measure_buckets(buckets, repeat, count=10000):
+    ''' Microseconds per update of a token bucket '''
+
+    def take():
+        now = time.time()
+
+        for i in range(count):
+            buckets.take(i % 100, 1, 1e9, 1e9, now)
+
+    median, best, _ = measure(take, repeat)
+    return median * 1000 / count
+
+
+def add_arguments(parser):
+    parser.add_argument('--size', choices=dataset.SIZES, default='10k', help='Size of generated dataset (number of quotes)')
+    parser.add_argument('--requests', type=int, default=500, help='Number of requests per measurement')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8], help='Number of requests in flight')
+
+
+def run(options, stdout):
+    quote_count = dataset.SIZES[options['size']]
+    stdout.write(f'Generating dataset of {quote_count} quotes...')
+    dataset.generate(quote_count)
+
+    urls = list(itertools.islice(itertools.cycle(get_urls()), options['requests']))   # A mix of list, detail and random requests
+
+    stdout.write(f"{'Configuration':<17}{'Concurrency':>12}{'Requests/s':>12}{'Median, ms':>12}{'p95, ms':>10}{'Overhead':>10}")
+
+    with override_settings(API_RESPONSE_CACHE={'ENABLED': False}, API_PERFORMANCE={'SAMPLE_RATE': 0.0}):
+        for concurrency in options['concurrency']:
+            baseline = None
+
+            for name, configuration in CONFIGURATIONS.items():
+                with override_settings(**configuration):
+                    throughput, median, p95 = measure_requests(urls, concurrency, options['repeat'])
+
+                baseline = baseline or median
+                stdout.write(f'{name:<17}{concurrency:>12}{throughput:>12.0f}{median:>12.2f}{p95:>10.2f}{(median - baseline) / baseline:>10.1%}')
+
+    stdout.write(f"{'Token buckets':<17}{'Update, µs':>12}")
+    stdout.write(f"{'local':<17}{measure_buckets(LocalBuckets(1000), options['repeat']):>12.2f}")
+    stdout.write(f"{'shared (locmem)':<17}{measure_buckets(SharedBuckets(caches['default']), options['repeat']):>12.2f}")
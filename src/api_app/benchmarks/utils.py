@@ -0,0 +1,35 @@
+import contextlib
+import statistics
+import time
+
+from django.db import connection
+
+
+
+@contextlib.contextmanager
+def benchmark_database(verbosity=0):
+    ''' Create a test database (the same way Django test runner does) and
+        destroy it afterwards '''
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+
+    try:
+        yield connection
+
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def measure(func, repeat):
+    ''' Call <func> <repeat> times. Returns median and min duration in
+        milliseconds, and the result of the last call '''
+
+    durations = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(durations), min(durations), result
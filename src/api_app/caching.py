@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024,   # Size of in-process LRU cache (per process)
+    'SHARED_CACHE': None,   # Alias of Django cache (see CACHES setting) shared by all processes, e.g. 'default'
+    'TIMEOUT': 300,   # Seconds to keep responses in the shared cache
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_RESPONSE_CACHE', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class LRUCache:
+    ''' Thread-safe dict with limited number of entries. When it is full, the
+        least recently used entry is evicted '''
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ResponseCache:
+    ''' Cache of rendered responses. Entries are looked up in in-process LRU
+        cache first and then in the shared cache (if it is configured). Keys
+        contain data version, so the entries become stale as soon as any
+        resource changes. Stale entries of in-process cache are dropped right
+        away (see "signals.py") while stale entries of the shared cache simply
+        expire '''
+
+    def __init__(self):
+        self.local = LRUCache(get_setting('MAX_ENTRIES'))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        alias = get_setting('SHARED_CACHE')
+        return caches[alias] if alias else None
+
+    def make_key(self, request, data_version):
+        ''' Key is made of the data version, host (responses contain absolute
+            URLs) and normalized path, i.e. the order of query parameters does
+            not matter '''
+
+        query = sorted((key, value) for key in request.GET for value in request.GET.getlist(key))
+        query = '&'.join(f'{key}={value}' for key, value in query)
+        key = f'{data_version}:{request.get_host()}{request.path}?{query}'
+        return 'api_app:response:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.local.get(key)
+
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key, None)
+            if entry is not None:
+                self.local.set(key, entry)
+                self.count('shared_hits')
+
+        self.count('hits' if entry is not None else 'misses')
+        return entry
+
+    def set(self, key, entry):
+        self.local.set(key, entry)
+
+        if self.shared is not None:
+            self.shared.set(key, entry, get_setting('TIMEOUT'))
+
+    def clear_local(self):
+        self.local.clear()
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.local.evictions,
+            'entries': len(self.local),
+            'max_entries': self.local.max_entries,
+        }
+
+
+response_cache = ResponseCache()   # Process-wide cache used by <CachedResponseMixin>
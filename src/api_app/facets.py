@@ -0,0 +1,175 @@
+''' Faceted counts of list views, e.g. quotes/?facets=tags,language. Every
+    facet is counted by a single GROUP BY query over the filtered queryset of
+    the view (plus a query for names of tags), or by a pass over the filtered
+    records of the snapshot (see "snapshot.py"). Counts are cached by data
+    version and filters of the request, so paging through the same results
+    counts them once, and any change of the data makes the cached counts
+    stale '''
+
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count
+
+from .caching import LRUCache
+from .models import QuoteTag, Tag
+
+
+
+DEFAULT_SETTINGS = {
+    'MAX_VALUES': 100,   # Values of a facet with the highest counts, the rest are left out
+    'MAX_ENTRIES': 1024,   # Size of in-process LRU cache of counts (per process)
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_FACETS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_author_name(first_name, middle_name, last_name):
+    return ' '.join(filter(bool, [first_name, middle_name, last_name])).strip()   # The same as str() of <Author>
+
+
+def sort_counts(counts, limit):
+    ''' (value, count) pairs of <counts> with the highest counts first, then
+        by value (None first), the same order as the queries use '''
+
+    pairs = sorted(counts.items(), key=lambda pair: (-pair[1], pair[0] is not None, pair[0]))
+    return pairs[:limit]
+
+
+class Facet:
+    ''' Counts of distinct values of <field> of quotes, e.g. [{"value": "en",
+        "count": 10}, ...] '''
+
+    def __init__(self, field):
+        self.field = field
+
+    def count(self, quotes, limit):
+        rows = (quotes
+            .order_by()
+            .values_list(self.field)
+            .annotate(count=Count('id'))
+            .order_by('-count', self.field)[:limit])
+
+        return [self.get_entry(value, count) for value, count in rows]
+
+    def count_records(self, snapshot, records, limit):
+        counts = Counter(getattr(record, self.field) for record in records)
+        return [self.get_entry(value, count) for value, count in sort_counts(counts, limit)]
+
+    def get_entry(self, value, count):
+        return {'value': value, 'count': count}
+
+
+class BookYearFacet(Facet):
+    def __init__(self):
+        super().__init__('book__year')
+
+    def count_records(self, snapshot, records, limit):
+        books = snapshot.books.records
+        counts = Counter(books[record.book_id].year for record in records)
+        return [self.get_entry(value, count) for value, count in sort_counts(counts, limit)]
+
+
+class AuthorFacet(Facet):
+    ''' Counts of quotes by author, e.g. [{"id": 1, "name": "William
+        Shakespeare", "count": 10}, ...] '''
+
+    name_fields = ['author__first_name', 'author__middle_name', 'author__last_name']
+
+    def __init__(self):
+        super().__init__('author_id')
+
+    def count(self, quotes, limit):
+        rows = (quotes
+            .order_by()
+            .values_list(self.field, *self.name_fields)
+            .annotate(count=Count('id'))
+            .order_by('-count', self.field)[:limit])
+
+        return [{'id': id, 'name': get_author_name(*names), 'count': count} for id, *names, count in rows]
+
+    def count_records(self, snapshot, records, limit):
+        authors = snapshot.authors.records
+        counts = Counter(record.author_id for record in records)
+        entries = []
+
+        for id, count in sort_counts(counts, limit):
+            author = authors[id]
+            entries.append({'id': id, 'name': get_author_name(author.first_name, author.middle_name, author.last_name), 'count': count})
+
+        return entries
+
+
+class TagsFacet(Facet):
+    ''' Counts of quotes by tag, e.g. [{"id": 3, "name": "wisdom", "count":
+        10}, ...] '''
+
+    def __init__(self):
+        super().__init__('tag_id')
+
+    def count(self, quotes, limit):
+        ''' Quote tags are grouped by tag id alone, names of the tags with the
+            highest counts are fetched afterwards, which is cheaper than
+            grouping by a join with <Tag> '''
+
+        quote_tags = QuoteTag.objects.all()
+
+        if quotes.query.has_filters():   # Otherwise, all the quote tags are counted without a subquery
+            quote_tags = quote_tags.filter(quote_id__in=quotes.order_by().values('id'))
+
+        rows = list(quote_tags
+            .values_list('tag_id')
+            .annotate(count=Count('quote_id'))
+            .order_by('-count', 'tag_id')[:limit])
+
+        names = dict(Tag.objects.filter(id__in=[id for id, count in rows]).values_list('id', 'name')) if rows else {}
+        return [{'id': id, 'name': names.get(id, None), 'count': count} for id, count in rows]   # A tag may be deleted in between
+
+    def count_records(self, snapshot, records, limit):
+        counts = Counter()
+        names = {}
+
+        for record in records:
+            for tag in record.tag_list:   # See <Quote.tag_list>
+                counts[tag['id']] += 1
+                names[tag['id']] = tag['name']
+
+        return [{'id': id, 'name': names[id], 'count': count} for id, count in sort_counts(counts, limit)]
+
+
+QUOTE_FACETS = {
+    'tags': TagsFacet(),
+    'language': Facet('language'),
+    'author': AuthorFacet(),
+    'rating': Facet('rating'),
+    'year': BookYearFacet(),
+}
+
+
+class FacetCache:
+    ''' In-process cache of facet counts. Keys contain data version, so the
+        counts become stale as soon as any resource changes. Stale entries are
+        dropped right away (see "signals.py") '''
+
+    def __init__(self):
+        self.local = LRUCache(get_setting('MAX_ENTRIES'))
+
+    def get_counts(self, key, count):
+        ''' Cached counts of <key>, or counts returned by <count>() which are
+            cached then '''
+
+        counts = self.local.get(key)
+
+        if counts is None:
+            counts = count()
+            self.local.set(key, counts)
+
+        return counts
+
+    def clear(self):
+        self.local.clear()
+
+
+facet_cache = FacetCache()
@@ -0,0 +1,231 @@
+''' Bulk import of quotes (with their authors, books and tags) from CSV or
+    newline delimited JSON, see "import_quotes" command. Rows are inserted
+    with bulk_create() in batches, one transaction per batch. Authors, books
+    and tags are resolved through in-memory maps, so every batch takes a
+    fixed number of queries. bulk_create() sends no signals, so derived data
+    (full-text index, caches, data version) is refreshed once at the end '''
+
+import csv
+import datetime
+import json
+
+from django.db import transaction
+
+from .models import Author, Book, Quote, QuoteTag, Tag
+from .signals import fill_folded_fields, refresh_derived_data
+
+
+
+FORMATS = ['csv', 'ndjson']
+
+# Columns of CSV files and keys of JSON objects. "tags" is a list of tag names
+# in JSON and a comma-separated string in CSV
+COLUMNS = [
+    'text', 'date', 'language', 'editors_comment', 'rating', 'tags',
+    'author_first_name', 'author_middle_name', 'author_last_name', 'author_date_of_birth', 'author_nationality',
+    'book_title', 'book_subtitle', 'book_year', 'book_publisher', 'book_isbn',
+    ]
+
+
+class InvalidRow(ValueError):
+    def __init__(self, line_number, message):
+        super().__init__(f'Line {line_number}: {message}')
+
+
+def read_rows(file, format):
+    ''' (line number, dict) of every row of <file> '''
+
+    if format == 'csv':
+        reader = csv.DictReader(file)
+
+        for row in reader:
+            yield reader.line_num, row
+
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    raise InvalidRow(line_number, f'invalid JSON ({e})')
+
+                if not isinstance(data, dict):
+                    raise InvalidRow(line_number, 'row must be a JSON object')
+
+                yield line_number, data
+
+
+class Row:
+    ''' Parsed and validated row '''
+
+    def __init__(self, line_number, data):
+        self.line_number = line_number
+        self.data = data
+        self.text = self.get('text', required=True)
+        self.author_key = (self.get('author_first_name'), self.get('author_middle_name'), self.get('author_last_name', required=True))
+        self.book_title = self.get('book_title', required=True)
+        self.tags = self.get_tags()
+
+    def get(self, name, required=False, convert=None):
+        value = self.data.get(name, None)
+
+        if isinstance(value, str):
+            value = value.strip()
+
+        if value in (None, ''):
+            if required:
+                raise InvalidRow(self.line_number, f'"{name}" is required')
+            return None
+
+        if convert is None:
+            if not isinstance(value, str):
+                raise InvalidRow(self.line_number, f'"{name}" must be a string')
+            return value
+
+        try:
+            return convert(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidRow(self.line_number, f'invalid "{name}" ({e})')
+
+    def get_date(self, name, required=False):
+        return self.get(name, required, lambda value: datetime.date.fromisoformat(str(value)))
+
+    def get_tags(self):
+        tags = self.data.get('tags', None) or []
+
+        if isinstance(tags, str):
+            tags = tags.split(',')
+
+        if not isinstance(tags, list) or not all(isinstance(name, str) for name in tags):
+            raise InvalidRow(self.line_number, '"tags" must be a list of names')
+
+        tags = list(dict.fromkeys(name.strip() for name in tags if name.strip()))   # Unique, in the original order
+        max_length = Tag._meta.get_field('name').max_length
+
+        if any(len(name) > max_length for name in tags):
+            raise InvalidRow(self.line_number, f'tag names must be at most {max_length} characters long')
+
+        return tags
+
+    def build_author(self):
+        first_name, middle_name, last_name = self.author_key
+
+        return Author(
+            first_name=first_name,
+            middle_name=middle_name,
+            last_name=last_name,
+            date_of_birth=self.get_date('author_date_of_birth', required=True),
+            nationality=self.get('author_nationality', required=True))
+
+    def build_book(self, author_id):
+        return Book(
+            author_id=author_id,
+            title=self.book_title,
+            subtitle=self.get('book_subtitle'),
+            year=self.get('book_year', required=True, convert=int),
+            publisher=self.get('book_publisher') or '',
+            isbn=self.get('book_isbn') or '')
+
+    def build_quote(self, author_id, book_id, tag_list):
+        return Quote(
+            text=self.text,
+            author_id=author_id,
+            book_id=book_id,
+            date=self.get_date('date'),
+            language=self.get('language', required=True),
+            length_in_words=len(self.text.split()),
+            editors_comment=self.get('editors_comment'),
+            rating=self.get('rating', convert=int),
+            tag_list=tag_list)
+
+
+class QuoteImporter:
+    ''' Imports rows in batches of <batch_size>. Authors are matched by name,
+        books by author and title, tags by name. Missing ones are created
+        (from the first row that mentions them). An invalid row rolls back its
+        batch and stops the import, the batches before it stay imported '''
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.counts = dict.fromkeys(['rows', 'authors', 'books', 'tags', 'quotes', 'quote_tags'], 0)
+        self.author_ids = {self.get_author_key(*names): id for id, *names in Author.objects.values_list('id', 'first_name', 'middle_name', 'last_name')}
+        self.book_ids = {(author_id, title): id for id, author_id, title in Book.objects.values_list('id', 'author_id', 'title')}
+        self.tag_ids = {name: id for id, name in Tag.objects.values_list('id', 'name')}
+
+    @staticmethod
+    def get_author_key(first_name, middle_name, last_name):
+        return (first_name or None, middle_name or None, last_name)
+
+    def import_rows(self, rows):
+        ''' Imports (line number, dict) <rows>. Yields after every batch, so
+            progress can be reported '''
+
+        batch = []
+
+        for line_number, data in rows:
+            batch.append(Row(line_number, data))
+
+            if len(batch) == self.batch_size:
+                self.import_batch(batch)
+                batch = []
+                yield self.counts
+
+        if batch:
+            self.import_batch(batch)
+            yield self.counts
+
+    @transaction.atomic
+    def import_batch(self, rows):
+        new_authors = {}
+
+        for row in rows:
+            key = self.get_author_key(*row.author_key)
+            if key not in self.author_ids and key not in new_authors:
+                new_authors[key] = row.build_author()
+
+        self.create(Author, new_authors, self.author_ids, 'authors')
+        new_books = {}
+
+        for row in rows:
+            author_id = self.author_ids[self.get_author_key(*row.author_key)]
+            key = (author_id, row.book_title)
+            if key not in self.book_ids and key not in new_books:
+                new_books[key] = row.build_book(author_id)
+
+        self.create(Book, new_books, self.book_ids, 'books')
+        new_tags = {name: Tag(name=name) for row in rows for name in row.tags if name not in self.tag_ids}
+        self.create(Tag, new_tags, self.tag_ids, 'tags')
+
+        quotes = []
+
+        for row in rows:
+            author_id = self.author_ids[self.get_author_key(*row.author_key)]
+            tag_list = sorted(({'id': self.tag_ids[name], 'name': name} for name in row.tags), key=lambda tag: tag['id'])   # See <Quote.tag_list>
+            quotes.append(row.build_quote(author_id, self.book_ids[(author_id, row.book_title)], tag_list))
+
+        Quote.objects.bulk_create(quotes, batch_size=self.batch_size)
+        quote_tags = [QuoteTag(quote_id=quote.id, tag_id=tag['id']) for quote in quotes for tag in quote.tag_list]
+        QuoteTag.objects.bulk_create(quote_tags, batch_size=self.batch_size)
+
+        self.counts['rows'] += len(rows)
+        self.counts['quotes'] += len(quotes)
+        self.counts['quote_tags'] += len(quote_tags)
+
+    def create(self, model, objects_by_key, ids, name):
+        ''' Insert <objects_by_key> and add their ids to <ids> '''
+
+        if hasattr(model, 'folded_fields'):   # bulk_create() does not send pre_save signals
+            for obj in objects_by_key.values():
+                fill_folded_fields(model, obj)
+
+        model.objects.bulk_create(objects_by_key.values(), batch_size=self.batch_size)   # Sets ids (RETURNING)
+
+        for key, obj in objects_by_key.items():
+            ids[key] = obj.id
+
+        self.counts[name] += len(objects_by_key)
+
+    def finish(self):
+        ''' Bring derived data up to date (once, after all the batches) '''
+
+        refresh_derived_data()
@@ -0,0 +1,165 @@
+import asyncio
+import contextlib
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.response import Response
+
+
+
+DEFAULT_SETTINGS = {
+    'SAMPLE_RATE': 1.0,   # Fraction of requests to instrument
+    'SERVER_TIMING': True,   # Add "Server-Timing" header to responses
+    'LOG': True,   # Log timings of every instrumented request
+}
+
+logger = logging.getLogger('api_app.performance')
+
+
+def get_setting(name):
+    return getattr(settings, 'API_PERFORMANCE', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class RequestTimings:
+    ''' Durations (in milliseconds) of the stages of request processing '''
+
+    stages = ['db', 'queryset', 'serialize', 'render']
+
+    def __init__(self, measure_db=True):
+        self.measure_db = measure_db   # Whether queries are recorded (see <PerformanceMiddleware>)
+        self.queries = 0
+        self.durations = dict.fromkeys(self.stages, 0.0)
+        self.view_finished = None
+
+    def record_query(self, execute, sql, params, many, context):
+        ''' Database execute wrapper (see connection.execute_wrapper()) '''
+
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+
+        finally:
+            self.durations['db'] += (time.perf_counter() - start) * 1000
+            self.queries += 1
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            self.durations[stage] += (time.perf_counter() - start) * 1000
+
+    def server_timing(self, total):
+        metrics = [f'db;dur={self.durations["db"]:.2f};desc="{self.queries} queries"'] if self.measure_db else []
+        metrics += [f'{stage};dur={self.durations[stage]:.2f}' for stage in self.stages[1:]]
+        metrics.append(f'total;dur={total:.2f}')
+        return ', '.join(metrics)
+
+
+def measure(request, stage):
+    ''' Measure duration of a stage of request processing if the request is
+        instrumented, e.g. with measure(request, 'serialize'): ... '''
+
+    timings = getattr(request, 'timings', None)
+    return timings.measure(stage) if timings is not None else contextlib.nullcontext()
+
+
+class PerformanceMiddleware(MiddlewareMixin):
+    ''' Records number of queries and durations of database queries, queryset
+        evaluation, serialization and rendering of a sample of requests. Views
+        report their stages with <InstrumentedViewMixin>. Timings are added to
+        "Server-Timing" header and logged to "api_app.performance" logger.
+        Under ASGI with async views queries run in worker threads, which
+        connections can not be wrapped from here, so they are not recorded '''
+
+    def __init__(self, get_response):
+        super().__init__(get_response)   # <MiddlewareMixin> marks the instance as a coroutine function under ASGI
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        if random.random() >= get_setting('SAMPLE_RATE'):
+            return self.get_response(request)
+
+        timings = request.timings = RequestTimings()
+        start = time.perf_counter()
+
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings.record_query))
+
+            response = self.get_response(request)
+
+        return self.report(request, response, timings, start)
+
+    async def __acall__(self, request):
+        if random.random() >= get_setting('SAMPLE_RATE'):
+            return await self.get_response(request)
+
+        timings = request.timings = RequestTimings(measure_db=False)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.report(request, response, timings, start)
+
+    def report(self, request, response, timings, start):
+        total = (time.perf_counter() - start) * 1000
+
+        if get_setting('SERVER_TIMING'):
+            response['Server-Timing'] = timings.server_timing(total)
+
+        if get_setting('LOG'):
+            logger.info('%s %s %s %.2fms', request.method, request.get_full_path(), response.status_code, total, extra={
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'queries': timings.queries if timings.measure_db else None,
+                'db_ms': timings.durations['db'] if timings.measure_db else None,
+                'queryset_ms': timings.durations['queryset'],
+                'serialize_ms': timings.durations['serialize'],
+                'render_ms': timings.durations['render'],
+                'total_ms': total,
+            })
+
+        return response
+
+
+class InstrumentedViewMixin:
+    ''' Reports queryset evaluation, serialization and rendering durations of
+        DRF views to <PerformanceMiddleware> '''
+
+    def list(self, request, *args, **kwargs):
+        with measure(request, 'queryset'):
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            items = page if page is not None else list(queryset)
+
+        with measure(request, 'serialize'):
+            data = self.get_serializer(items, many=True).data
+
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timings = getattr(request, 'timings', None)
+
+        if timings is not None and hasattr(response, 'add_post_render_callback'):
+            timings.view_finished = time.perf_counter()
+            response.add_post_render_callback(lambda response: self.record_render_duration(timings))
+
+        return response
+
+    def record_render_duration(self, timings):
+        timings.durations['render'] += (time.perf_counter() - timings.view_finished) * 1000
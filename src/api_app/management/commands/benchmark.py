@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api_app.benchmarks import BENCHMARKS
+from api_app.benchmarks.utils import benchmark_database
+
+
+
+class Command(BaseCommand):
+    help = 'Run a benchmark against synthetic data in a throwaway test database'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(title='benchmarks', dest='benchmark', required=True)
+
+        for name, module in BENCHMARKS.items():
+            subparser = subparsers.add_parser(name, help=module.__doc__.strip().splitlines()[0])
+            subparser.add_argument('--repeat', type=int, default=5, help='Number of times to repeat each measurement')
+            module.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        with benchmark_database(verbosity=options['verbosity'] - 1):
+            BENCHMARKS[options['benchmark']].run(options, self.stdout)
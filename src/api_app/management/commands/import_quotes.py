@@ -0,0 +1,60 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app import importing
+
+
+
+class Command(BaseCommand):
+    help = f'Import quotes from a CSV or newline delimited JSON file. Columns: {", ".join(importing.COLUMNS)}'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the file to import ("-" to read from standard input)')
+        parser.add_argument('--format', choices=importing.FORMATS, help='Format of the file (by default, guessed by its extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows inserted per transaction (default: 1000)')
+
+    def handle(self, *args, **options):
+        format = options['format'] or self.guess_format(options['path'])
+
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive')
+
+        try:
+            file = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Can not open the file ({e})') from e
+
+        importer = importing.QuoteImporter(batch_size=options['batch_size'])
+        start = time.perf_counter()
+
+        try:
+            with file:
+                for counts in importer.import_rows(importing.read_rows(file, format)):
+                    rate = counts['rows'] / (time.perf_counter() - start)
+                    self.stdout.write(f"Imported {counts['rows']} rows ({rate:.0f} rows/s)")
+
+        except importing.InvalidRow as e:
+            raise CommandError(f'{e}. Rows before its batch have been imported') from e
+
+        finally:
+            if importer.counts['rows']:
+                importer.finish()   # Even after an error, so the imported rows are indexed
+
+        duration = time.perf_counter() - start
+        counts = importer.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['quotes']} quotes, {counts['authors']} new authors, {counts['books']} new books, "
+            f"{counts['tags']} new tags and {counts['quote_tags']} quote tags in {duration:.1f} s "
+            f"({counts['rows'] / duration if duration else 0:.0f} rows/s)"))
+
+    def guess_format(self, path):
+        suffix = Path(path).suffix.lower().lstrip('.')
+        format = {'jsonl': 'ndjson', 'json': 'ndjson'}.get(suffix, suffix)
+
+        if format not in importing.FORMATS:
+            raise CommandError('Unknown format of the file, use --format')
+
+        return format
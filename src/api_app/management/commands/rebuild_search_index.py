@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app import search
+
+
+
+class Command(BaseCommand):
+    help = 'Rebuild full-text search index of quotes from scratch'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search is supported only with SQLite database')
+
+        quote_count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {quote_count} quotes'))
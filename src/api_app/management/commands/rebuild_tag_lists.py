@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app import tag_lists
+from api_app.models import DataVersion
+
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized tag lists of quotes, or only check them for drift (--check)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Report quotes which tag lists are out of date without fixing them')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            return self.check_tag_lists()
+
+        fixed_count = tag_lists.rebuild_tag_lists()
+
+        if fixed_count:
+            DataVersion.bump()   # Cached responses and snapshots of other processes have the old tag lists
+
+        self.stdout.write(self.style.SUCCESS(f'Fixed tag lists of {fixed_count} quotes'))
+
+    def check_tag_lists(self):
+        stale_count = 0
+
+        for stale in tag_lists.iter_stale_tag_lists():
+            for quote_id, (stored, actual) in stale.items():
+                self.stdout.write(f'Quote {quote_id}: {stored} != {actual}')
+
+            stale_count += len(stale)
+
+        if stale_count:
+            raise CommandError(f'Tag lists of {stale_count} quotes are out of date, run "rebuild_tag_lists" to fix them')
+
+        self.stdout.write(self.style.SUCCESS('All tag lists are up to date'))
@@ -0,0 +1,67 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(blank=True, max_length=64, null=True)),
+                ('middle_name', models.CharField(blank=True, max_length=64, null=True)),
+                ('last_name', models.CharField(max_length=64)),
+                ('date_of_birth', models.DateField()),
+                ('nationality', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=512)),
+                ('subtitle', models.CharField(blank=True, max_length=1024, null=True)),
+                ('year', models.IntegerField()),
+                ('publisher', models.CharField(max_length=256)),
+                ('isbn', models.CharField(max_length=13)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_app.author')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Quote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('date', models.DateField(blank=True, null=True)),
+                ('language', models.CharField(max_length=64)),
+                ('length_in_words', models.IntegerField(blank=True, null=True)),
+                ('editors_comment', models.TextField(blank=True, null=True)),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_app.author')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_app.book')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuoteTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quote', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_app.quote')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api_app.tag')),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from api_app.search import FTS_TABLE
+
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+        f"USING fts5(text, editors_comment, tokenize='unicode61 remove_diacritics 2')")
+
+    schema_editor.execute(
+        f'INSERT INTO {FTS_TABLE} (rowid, text, editors_comment) '
+        f"SELECT id, text, COALESCE(editors_comment, '') FROM api_app_quote")
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
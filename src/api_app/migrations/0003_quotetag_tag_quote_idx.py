@@ -0,0 +1,17 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0002_quote_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quotetag',
+            index=models.Index(fields=['tag', 'quote'], name='quotetag_tag_quote_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+from api_app.utils import fold
+
+
+FOLDED_FIELDS = {
+    'Author': {'first_name': 'first_name_folded', 'middle_name': 'middle_name_folded', 'last_name': 'last_name_folded'},
+    'Book': {'title': 'title_folded', 'subtitle': 'subtitle_folded'},
+    'Tag': {'name': 'name_folded'},
+}
+
+
+def fill_folded_fields(apps, schema_editor):
+    for model_name, fields in FOLDED_FIELDS.items():
+        model = apps.get_model('api_app', model_name)
+        objects = list(model.objects.all())
+
+        for obj in objects:
+            for source, target in fields.items():
+                setattr(obj, target, fold(getattr(obj, source)))
+
+        model.objects.bulk_update(objects, list(fields.values()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0004_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='first_name_folded',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='last_name_folded',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='middle_name_folded',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='subtitle_folded',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='title_folded',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='name_folded',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_folded_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+def fill_tag_lists(apps, schema_editor):
+    Quote = apps.get_model('api_app', 'Quote')
+    QuoteTag = apps.get_model('api_app', 'QuoteTag')
+    tag_lists = {}
+
+    for quote_id, tag_id, tag_name in QuoteTag.objects.order_by('quote_id', 'tag_id').values_list('quote_id', 'tag_id', 'tag__name'):
+        tag_lists.setdefault(quote_id, []).append({'id': tag_id, 'name': tag_name})
+
+    quotes = [Quote(id=quote_id, tag_list=tag_list) for quote_id, tag_list in tag_lists.items()]
+    Quote.objects.bulk_update(quotes, ['tag_list'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0006_filter_and_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='tag_list',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_tag_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,335 @@
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from . import pagination
+from .caching import get_setting, response_cache
+from .facets import facet_cache, get_setting as get_facets_setting
+from .instrumentation import measure
+from .renderers import FastJSONRenderer, NDJSONRenderer
+from .serializers import compile_fields
+from .models import DataVersion
+from .snapshot import get_request_snapshot
+
+
+
+class DataVersionMixin:
+    ''' Base for mixins that rely on the fact that a response depends only on
+        the request and the current <DataVersion> '''
+
+    deterministic = True   # Set to False for views which responses differ on every request
+
+    def is_deterministic(self, request):
+        return self.deterministic
+
+    def get_data_version(self, request):
+        if not hasattr(request, 'data_version'):   # Look the version up once per request
+            snapshot = get_request_snapshot(request)
+            request.data_version = snapshot.data_version if snapshot is not None else DataVersion.current()
+
+        return request.data_version
+
+
+class ConditionalGetMixin(DataVersionMixin):
+    ''' Adds ETag and Last-Modified headers (derived from <DataVersion>) to
+        responses and responds with "304 Not Modified" if the client already
+        has the current data, without evaluating querysets or serializers '''
+
+    def dispatch(self, request, *args, **kwargs):
+        view = condition(etag_func=self.get_etag, last_modified_func=self.get_last_modified)(super().dispatch)
+        return view(request, *args, **kwargs)
+
+    def get_etag(self, request, *args, **kwargs):
+        if not self.is_deterministic(request):
+            return None
+
+        return f'v{self.get_data_version(request).version}'
+
+    def get_last_modified(self, request, *args, **kwargs):
+        if not self.is_deterministic(request):
+            return None
+
+        return self.get_data_version(request).modified
+
+
+class CachedResponseMixin(DataVersionMixin):
+    ''' Serves rendered responses from <response_cache>, so the same requests
+        do not evaluate querysets and serializers again until data changes.
+        Streamed responses are not cached '''
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not get_setting('ENABLED') or not self.is_deterministic(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_cache.make_key(request, self.get_data_version(request).version)
+        entry = response_cache.get(key)
+
+        if entry is not None:
+            content, headers = entry
+            response = HttpResponse(content, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+
+        if response.status_code == 200 and not response.streaming:
+            response.render()
+            response_cache.set(key, (response.content, dict(response.items())))
+
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ValuesListMixin:
+    ''' Serializes pages of list views with <values_serializer_class> (see
+        <ValuesSerializer>), i.e. from .values() rows, when the view returns a
+        queryset. Lists of model instances are serialized as usual '''
+
+    values_serializer_class = None
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        self.values_listed = self.values_serializer_class is not None and isinstance(queryset, QuerySet)
+
+        if self.values_listed:
+            context = self.get_serializer_context()
+            extra_columns = ['id', getattr(self, 'ordering', None)]   # Needed by cursor pagination
+            queryset = self.values_serializer_class.values(queryset, context.get('expand', ()), context.get('fields', None), extra_columns)
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many', False) and getattr(self, 'values_listed', False):
+            kwargs.setdefault('context', self.get_serializer_context())
+
+            if getattr(self.paginator, 'streaming', False):   # Page is serialized while it is being sent
+                kwargs['chunk_size'] = pagination.get_setting('CHUNK_SIZE')
+
+            return self.values_serializer_class(*args, **kwargs)
+
+        return super().get_serializer(*args, **kwargs)
+
+
+class SnapshotMixin:
+    ''' Serves items from the in-memory snapshot (see "snapshot.py") instead
+        of the database when snapshots are enabled. Records of the snapshot are
+        serialized with <values_serializer_class>, so the output is the same.
+        List views narrow down and order the records in get_snapshot_items()
+        the same way as get_queryset() does, or return None to be served by
+        the ORM (unsupported filters) '''
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        snapshot = get_request_snapshot(request)
+        items = self.get_snapshot_items(snapshot) if snapshot is not None else None
+
+        if items is None:
+            request.snapshot = None   # The rest of the request is served by the ORM as well
+            return super().list(request, *args, **kwargs)
+
+        self.values_listed = False   # Pages are in memory already, so they are never streamed
+
+        with measure(request, 'queryset'):
+            page = self.paginate_queryset(items)
+
+        with measure(request, 'serialize'):
+            data = self.serialize(page if page is not None else items, many=True)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
+
+    def get_snapshot_items(self, snapshot):
+        return None
+
+    def get_item(self, pk):
+        ''' Item (a model instance or a record of the snapshot) of a detail
+            view '''
+
+        snapshot = get_request_snapshot(self.request)
+        model = self.serializer_class.Meta.model
+
+        if snapshot is None:
+            try:
+                return self.filter_queryset(self.get_queryset()).get(pk=pk)
+            except model.DoesNotExist:
+                raise NotFound()
+
+        item = snapshot.tables[model].get(pk)
+
+        if item is None:
+            raise NotFound()
+
+        return item
+
+    def serialize(self, items, many=False):
+        snapshot = get_request_snapshot(self.request)
+
+        if snapshot is None:
+            return self.get_serializer(items, many=many).data
+
+        context = self.get_serializer_context()
+        serializer = self.values_serializer_class(context=context)
+        columns = serializer.get_columns(context.get('expand', ()), context.get('fields', None))
+        rows = snapshot.get_rows(self.serializer_class.Meta.model, items if many else [items], columns)
+        data = serializer.to_representation(rows)
+        return data if many else data[0]
+
+
+class FacetsMixin(DataVersionMixin):
+    ''' Adds counts of values of <facets> of all the filtered items (not only
+        of the page) to pages of list views, e.g. quotes/?facets=tags,language.
+        Counts are cached by data version and values of <filter_params> (see
+        "facets.py"), so every page of the same results reuses them '''
+
+    facets = {}   # Name: <Facet>
+    filter_params = []   # Query parameters which narrow down the items
+    facets_query_param = 'facets'
+
+    def get_paginated_response(self, data):
+        names = self.get_facet_names()
+
+        if names:
+            with measure(self.request, 'queryset'):
+                self.paginator.extra_data = {'facets': self.get_facet_counts(names)}
+
+        return super().get_paginated_response(data)
+
+    def get_facet_names(self):
+        names = self.request.query_params.get(self.facets_query_param, '').split(',')
+        return [name for name in dict.fromkeys(names) if name in self.facets]   # Unknown facets are ignored
+
+    def get_facet_counts(self, names):
+        ''' {name: counts} of facets <names>. Filtered items are fetched at
+            most once, and only if some counts are not cached '''
+
+        if hasattr(self, 'facet_counts'):   # Counted already (see async QuoteList)
+            return self.facet_counts
+
+        params = self.request.query_params
+        signature = tuple((param, params.get(param)) for param in self.filter_params if param in params)
+        version = self.get_data_version(self.request).version
+        limit = get_facets_setting('MAX_VALUES')
+        filtered = None
+
+        def count(facet):
+            nonlocal filtered
+
+            if filtered is None:
+                filtered = self.get_filtered_items()
+
+            snapshot, items = filtered
+            return facet.count(items, limit) if snapshot is None else facet.count_records(snapshot, items, limit)
+
+        self.facet_counts = {}
+
+        for name in names:
+            key = (version, type(self).__name__, signature, name, limit)
+            self.facet_counts[name] = facet_cache.get_counts(key, lambda: count(self.facets[name]))
+
+        return self.facet_counts
+
+    def get_filtered_items(self):
+        ''' (snapshot, records of the snapshot) or (None, queryset) of the
+            filtered items '''
+
+        snapshot = get_request_snapshot(self.request)
+        items = self.get_snapshot_items(snapshot) if snapshot is not None else None
+
+        if items is None:
+            return None, self.get_queryset()
+
+        return snapshot, items
+
+
+class ExpandMixin:
+    ''' Embeds related items instead of hyperlinks to them for the fields
+        listed in "expand" query parameter, e.g. quotes/?expand=author,book.
+        Related items are fetched by the same query (select_related()), see
+        <ExpandableSerializerMixin> '''
+
+    def get_expand(self):
+        names = self.request.query_params.get('expand', '').split(',')
+        return [name for name in self.serializer_class.expandable if name in names]   # Unknown names are ignored
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        expand = self.get_expand()
+
+        if expand and isinstance(queryset, QuerySet):
+            queryset = queryset.select_related(*expand)
+
+        return queryset
+
+
+class SparseFieldsetMixin:
+    ''' Leaves only the fields listed in "fields" query parameter in items,
+        e.g. quotes/?fields=id,text. Only the columns of these fields are
+        fetched (.only()). See <SparseFieldsetSerializerMixin> '''
+
+    def get_requested_fields(self):
+        if 'fields' not in self.request.query_params:
+            return None
+
+        names = self.request.query_params.get('fields', '').split(',')
+        fields = [name for name in self.serializer_class.Meta.fields if name in names]   # Unknown names are ignored
+        return fields or None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_requested_fields()
+
+        if fields is None or not isinstance(queryset, QuerySet):
+            return queryset
+
+        columns = [column for name, column, kind, argument in compile_fields(self.serializer_class) if name in fields]
+
+        if isinstance(queryset.query.select_related, dict):   # Foreign keys of expanded fields can not be deferred
+            columns += list(queryset.query.select_related)
+
+        return queryset.only('id', *columns)
+
+
+class ExportMixin:
+    ''' Streams all the items of a list view (with the same filters) as
+        newline delimited JSON. Rows are fetched lazily and serialized with
+        <values_serializer_class> one chunk at a time, so memory use does not
+        depend on the number of items. Under ASGI the rows are fetched before
+        the response is sent (see is_sent_from_event_loop()), only rendering
+        is lazy '''
+
+    renderer_classes = [NDJSONRenderer, FastJSONRenderer]
+    throttle_cost = 20   # See <TokenBucketThrottle>
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        request.snapshot = None   # Rows are streamed from the database, so the snapshot is not loaded (see <SnapshotMixin>)
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.values_listed:
+            chunk_size = pagination.get_setting('EXPORT_CHUNK_SIZE')
+            chunks = self.values_serializer_class(queryset, context=self.get_serializer_context(), chunk_size=chunk_size).data
+
+            if pagination.is_sent_from_event_loop(request):   # Rows are fetched here, in the thread of the view
+                chunks = list(chunks)
+        else:   # List of model instances (already in memory)
+            chunks = [self.get_serializer(queryset, many=True).data]
+
+        lines = request.accepted_renderer.render_lines(chunks)
+        return StreamingHttpResponse(lines, content_type=NDJSONRenderer.media_type)
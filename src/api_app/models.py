@@ -1,12 +1,24 @@
+import datetime
+import time
+
 from django.db import models
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
 class Author(models.Model):
     first_name = models.CharField(max_length=64, null=True, blank=True)
     middle_name = models.CharField(max_length=64, null=True, blank=True)
-    last_name = models.CharField(max_length=64)
+    last_name = models.CharField(max_length=64, db_index=True)
     date_of_birth = models.DateField()
     nationality = models.CharField(max_length=64)
 
+    # Case-folded and accent-stripped copies of searchable fields (see "signals.py")
+    first_name_folded = models.CharField(max_length=64, blank=True, default='', editable=False, db_index=True)
+    middle_name_folded = models.CharField(max_length=64, blank=True, default='', editable=False, db_index=True)
+    last_name_folded = models.CharField(max_length=64, blank=True, default='', editable=False, db_index=True)
+
+    folded_fields = {'first_name': 'first_name_folded', 'middle_name': 'middle_name_folded', 'last_name': 'last_name_folded'}
+
     def __str__(self):
         author = ' '.join(filter(bool, [self.first_name, self.middle_name, self.last_name]))   # Filter out blank fields
         author = author.strip()
@@ -21,10 +33,42 @@ class Book(models.Model):
     publisher = models.CharField(max_length=256)
     isbn = models.CharField(max_length=13)
 
+    # Case-folded and accent-stripped copies of searchable fields (see "signals.py")
+    title_folded = models.CharField(max_length=512, blank=True, default='', editable=False, db_index=True)
+    subtitle_folded = models.CharField(max_length=1024, blank=True, default='', editable=False, db_index=True)
+
+    folded_fields = {'title': 'title_folded', 'subtitle': 'subtitle_folded'}
+
+    class Meta:
+        indexes = [   # Books are ordered by title, so every filter is paired with the title
+            models.Index(fields=['title'], name='book_title_idx'),
+            models.Index(fields=['author', 'title'], name='book_author_title_idx'),
+            models.Index(fields=['year', 'title'], name='book_year_title_idx'),
+            models.Index(fields=['isbn', 'title'], name='book_isbn_title_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class QuoteQuerySet(models.QuerySet):
+    def tagged_with_all(self, tag_ids):
+        ''' Limit the queryset to quotes that are tagged with *ALL* of the given
+            tags. Matching quotes are found by a single grouping subquery, e.g.
+            SELECT quote_id FROM api_app_quotetag WHERE tag_id IN (6, 10)
+            GROUP BY quote_id HAVING COUNT(DISTINCT tag_id) = 2 '''
+
+        tag_ids = set(tag_ids)
+        matching_quote_ids = (QuoteTag.objects
+            .filter(tag_id__in=tag_ids)
+            .values('quote_id')
+            .annotate(tag_count=models.Count('tag_id', distinct=True))
+            .filter(tag_count=len(tag_ids))
+            .values('quote_id'))
+
+        return self.filter(id__in=matching_quote_ids)
+
+
 class Quote(models.Model):
     text = models.TextField()
     author = models.ForeignKey(Author, on_delete=models.CASCADE)
@@ -35,6 +79,22 @@ class Quote(models.Model):
     editors_comment = models.TextField(null=True, blank=True)
     rating = models.IntegerField(null=True, blank=True)
 
+    # Denormalized tags of the quote, e.g. [{"id": 3, "name": "Kultūra"}], ordered
+    # by tag id. It is maintained by signals of <Quote>, <QuoteTag> and <Tag>
+    # (see "signals.py" and "tag_lists.py"), so a stale copy written by save()
+    # is fixed right away
+    tag_list = models.JSONField(default=list, blank=True, editable=False)
+
+    objects = QuoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = [   # Quotes are ordered by text, so every filter is paired with the text
+            models.Index(fields=['text'], name='quote_text_idx'),
+            models.Index(fields=['author', 'text'], name='quote_author_text_idx'),
+            models.Index(fields=['book', 'text'], name='quote_book_text_idx'),
+            models.Index(fields=['date', 'text'], name='quote_date_text_idx'),
+        ]
+
     def __str__(self):
         return f'[{self.author}] {self.text[:64]}{"..." if (len(self.text) > 64) else ""}'
 
@@ -42,6 +102,11 @@ class Quote(models.Model):
 class Tag(models.Model):
     name = models.CharField(max_length=64, unique=True)
 
+    # Case-folded and accent-stripped copy of tag name (see "signals.py")
+    name_folded = models.CharField(max_length=64, blank=True, default='', editable=False, db_index=True)
+
+    folded_fields = {'name': 'name_folded'}
+
     def __str__(self):
         return self.name
 
@@ -53,5 +118,45 @@ class QuoteTag(models.Model):
     quote = models.ForeignKey(Quote, on_delete=models.CASCADE)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tag', 'quote'], name='quotetag_tag_quote_idx'),   # Covers searching for quotes by tags
+        ]
+
     def __str__(self):
         return f'[{self.tag}] {self.quote}'
+
+
+class DataVersion(models.Model):
+    ''' A single row which changes whenever any of the API resources is saved or
+        deleted (see "signals.py"). It is used to validate cached responses, so
+        it is stored in the database shared by all the processes that serve
+        the API '''
+
+    version = models.BigIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'v{self.version} ({self.modified})'
+
+    @classmethod
+    def current(cls):
+        ''' A plain read, so it works on read-only connections too. Until the
+            row is created by the first change, version 0 is returned '''
+
+        data_version = cls.objects.filter(pk=1).first()
+
+        if data_version is None:
+            data_version = cls(pk=1, version=0, modified=datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc))
+
+        return data_version
+
+    @classmethod
+    def bump(cls):
+        ''' Version grows monotonically. It is based on the current time, so it
+            does not repeat even if the database is restored from a backup '''
+
+        version = Greatest(models.F('version') + 1, models.Value(time.time_ns()))
+
+        if not cls.objects.filter(pk=1).update(version=version, modified=timezone.now()):
+            cls.objects.get_or_create(pk=1, defaults={'version': time.time_ns()})
@@ -0,0 +1,306 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from . import async_orm
+from .snapshot import Selection
+
+
+
+DEFAULT_SETTINGS = {
+    'STREAMING_PAGE_SIZE': 500,   # Pages of this many items or more are streamed (None to never stream)
+    'CHUNK_SIZE': 200,   # Number of items serialized and rendered at once when streaming
+    'EXPORT_CHUNK_SIZE': 1000,   # The same for exports (see <ExportMixin>)
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_STREAMING', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def is_sent_from_event_loop(request):
+    ''' True if content of streamed response to <request> is iterated in the
+        event loop, where the ORM can not be used. ASGI handler of Django 4.0
+        does so, so such content must not query the database '''
+
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def get_value(item, field):
+    ''' Value of a field of a model instance or of a .values() row '''
+
+    return item[field] if isinstance(item, dict) else getattr(item, field)
+
+
+class KeysetPagination(BasePagination):
+    ''' Cursor based pagination. Results are ordered by the ordering field of
+        the view (e.g. "last_name") and by "id" as a tiebreaker. A cursor is an
+        opaque string that encodes the (value, id) pair of the last (or first)
+        item of a page, so the next page is fetched with an index range scan
+        instead of OFFSET scan, and the result set is never counted '''
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_results(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_results(await async_orm.alist(self.get_page_queryset(queryset, request, view)))
+
+    def get_page_queryset(self, queryset, request, view):
+        ''' Items of the page (and one extra item to find out if there are
+            more), not evaluated yet '''
+
+        self.request = request
+        self.field = view.ordering
+        self.position = self.decode_cursor(request.query_params.get(self.cursor_query_param, None))
+
+        if isinstance(queryset, Selection):
+            return self.get_page_of_selection(queryset)
+
+        queryset = queryset.order_by(self.field, 'id')
+
+        if self.position is not None:
+            value, pk, self.reverse = self.position
+
+            if self.reverse:   # Page before the position
+                queryset = queryset.filter(Q(**{f'{self.field}__lt': value}) | Q(**{self.field: value, 'id__lt': pk}))
+                queryset = queryset.reverse()
+            else:
+                queryset = queryset.filter(Q(**{f'{self.field}__gt': value}) | Q(**{self.field: value, 'id__gt': pk}))
+        else:
+            self.reverse = False
+
+        return queryset[:self.page_size + 1]
+
+    def get_page_of_selection(self, selection):
+        ''' Same as get_page_queryset(), but for records of the snapshot (see
+            "snapshot.py"), which are sorted by (field, id) already '''
+
+        if self.position is None:
+            self.reverse = False
+            return selection[:self.page_size + 1]
+
+        value, pk, self.reverse = self.position
+
+        if self.reverse:
+            end = selection.bisect(value, pk)
+            return selection[max(end - self.page_size - 1, 0):end][::-1]
+
+        start = selection.bisect(value, pk, right=True)
+        return selection[start:start + self.page_size + 1]
+
+    def set_results(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.results = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        if self.results:
+            last = self.results[-1]
+            return self.encode_cursor(get_value(last, self.field), get_value(last, 'id'), reverse=False)
+
+        value, pk, _ = self.position   # Page before the position is empty, so the next page starts at the position
+        return self.encode_cursor(value, pk - 1 if self.reverse else pk, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if self.results:
+            first = self.results[0]
+            return self.encode_cursor(get_value(first, self.field), get_value(first, 'id'), reverse=True)
+
+        value, pk, _ = self.position   # Page after the position is empty, so the previous page ends at the position
+        return self.encode_cursor(value, pk + 1, reverse=True)
+
+    def encode_cursor(self, value, pk, reverse):
+        cursor = json.dumps([value, pk, reverse], separators=(',', ':'), ensure_ascii=False)
+        cursor = base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+
+        try:
+            value, pk, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if not isinstance(value, str) or not isinstance(pk, int) or not isinstance(reverse, bool):
+                raise ValueError
+
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+        return value, pk, reverse
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {
+                    'type': 'string',
+                },
+            },
+        ]
+
+
+class ListPagination(PageNumberPagination):
+    ''' Page number pagination (the default) which switches to keyset
+        pagination when it is requested, e.g. quotes/?pagination=cursor.
+        Keyset pagination is used only if results are ordered by the ordering
+        field of the view, i.e. not for search results ordered by relevance '''
+
+    mode_query_param = 'pagination'
+    page_size_query_param = 'page_size'
+    max_page_size = 10000
+    extra_data = None   # Items added to pages by the view, see add_extra_data()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        self.streaming = False
+
+        if request.query_params.get(self.mode_query_param, None) == 'cursor' and self.supports_keyset(queryset, view):
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        if self.supports_streaming(request, view):
+            self.streaming = True
+            return self.get_page(queryset, request).object_list   # Evaluated while the response is being sent
+
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        ''' Async version of paginate_queryset(). Pages are not streamed '''
+
+        self.keyset = None
+        self.streaming = False
+
+        if request.query_params.get(self.mode_query_param, None) == 'cursor' and self.supports_keyset(queryset, view):
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.get_page_size(request)
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        count = await async_orm.acount(queryset) if isinstance(queryset, QuerySet) else len(queryset)
+        page = self.get_page(queryset, request, count)
+        page.object_list = await async_orm.alist(page.object_list) if isinstance(queryset, QuerySet) else list(page.object_list)
+        return page.object_list
+
+    def get_page(self, queryset, request, count=None):
+        ''' Same as paginate_queryset() of <PageNumberPagination>, but the
+            page is returned as is, i.e. its items are not evaluated yet. If
+            <count> of items is given, they are not counted again '''
+
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+
+        if count is not None:
+            paginator.count = count   # Overrides cached property
+
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        self.request = request
+        return self.page
+
+    def supports_streaming(self, request, view):
+        ''' Large pages of .values() rows (see <ValuesListMixin>) are streamed
+            if the renderer is able to stream them, unless they are served by
+            ASGI handler (see is_sent_from_event_loop()) '''
+
+        min_page_size = get_setting('STREAMING_PAGE_SIZE')
+        renderer = getattr(request, 'accepted_renderer', None)
+
+        return (min_page_size is not None and self.get_page_size(request) >= min_page_size
+                and getattr(view, 'values_listed', False)
+                and not is_sent_from_event_loop(request)
+                and hasattr(renderer, 'render_stream') and renderer.can_stream(request.accepted_media_type))
+
+    def supports_keyset(self, queryset, view):
+        ordering = getattr(view, 'ordering', None)
+
+        if isinstance(queryset, Selection):
+            return ordering is not None and queryset.field == ordering
+
+        return isinstance(queryset, QuerySet) and ordering is not None and tuple(queryset.query.order_by) == (ordering, )
+
+    def get_paginated_response(self, data):
+        if self.streaming:   # <data> is an iterable of chunks of results
+            return self.get_streaming_response(data)
+
+        if self.keyset is not None:
+            response = self.keyset.get_paginated_response(data)
+        else:
+            response = super().get_paginated_response(data)
+
+        response.data = self.add_extra_data(response.data)
+        return response
+
+    def add_extra_data(self, data):
+        ''' Adds <extra_data> of the view (e.g. facets, see <FacetsMixin>)
+            before "results", which stays the last item (see render_stream()) '''
+
+        if not self.extra_data:
+            return data
+
+        results = data.pop('results')
+        data.update(self.extra_data)
+        data['results'] = results
+        return data
+
+    def get_streaming_response(self, chunks):
+        renderer = self.request.accepted_renderer
+        data = self.add_extra_data(super().get_paginated_response([]).data)
+        content = renderer.render_stream(data, chunks, self.request.accepted_media_type)
+        return StreamingHttpResponse(content, content_type=renderer.media_type)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to use cursor pagination instead of page numbers.',
+                'schema': {
+                    'type': 'string',
+                    'enum': ['cursor'],
+                },
+            },
+        ] + KeysetPagination().get_schema_operation_parameters(view)
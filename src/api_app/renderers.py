@@ -0,0 +1,75 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:   # orjson is optional, the standard library encoder is used without it
+    orjson = None
+
+
+
+class FastJSONRenderer(JSONRenderer):
+    ''' Renders JSON with orjson if it is installed, and with the standard
+        library encoder (like <JSONRenderer>) otherwise. Output is the same in
+        both cases: types that orjson does not handle the same way (dates,
+        Decimals, lazy strings, etc.) are encoded by DRF encoder. Also renders
+        pages with results given in chunks, see render_stream() '''
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (orjson is not None and self.compact and not self.ensure_ascii
+                and self.get_indent(accepted_media_type, renderer_context or {}) is None)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not self.use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+        # Escape \u2028 and \u2029 the same way as <JSONRenderer> does
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def can_stream(self, accepted_media_type, renderer_context=None):
+        return self.compact and self.get_indent(accepted_media_type, renderer_context or {}) is None
+
+    def render_stream(self, data, chunks, accepted_media_type=None, renderer_context=None):
+        ''' Renders <data> (a dict which last item is an empty "results" list)
+            with results taken from <chunks> (an iterable of lists of items)
+            one chunk at a time. Yields parts of the same JSON <render()> would
+            produce, so memory use does not depend on the number of results '''
+
+        head = self.render(data, accepted_media_type, renderer_context)
+
+        if not head.endswith(b'"results":[]}'):
+            raise ValueError('"results" must be the last item of streamed data and it must be empty')
+
+        yield head[:-2]
+        separator = b''
+
+        for chunk in chunks:
+            if chunk:
+                yield separator + self.render(chunk, accepted_media_type, renderer_context)[1:-1]
+                separator = b','
+
+        yield b']}'
+
+    def render_lines(self, chunks, accepted_media_type=None, renderer_context=None):
+        ''' Renders items taken from <chunks> (an iterable of lists of items)
+            as newline delimited JSON, one chunk at a time '''
+
+        for chunk in chunks:
+            if chunk:
+                yield b''.join(self.render(item, accepted_media_type, renderer_context) + b'\n' for item in chunk)
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    ''' Newline delimited JSON, see render_lines() (a single value is
+        rendered as a single line) '''
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(data, None, renderer_context)   # Never indented, a line per item
@@ -0,0 +1,46 @@
+import array
+import random
+import threading
+
+from .models import Quote
+
+
+
+# Process-wide compact array of all <Quote> ids, so picking random quotes does
+# not scan the table. It is loaded lazily on the first request for a random
+# quote, kept with the data version it was loaded at and reloaded as soon as
+# the version changes, so quotes added by other processes are sampled too (see
+# <DataVersion>)
+
+_quote_ids = None   # (data version, ids)
+_quote_ids_lock = threading.Lock()
+
+
+def get_quote_ids(data_version):
+    global _quote_ids
+
+    cached = _quote_ids
+    if cached is not None and cached[0] == data_version:
+        return cached[1]
+
+    with _quote_ids_lock:
+        if _quote_ids is None or _quote_ids[0] != data_version:
+            _quote_ids = (data_version, array.array('q', Quote.objects.order_by('pk').values_list('pk', flat=True)))
+
+        return _quote_ids[1]
+
+
+def invalidate_quote_ids():
+    global _quote_ids
+
+    _quote_ids = None
+
+
+def sample_quote_ids(count, seed, quote_ids):
+    ''' Pick <count> distinct random quote ids (or less, if there are not
+        enough quotes) from <quote_ids> (e.g. get_quote_ids(), ordered by id).
+        The same <seed> gives the same ids as long as the set of quotes does
+        not change '''
+
+    rng = random.Random(seed) if seed is not None else random
+    return [quote_ids[i] for i in rng.sample(range(len(quote_ids)), min(count, len(quote_ids)))]
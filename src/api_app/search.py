@@ -0,0 +1,100 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+
+
+# Full-text index of <Quote> texts and editor's comments. It is an SQLite FTS5
+# virtual table (created by a migration) whose rowid equals <Quote> id
+
+FTS_TABLE = 'api_app_quote_fts'
+
+# Search string is split into phrases (in double quotes) and single tokens.
+# Tokens ending with "*" are treated as prefixes, e.g. 'man "not made" defea*'
+
+SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+TOKEN_CHARS = re.compile(r'\w+')
+
+
+def is_available():
+    ''' Full-text search is implemented only for SQLite databases '''
+
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(search_string):
+    ''' Convert a search string submitted by user into FTS5 query syntax. All
+        terms are quoted, so user input can never produce an FTS5 syntax
+        error. Returns None if the search string has no searchable terms '''
+
+    terms = []
+
+    for phrase, token in SEARCH_TERM.findall(search_string):
+        if phrase:
+            words = TOKEN_CHARS.findall(phrase)
+            if words:
+                terms.append('"{}"'.format(' '.join(words)))
+
+        else:
+            is_prefix = token.endswith('*')
+            words = TOKEN_CHARS.findall(token)
+            if words:
+                terms.append('"{}"{}'.format(' '.join(words), '*' if is_prefix else ''))
+
+    return ' '.join(terms) or None
+
+
+def filter_quotes(quotes, match_expression):
+    ''' Limit <quotes> queryset to quotes that match FTS5 query '''
+
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match_expression, ))
+    return quotes.filter(id__in=matches)
+
+
+def annotate_rank(quotes, match_expression):
+    ''' Annotate <quotes> queryset with bm25 rank of every quote. The lower the
+        rank, the more relevant the quote '''
+
+    rank = RawSQL(
+        f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = api_app_quote.id',
+        (match_expression, ))
+
+    return quotes.annotate(search_rank=rank)
+
+
+def index_quote(quote):
+    if not is_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (quote.id, ))
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text, editors_comment) VALUES (%s, %s, %s)',
+            (quote.id, quote.text, quote.editors_comment or ''))
+
+
+def unindex_quote(quote_id):
+    if not is_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (quote_id, ))
+
+
+def rebuild_index():
+    ''' Drop all entries of the full-text index and index every quote from
+        scratch. Returns the number of indexed quotes '''
+
+    if not is_available():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text, editors_comment) '
+            f"SELECT id, text, COALESCE(editors_comment, '') FROM api_app_quote")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
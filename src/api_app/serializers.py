@@ -1,47 +1,268 @@
-from rest_framework import serializers
+import functools
+import itertools
 
-from .models import Author, Book, Quote, Tag, QuoteTag
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from django.urls import reverse
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
+from . import async_orm
+from .models import Author, Book, Quote, Tag
 
-class AuthorSerializer(serializers.HyperlinkedModelSerializer):
+
+def is_embedded(serializer):
+    ''' Whether <serializer> serializes items embedded into other items '''
+
+    parent = serializer.parent.parent if isinstance(serializer.parent, serializers.ListSerializer) else serializer.parent
+    return parent is not None
+
+
+class SparseFieldsetSerializerMixin:
+    ''' Leaves only the fields which are listed in context['fields'] (see
+        <SparseFieldsetMixin>). Embedded items always have all the fields '''
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested_fields = self.context.get('fields', None)
+
+        if requested_fields is None or is_embedded(self):
+            return fields
+
+        return {name: field for name, field in fields.items() if name in requested_fields}
+
+
+class AuthorSerializer(SparseFieldsetSerializerMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Author
         fields = ['id', 'first_name', 'middle_name', 'last_name', 'date_of_birth', 'nationality']
 
 
-class BookSerializer(serializers.HyperlinkedModelSerializer):
+class ExpandableSerializerMixin:
+    ''' Embeds related items instead of hyperlinks to them for the fields
+        which are listed in context['expand'] (see <ExpandMixin>). Only the
+        items being serialized are expanded, embedded items are not '''
+
+    expandable = {}   # Hyperlinked field -> serializer of the related item
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        if is_embedded(self):
+            return fields
+
+        for name in self.context.get('expand', ()):
+            if name in self.expandable:
+                fields[name] = self.expandable[name](read_only=True)
+
+        return fields
+
+
+class BookSerializer(SparseFieldsetSerializerMixin, ExpandableSerializerMixin, serializers.HyperlinkedModelSerializer):
     author = serializers.HyperlinkedRelatedField(view_name='author-details', read_only=True)
+    expandable = {'author': AuthorSerializer}
 
     class Meta:
         model = Book
         fields = ['id', 'author', 'title', 'subtitle', 'year', 'publisher', 'isbn']
 
 
-class TagListField(serializers.Field):
-    ''' A custom field which contains a list of <Tag> values of a particular <Quote> '''
-
-    def to_representation(self, quote_id):
-        tag_ids = QuoteTag.objects.filter(quote_id=quote_id).values_list('tag_id')
-        items = Tag.objects.filter(pk__in=tag_ids).values_list('id', 'name')
-        tags = [{'id': id, 'name': name} for id, name in items]
-        return tags
+class TagListField(serializers.ReadOnlyField):
+    ''' A custom field which contains a list of <Tag> values of a particular
+        <Quote>. Reads the denormalized <Quote.tag_list>, so no queries are
+        needed '''
 
-    def to_internal_value(self, data):
-        raise NotImplementedError
 
-
-class QuoteSerializer(serializers.HyperlinkedModelSerializer):
+class QuoteSerializer(SparseFieldsetSerializerMixin, ExpandableSerializerMixin, serializers.HyperlinkedModelSerializer):
     author = serializers.HyperlinkedRelatedField(view_name='author-details', read_only=True)
     book = serializers.HyperlinkedRelatedField(view_name='book-details', read_only=True)
-    tags = TagListField(source='id')   # Custom field, not present in the <Quote> model
+    tags = TagListField(source='tag_list')
+    expandable = {'author': AuthorSerializer, 'book': BookSerializer}
 
     class Meta:
         model = Quote
         fields = ['id', 'text', 'author', 'book', 'date', 'language', 'length_in_words', 'editors_comment', 'rating', 'tags']
 
 
-class TagSerializer(serializers.HyperlinkedModelSerializer):
+class TagSerializer(SparseFieldsetSerializerMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name']
 
+
+@functools.lru_cache(maxsize=None)
+def get_url_template(view_name):
+    ''' (prefix, suffix) of the URL of a detail view, resolved once per
+        process, e.g. ('/authors/', '/'). URL of an item is prefix + pk +
+        suffix '''
+
+    placeholder = 9999999999
+    url = reverse(view_name, kwargs={'pk': placeholder})
+    prefix, suffix = url.split(str(placeholder))
+    return prefix, suffix
+
+
+@functools.lru_cache(maxsize=None)
+def compile_fields(serializer_class):
+    ''' Returns (name, column, kind, argument) of every field of a model
+        serializer, where <column> is the .values() column that holds the value
+        of the field and <kind> says how to represent it '''
+
+    compiled = []
+
+    for name, field in serializer_class().fields.items():
+        if isinstance(field, serializers.HyperlinkedRelatedField):
+            compiled.append((name, f'{field.source}_id', 'url', field.view_name))
+        elif isinstance(field, TagListField):
+            compiled.append((name, field.source, 'value', None))
+        elif isinstance(field, serializers.DateField):
+            compiled.append((name, field.source, 'date', getattr(field, 'format', api_settings.DATE_FORMAT)))
+        elif isinstance(field, (serializers.IntegerField, serializers.CharField)):
+            compiled.append((name, field.source, 'value', None))
+        else:
+            raise ImproperlyConfigured(f'{serializer_class.__name__}.{name}: {field.__class__.__name__} is not supported by ValuesSerializer')
+
+    return compiled
+
+
+class ValuesSerializer:
+    ''' Read-only fast path for pages of list views. Builds plain dicts from
+        .values() rows instead of running DRF fields on model instances. The
+        output is the same as of <serializer_class>, because fields are
+        compiled from it (once per process). Hyperlinks are built by filling
+        in URL templates instead of calling reverse() for every row. Related
+        items of the fields listed in context['expand'] are read from columns
+        of the same rows (joined by values()). Only the fields listed in
+        context['fields'] are serialized (and fetched) if it is given '''
+
+    serializer_class = None
+    expandable = {}   # Hyperlinked field -> values serializer of the related item
+
+    def __init__(self, instance=None, many=True, context=None, chunk_size=None):
+        self.instance = instance
+        self.context = context or {}
+        self.chunk_size = chunk_size   # If given, data is an iterator of lists of items (rows are fetched lazily)
+
+    @classmethod
+    def get_fields(cls, fields=None):
+        compiled = compile_fields(cls.serializer_class)
+
+        if fields is None:
+            return compiled
+
+        return [field for field in compiled if field[0] in fields]
+
+    @classmethod
+    def get_columns(cls, expand=(), fields=None):
+        columns = [column for name, column, kind, argument in cls.get_fields(fields)]
+
+        for name, serializer_class in cls.expandable.items():
+            if name in expand and (fields is None or name in fields):
+                columns += [f'{name}__{column}' for column in serializer_class.get_columns()]
+
+        return list(dict.fromkeys(columns))
+
+    @classmethod
+    def values(cls, queryset, expand=(), fields=None, extra_columns=()):
+        ''' Turns a queryset of model instances into a queryset of rows.
+            <extra_columns> are fetched but not serialized '''
+
+        columns = cls.get_columns(expand, fields) + [column for column in extra_columns if column]
+        return queryset.prefetch_related(None).values(*dict.fromkeys(columns))
+
+    @property
+    def data(self):
+        if self.chunk_size is not None:
+            return self.iter_chunks(self.instance)
+
+        return self.to_representation(self.instance)
+
+    async def adata(self):
+        ''' Async version of <data> (not chunked) '''
+
+        rows = await async_orm.alist(self.instance) if isinstance(self.instance, QuerySet) else list(self.instance)
+        return self.to_representation(rows)
+
+    def iter_chunks(self, rows):
+        rows = rows.iterator(chunk_size=self.chunk_size) if isinstance(rows, QuerySet) else iter(rows)
+
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+
+            if not chunk:
+                break
+
+            yield self.to_representation(chunk)
+
+    def get_converters(self, rows):
+        ''' (name, column, function) for every field. <function> converts a
+            non-null column value, or it is None if the value is used as is '''
+
+        converters = []
+
+        for name, column, kind, argument in self.get_fields(self.context.get('fields', None)):
+            if kind == 'url' and name in self.expandable and name in self.context.get('expand', ()):
+                related_items = self.get_expanded_items(name, column, rows)
+                converters.append((name, column, related_items.get))
+            elif kind == 'url':
+                prefix, suffix = get_url_template(argument)
+                prefix = self.context['request'].build_absolute_uri(prefix)   # Host is resolved once per page
+                converters.append((name, column, lambda pk, prefix=prefix, suffix=suffix: f'{prefix}{pk}{suffix}'))
+            elif kind == 'date' and argument is not None:
+                if argument.lower() == ISO_8601:
+                    converters.append((name, column, lambda date: date.isoformat() if date else None))
+                else:
+                    converters.append((name, column, lambda date, format=argument: date.strftime(format) if date else None))
+            else:
+                converters.append((name, column, None))
+
+        return converters
+
+    def get_expanded_items(self, name, column, rows):
+        ''' Representations of related items (by id) of an expanded field,
+            made from the joined columns of <rows> '''
+
+        serializer_class = self.expandable[name]
+        related_rows = {}
+
+        for row in rows:
+            if row[column] is not None and row[column] not in related_rows:
+                related_rows[row[column]] = {related_column: row[f'{name}__{related_column}'] for related_column in serializer_class.get_columns()}
+
+        items = serializer_class(list(related_rows.values()), context={'request': self.context['request']}).data
+        return dict(zip(related_rows, items))
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        converters = self.get_converters(rows)
+        items = []
+
+        for row in rows:
+            item = {}
+
+            for name, column, convert in converters:
+                value = row[column]
+                item[name] = value if convert is None or value is None else convert(value)
+
+            items.append(item)
+
+        return items
+
+
+class AuthorValuesSerializer(ValuesSerializer):
+    serializer_class = AuthorSerializer
+
+
+class BookValuesSerializer(ValuesSerializer):
+    serializer_class = BookSerializer
+    expandable = {'author': AuthorValuesSerializer}
+
+
+class QuoteValuesSerializer(ValuesSerializer):
+    serializer_class = QuoteSerializer
+    expandable = {'author': AuthorValuesSerializer, 'book': BookValuesSerializer}
+
+
+class TagValuesSerializer(ValuesSerializer):
+    serializer_class = TagSerializer
+
@@ -0,0 +1,135 @@
+''' Load shedding. When too many requests are already in flight, or a
+    request has waited in the queue of the front server for too long, it is
+    answered with "503 Service Unavailable" and "Retry-After" header right
+    away. Latency of the requests which are served stays low instead of
+    growing for everyone until clients time out '''
+
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'MAX_IN_FLIGHT': 64,   # Requests served at once by a process (threads of WSGI server or tasks of ASGI server)
+    'MAX_QUEUE_TIME': None,   # Seconds a request may wait before it is served, see "X-Request-Start" header
+    'RETRY_AFTER': 1,   # Seconds, value of "Retry-After" header
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_LOAD_SHEDDING', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_queue_time(request, now):
+    ''' Seconds since the front server (e.g. nginx or a load balancer)
+        received <request>, according to its "X-Request-Start" header
+        ("t=<seconds>" or just a number of seconds, milliseconds or
+        microseconds since the epoch). None if the header is missing or
+        malformed '''
+
+    value = request.headers.get('X-Request-Start', '').removeprefix('t=')
+
+    try:
+        start = float(value)
+    except ValueError:
+        return None
+
+    while start > now * 100:   # Milliseconds or microseconds
+        start /= 1000
+
+    return max(now - start, 0)
+
+
+class LoadSheddingMiddleware(MiddlewareMixin):
+    ''' Counts requests in flight (per process) and sheds the ones over
+        MAX_IN_FLIGHT or MAX_QUEUE_TIME. Keep it near the top of MIDDLEWARE,
+        so shed requests cost as little as possible '''
+
+    def __init__(self, get_response):
+        super().__init__(get_response)   # <MiddlewareMixin> marks the instance as a coroutine function under ASGI
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        self.in_flight = 0
+        self.shed = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        if not get_setting('ENABLED'):
+            return self.get_response(request)
+
+        if not self.enter(request):
+            return self.shed_response()
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.exit()
+            raise
+
+        return self.exit_after(response)
+
+    async def __acall__(self, request):
+        if not get_setting('ENABLED'):
+            return await self.get_response(request)
+
+        if not self.enter(request):
+            return self.shed_response()
+
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self.exit()
+            raise
+
+        return self.exit_after(response)
+
+    def enter(self, request):
+        ''' Returns False if <request> must be shed '''
+
+        max_queue_time = get_setting('MAX_QUEUE_TIME')
+
+        if max_queue_time is not None:
+            queue_time = get_queue_time(request, time.time())
+
+            if queue_time is not None and queue_time > max_queue_time:
+                with self.lock:
+                    self.shed += 1
+                return False
+
+        with self.lock:
+            if self.in_flight >= get_setting('MAX_IN_FLIGHT'):
+                self.shed += 1
+                return False
+
+            self.in_flight += 1
+            return True
+
+    def exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def exit_after(self, response):
+        ''' Streamed responses (large pages and exports) run their queries
+            while their content is sent, so they stay in flight until the
+            server closes them '''
+
+        if response.streaming:
+            response._resource_closers.append(self.exit)
+        else:
+            self.exit()
+
+        return response
+
+    def shed_response(self):
+        retry_after = get_setting('RETRY_AFTER')
+        response = JsonResponse({'message': 'Service is overloaded', 'retry_after': retry_after}, status=503)
+        response['Retry-After'] = str(retry_after)
+        return response
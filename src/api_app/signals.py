@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search, snapshot, tag_lists
+from .caching import response_cache
+from .facets import facet_cache
+from .models import Author, Book, DataVersion, Quote, QuoteTag, Tag
+from .utils import fold
+
+
+
+@receiver(pre_save, sender=Author)
+@receiver(pre_save, sender=Book)
+@receiver(pre_save, sender=Tag)
+def fill_folded_fields(sender, instance, **kwargs):
+    for source, target in sender.folded_fields.items():
+        setattr(instance, target, fold(getattr(instance, source)))
+
+
+@receiver(post_save, sender=Quote)
+def refresh_tag_list_of_saved_quote(sender, instance, raw=False, **kwargs):
+    if not raw:   # save() writes the tag list the instance was loaded with, e.g. a stale one or one of a copied quote
+        tag_list = tag_lists.get_tag_lists([instance.id]).get(instance.id, [])
+
+        if tag_list != instance.tag_list:
+            tag_lists.write_tag_lists({instance.id: tag_list})
+            instance.tag_list = tag_list
+
+
+@receiver(post_save, sender=Quote)
+def index_saved_quote(sender, instance, **kwargs):
+    search.index_quote(instance)
+
+
+@receiver(post_delete, sender=Quote)
+def unindex_deleted_quote(sender, instance, **kwargs):
+    search.unindex_quote(instance.id)
+
+
+@receiver(pre_save, sender=QuoteTag)
+def remember_previous_quote(sender, instance, raw=False, **kwargs):
+    if instance.pk is not None and not raw:   # Moving a tag to another quote changes tag lists of both quotes
+        instance.previous_quote_id = QuoteTag.objects.filter(pk=instance.pk).values_list('quote_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=QuoteTag)
+def refresh_tag_list_of_quote(sender, instance, **kwargs):
+    quote_ids = {instance.quote_id, getattr(instance, 'previous_quote_id', None)}
+    tag_lists.refresh_tag_lists(quote_ids - {None})
+
+
+@receiver(post_save, sender=Tag)
+def refresh_tag_lists_of_tag(sender, instance, created=False, raw=False, **kwargs):
+    if not created or raw:   # Renamed tag. New tags are not on any quote yet, unless fixtures are loaded in any order
+        tag_lists.refresh_tag_lists(QuoteTag.objects.filter(tag_id=instance.id).values_list('quote_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Author)
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Quote)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=QuoteTag)
+def invalidate_responses(sender, **kwargs):
+    DataVersion.bump()   # Invalidates conditional requests and responses cached by all processes
+    response_cache.clear_local()
+    facet_cache.clear()
+    snapshot.invalidate_snapshot()   # Other processes notice the new data version within CHECK_INTERVAL
+    transaction.on_commit(snapshot.invalidate_snapshot)
+
+
+def refresh_derived_data():
+    ''' Bring derived data (tag lists of quotes, full-text index, in-memory
+        indexes and caches, data version) up to date after bulk changes that
+        do not send signals, e.g. bulk_create() '''
+
+    tag_lists.rebuild_tag_lists()
+    search.rebuild_index()
+    response_cache.clear_local()
+    facet_cache.clear()
+    DataVersion.bump()
+    snapshot.invalidate_snapshot()
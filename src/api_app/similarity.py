@@ -0,0 +1,109 @@
+import threading
+
+from .models import Tag
+
+
+
+class TagSimilarityIndex:
+    ''' In-memory index for finding tags with names similar to a search string.
+
+        Tag names are stored in a trie. A search walks the trie computing one
+        row of Levenshtein distance matrix per visited node (the row is shared
+        by all the names with the same prefix) and abandons a branch as soon as
+        every value of the row exceeds the maximum distance. Therefore only the
+        candidate tags are visited instead of all the tags '''
+
+    class Node:
+        __slots__ = ['children', 'tags']
+
+        def __init__(self):
+            self.children = {}
+            self.tags = []   # (id, name) of the tags which names end at this node
+
+    def __init__(self, tags):
+        ''' <tags> is an iterable of (id, name) tuples '''
+
+        self.root = self.Node()
+        self.size = 0
+
+        for id, name in tags:
+            if not name:
+                continue
+
+            node = self.root
+            for char in name:
+                node = node.children.setdefault(char, self.Node())
+            node.tags.append((id, name))
+            self.size += 1
+
+    def find_similar(self, substring, max_distance):
+        ''' Find tags that start with the same letter as <substring> and which
+            beginning (sliced to the length of <substring>) is within
+            <max_distance> from <substring>. Returns a list of (distance,
+            name, id) tuples sorted by distance and then alphabetically '''
+
+        if not substring or substring[0] not in self.root.children:
+            return []
+
+        matches = []
+        first_row = list(range(len(substring) + 1))
+        self._search(self.root.children[substring[0]], substring[0], 1, first_row, substring, max_distance, matches)
+        matches.sort()
+        return matches
+
+    def _search(self, node, char, depth, previous_row, substring, max_distance, matches):
+        row = [depth]
+
+        for c in range(1, len(substring) + 1):
+            if substring[c - 1] == char:
+                row.append(previous_row[c - 1])
+            else:
+                row.append(min(previous_row[c - 1], previous_row[c], row[c - 1]) + 1)
+
+        distance = row[-1]
+
+        if depth == len(substring):   # All the tags below this node have the same beginning
+            if distance <= max_distance:
+                for id, name in self._collect(node):
+                    matches.append((distance, name, id))
+            return
+
+        if distance <= max_distance:   # Tags shorter than search substring
+            for id, name in node.tags:
+                matches.append((distance, name, id))
+
+        if min(row) > max_distance:   # Distance can only grow deeper in the trie
+            return
+
+        for child_char, child in node.children.items():
+            self._search(child, child_char, depth + 1, row, substring, max_distance, matches)
+
+    def _collect(self, node):
+        stack = [node]
+
+        while stack:
+            node = stack.pop()
+            yield from node.tags
+            stack.extend(node.children.values())
+
+
+# Process-wide index is built lazily on the first search. It is kept with the
+# data version it was built at and rebuilt as soon as the version changes, so
+# changes of tags made by other processes are picked up too (see <DataVersion>)
+
+_tag_index = None   # (data version, index)
+_tag_index_lock = threading.Lock()
+
+
+def get_tag_index(data_version):
+    global _tag_index
+
+    cached = _tag_index
+    if cached is not None and cached[0] == data_version:
+        return cached[1]
+
+    with _tag_index_lock:
+        if _tag_index is None or _tag_index[0] != data_version:
+            _tag_index = (data_version, TagSimilarityIndex(Tag.objects.values_list('id', 'name')))
+
+        return _tag_index[1]
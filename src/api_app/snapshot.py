@@ -0,0 +1,350 @@
+''' Read-only in-memory serving engine (see API_SNAPSHOT setting). All the
+    resources are loaded into compact records with sorted indexes once, and
+    sync list, detail and random views serve requests from them without
+    querying the database (see <SnapshotMixin>). Filters which a snapshot does
+    not support (full-text search) are served by the ORM.
+
+    A snapshot is reloaded when the data version changes, when the database
+    files are modified (e.g. a snapshot database is replaced) or when
+    VERSION_FILE is touched. They are checked at most every CHECK_INTERVAL
+    seconds. Changes made by this process are noticed right away (see
+    "signals.py"). Requests keep using the snapshot they started with, while
+    a new one is being loaded '''
+
+import array
+import bisect
+import operator
+import os
+import string
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Author, Book, DataVersion, Quote, QuoteTag, Tag
+from .similarity import TagSimilarityIndex
+
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'CHECK_INTERVAL': 1.0,   # Seconds between checks whether the snapshot is stale (0 to check on every request)
+    'VERSION_FILE': None,   # Path of a file which is touched to reload snapshots (e.g. after a deployment)
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_SNAPSHOT', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def make_record_class(model):
+    ''' Compact (__slots__) record class with a slot for every column of
+        <model> '''
+
+    def __init__(self, values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    columns = tuple(field.attname for field in model._meta.concrete_fields)
+    return type(f'{model.__name__}Record', (), {'__slots__': columns, '__init__': __init__})
+
+
+class SortedIndex:
+    ''' Ids of records sorted by (value of a field, id). Records which value
+        is None are left out, as they never match a filter in SQL either '''
+
+    def __init__(self, records, field):
+        entries = sorted((getattr(record, field), record.id) for record in records if getattr(record, field) is not None)
+        self.keys = [value for value, id in entries]
+        self.ids = array.array('q', (id for value, id in entries))
+
+    def find(self, value):
+        return self.find_range(value, value, inclusive=True)
+
+    def find_range(self, low, high, inclusive=False):
+        ''' Ids of records with low <= value < high (or <= high) '''
+
+        start = bisect.bisect_left(self.keys, low)
+        end = (bisect.bisect_right if inclusive else bisect.bisect_left)(self.keys, high)
+        return self.ids[start:end]
+
+
+class Selection(list):
+    ''' Records sorted by (<field>, id), e.g. the items of a list view. Cursor
+        pagination finds positions in it by binary search (see
+        <KeysetPagination>) '''
+
+    def __init__(self, records, field):
+        super().__init__(records)
+        self.field = field
+
+    def bisect(self, value, pk, right=False):
+        ''' Index of the first record which (<field>, id) is greater than
+            (or, unless <right> is set, equal to) (<value>, <pk>) '''
+
+        key = (value, pk)
+        low, high = 0, len(self)
+
+        while low < high:
+            middle = (low + high) // 2
+            record = self[middle]
+            middle_key = (getattr(record, self.field), record.id)
+
+            if middle_key < key or (right and middle_key == key):
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+
+class Table:
+    ''' Records of a model by id, sorted indexes of <indexed_fields> and the
+        records sorted by the <ordering> field '''
+
+    def __init__(self, model, ordering, indexed_fields=()):
+        self.model = model
+        self.ordering = ordering
+        record_class = make_record_class(model)
+        self.records = {values[0]: record_class(values) for values in model.objects.order_by('id').values_list(*record_class.__slots__)}
+        self.indexes = {field: SortedIndex(self.records.values(), field) for field in [ordering, *indexed_fields]}
+        self.ordered = [self.records[id] for id in self.indexes[ordering].ids]
+        self.text_columns = {}   # Built on the first search of a field
+
+    def get(self, pk):
+        return self.records.get(pk, None)
+
+    def find(self, field, value):
+        return self.indexes[field].find(value)
+
+    def find_range(self, field, low, high):
+        return self.indexes[field].find_range(low, high)
+
+    def search(self, field, substring):
+        ''' Ids of records which <field> contains <substring> (see
+            <TextColumn>) '''
+
+        if field not in self.text_columns:
+            self.text_columns[field] = TextColumn(self.ordered, field)
+
+        return self.text_columns[field].search(substring)
+
+    def select(self, ids=None):
+        ''' <Selection> of records with the given ids (or all of them) '''
+
+        if ids is None:
+            return Selection(self.ordered, self.ordering)
+
+        if len(ids) * 8 < len(self.ordered):   # Sorting a few records is cheaper than a pass over all of them
+            get_key = operator.attrgetter(self.ordering, 'id')
+            return Selection(sorted((self.records[id] for id in ids), key=get_key), self.ordering)
+
+        return Selection([record for record in self.ordered if record.id in ids], self.ordering)
+
+
+class TextColumn:
+    ''' Values of a text field of all the records joined into a single string,
+        so a substring is searched for by str.find() rather than record by
+        record in Python. Values are stored with ASCII letters in lower case,
+        as LIKE on SQLite is case-insensitive for ASCII characters only '''
+
+    separator = '\0'
+    lower_ascii = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+    def __init__(self, records, field):
+        self.ids = array.array('q')
+        self.starts = array.array('q')   # Offset of every value in <text>
+        values = []
+        offset = 0
+
+        for record in records:
+            value = getattr(record, field)
+
+            if value is not None:
+                self.ids.append(record.id)
+                self.starts.append(offset)
+                values.append(value)
+                offset += len(value) + 1
+
+        self.text = self.separator.join(values).translate(self.lower_ascii)
+
+    def search(self, substring):
+        ''' Ids of records which value contains <substring>, the same as
+            "contains" lookup does '''
+
+        if self.separator in substring:
+            return set()
+
+        substring = substring.translate(self.lower_ascii)
+        found_ids = set()
+        position = self.text.find(substring)
+
+        while position != -1:
+            index = bisect.bisect_right(self.starts, position) - 1
+            found_ids.add(self.ids[index])
+
+            if index + 1 == len(self.starts):
+                break
+
+            position = self.text.find(substring, self.starts[index + 1])   # The rest of this value does not matter
+
+        return found_ids
+
+
+class Snapshot:
+    ''' Consistent copy of all the resources, loaded in a single transaction '''
+
+    def __init__(self):
+        with transaction.atomic():
+            self.data_version = DataVersion.current()
+            self.signature = get_signature(self.data_version.version)
+            self.authors = Table(Author, 'last_name')
+            self.books = Table(Book, 'title', ['author_id', 'year', 'isbn'])
+            self.quotes = Table(Quote, 'text', ['author_id', 'book_id', 'date'])
+            self.tags = Table(Tag, 'name', ['name_folded'])
+            quote_tags = QuoteTag.objects.order_by('tag_id', 'quote_id').values_list('quote_id', 'tag_id')
+            self.quote_ids_by_tag = {}
+
+            for quote_id, tag_id in quote_tags.iterator():
+                self.quote_ids_by_tag.setdefault(tag_id, array.array('q')).append(quote_id)
+
+        self.tables = {table.model: table for table in [self.authors, self.books, self.quotes, self.tags]}
+        self.quote_ids = array.array('q', self.quotes.records)   # Ordered by id, for random sampling
+        self.tag_index = TagSimilarityIndex((tag.id, tag.name) for tag in self.tags.ordered)
+        self.getters = {}
+
+    def tagged_with_all(self, tag_ids):
+        ''' Ids of quotes that are tagged with *ALL* of <tag_ids> '''
+
+        quote_ids = None
+
+        for tag_id in set(tag_ids):
+            quote_ids = intersect(quote_ids, self.quote_ids_by_tag.get(tag_id, ()))
+
+        return quote_ids if quote_ids is not None else set()
+
+    def get_rows(self, model, records, columns):
+        ''' The same rows as .values(*columns) of a queryset of <records>
+            would return, including columns of related items, e.g.
+            "author__last_name" (see <ValuesSerializer>) '''
+
+        table = self.tables[model]
+        getters = [(column, self.get_getter(table, column)) for column in columns]
+        return [{column: get(record) for column, get in getters} for record in records]
+
+    def get_getter(self, table, column):
+        key = (table.model, column)
+
+        if key not in self.getters:
+            name, _, related_column = column.partition('__')
+
+            if not related_column:
+                self.getters[key] = operator.attrgetter(name)
+            else:
+                field = table.model._meta.get_field(name)
+                related_table = self.tables[field.related_model]
+                get_related_value = self.get_getter(related_table, related_column)
+
+                def get_value(record, attname=field.attname):
+                    related_record = related_table.records.get(getattr(record, attname), None)
+                    return get_related_value(related_record) if related_record is not None else None
+
+                self.getters[key] = get_value
+
+        return self.getters[key]
+
+
+def intersect(ids, found_ids):
+    ''' Narrows down a set of <ids> (None means all the ids) '''
+
+    return set(found_ids) if ids is None else ids.intersection(found_ids)
+
+
+def get_signature(data_version):
+    ''' Data version and modification times of the database files and of the
+        version file. A snapshot is stale when any of them changes '''
+
+    paths = [get_setting('VERSION_FILE')]
+    name = connection.settings_dict['NAME']
+
+    if not connection.creation.is_in_memory_db(name):
+        paths += [name, f'{name}-wal']
+
+    mtimes = []
+
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns if path else None)
+        except FileNotFoundError:
+            mtimes.append(None)
+
+    return (data_version, *mtimes)
+
+
+_snapshot = None
+_snapshot_checked = 0.0   # time.monotonic() of the last check
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    ''' The current snapshot. It is checked (and reloaded if it is stale) at
+        most every CHECK_INTERVAL seconds '''
+
+    global _snapshot, _snapshot_checked
+
+    snapshot = _snapshot
+    now = time.monotonic()
+
+    if snapshot is not None and now - _snapshot_checked < get_setting('CHECK_INTERVAL'):
+        return snapshot
+
+    if not _snapshot_lock.acquire(blocking=snapshot is None):   # Another thread is checking, keep using the current snapshot
+        return snapshot
+
+    try:
+        if _snapshot is None or not is_current(_snapshot):
+            if not connection.in_atomic_block:
+                connection.close()   # A replaced immutable database file is only seen by a new connection
+
+            _snapshot = Snapshot()
+
+        _snapshot_checked = now
+        return _snapshot
+
+    finally:
+        _snapshot_lock.release()
+
+
+def is_current(snapshot):
+    version = DataVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    return get_signature(version) == snapshot.signature
+
+
+def invalidate_snapshot():
+    ''' Check the snapshot on the next request '''
+
+    global _snapshot_checked
+    _snapshot_checked = float('-inf')
+
+
+def clear_snapshot():
+    ''' Drop the snapshot, the next request loads a new one (e.g. in tests,
+        where rolled back transactions make data versions repeat) '''
+
+    global _snapshot
+    _snapshot = None
+
+
+def get_request_snapshot(request):
+    ''' Snapshot that serves <request> (the same one during the whole
+        request), or None if snapshots are disabled or the request is served
+        by the ORM '''
+
+    if not get_setting('ENABLED'):
+        return None
+
+    if not hasattr(request, 'snapshot'):
+        request.snapshot = get_snapshot()
+
+    return request.snapshot
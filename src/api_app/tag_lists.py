@@ -0,0 +1,79 @@
+''' Denormalized tags of quotes (see <Quote.tag_list>), so quotes are
+    serialized with their tags without querying <QuoteTag>. Tag lists of the
+    affected quotes are refreshed by signals of <Quote>, <QuoteTag> and <Tag>
+    (see "signals.py"). Bulk changes which do not send signals are followed by
+    rebuild_tag_lists() (see <refresh_derived_data()>) '''
+
+import array
+
+from .models import Quote, QuoteTag
+
+
+BATCH_SIZE = 500   # Quotes per query, stays below the limit of SQL variables of SQLite
+
+
+def get_tag_lists(quote_ids):
+    ''' Tag lists of <quote_ids> built from <QuoteTag>, by quote id. Quotes
+        without tags are left out '''
+
+    quote_tags = (QuoteTag.objects
+        .filter(quote_id__in=quote_ids)
+        .order_by('quote_id', 'tag_id')
+        .values_list('quote_id', 'tag_id', 'tag__name'))
+
+    tag_lists = {}
+
+    for quote_id, tag_id, tag_name in quote_tags:
+        tag_lists.setdefault(quote_id, []).append({'id': tag_id, 'name': tag_name})
+
+    return tag_lists
+
+
+def refresh_tag_lists(quote_ids):
+    ''' Rebuild tag lists of <quote_ids> (missing quotes are skipped) '''
+
+    quote_ids = sorted(set(quote_ids))
+
+    for start in range(0, len(quote_ids), BATCH_SIZE):
+        batch = quote_ids[start:start + BATCH_SIZE]
+        tag_lists = get_tag_lists(batch)
+        write_tag_lists({quote_id: tag_lists.get(quote_id, []) for quote_id in batch})
+
+
+def write_tag_lists(tag_lists):
+    quotes = [Quote(id=quote_id, tag_list=tag_list) for quote_id, tag_list in tag_lists.items()]
+    Quote.objects.bulk_update(quotes, ['tag_list'], batch_size=BATCH_SIZE)
+
+
+def iter_stale_tag_lists():
+    ''' Batches of {quote id: (stored tag list, actual tag list)} of the
+        quotes which tag lists are out of date, e.g. after bulk changes
+        without signals '''
+
+    quote_ids = array.array('q', Quote.objects.order_by('id').values_list('id', flat=True))
+
+    for start in range(0, len(quote_ids), BATCH_SIZE):
+        batch = list(quote_ids[start:start + BATCH_SIZE])
+        tag_lists = get_tag_lists(batch)
+        stored_tag_lists = Quote.objects.filter(id__in=batch).values_list('id', 'tag_list')
+        stale = {}
+
+        for quote_id, stored_tag_list in stored_tag_lists:
+            if stored_tag_list != tag_lists.get(quote_id, []):
+                stale[quote_id] = (stored_tag_list, tag_lists.get(quote_id, []))
+
+        if stale:
+            yield stale
+
+
+def rebuild_tag_lists():
+    ''' Bring all the tag lists up to date, only stale ones are written.
+        Returns the number of fixed quotes '''
+
+    fixed_count = 0
+
+    for stale in iter_stale_tag_lists():
+        write_tag_lists({quote_id: actual for quote_id, (stored, actual) in stale.items()})
+        fixed_count += len(stale)
+
+    return fixed_count
@@ -1,11 +1,18 @@
 import factory
+import json
 import unittest
 
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from api_app.models import Author, Book, Quote, Tag
+from api_app.caching import response_cache
+from api_app.models import Author, Book, DataVersion, Quote, QuoteTag, Tag
+from api_app.sampling import invalidate_quote_ids
 from config.settings import REST_FRAMEWORK
 
 
@@ -45,6 +52,18 @@ class TestAuthorsResource(APITestCase):
             self.assertEqual(response.status_code, 200)
             self.assertEqual(author_count, 1)
 
+    def test_get_request_search_of_authors_ignores_case_and_accents(self):
+        inputs = ['LIAM', 'mill', 'vydunas', 'VYDŪ', ]
+
+        for input_ in inputs:
+            url = reverse('list-of-authors')
+            query = {'contains': input_}
+            response = self.client.get(url, query)
+            payload = response.json()
+            author_count = len(payload['results'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(author_count, 1, msg=f'params: {input_}')
+
     def test_get_request_can_fetch_author_by_id(self):
         resource_id = 2
         response = self.client.get(f"{reverse('list-of-authors')}{resource_id}/")
@@ -80,6 +99,18 @@ class TestBooksResource(APITestCase):
             self.assertEqual(response.status_code, 200)
             self.assertEqual(book_count, 1)
 
+    def test_get_request_search_of_books_ignores_case_and_accents(self):
+        inputs = ['old man', 'ii TOMAS', 'rastai', ]
+
+        for input_ in inputs:
+            url = reverse('list-of-books')
+            query = {'contains': input_}
+            response = self.client.get(url, query)
+            payload = response.json()
+            book_count = len(payload['results'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(book_count, 1, msg=f'params: {input_}')
+
     def test_get_request_can_search_books_by_exact_year(self):
         url = reverse('list-of-books')
         query = {'year': 1940}
@@ -151,6 +182,34 @@ class TestQuotesResource(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(quote_count, 1)
 
+    def test_get_request_can_search_quotes_by_full_text(self):
+        inputs = [
+            ('DEFEAT', 1),   # search string, expected number of quotes
+            ('"cat is the best"', 1),
+            ('"best cat"', 0),
+            ('anarch*', 1),
+            ('man destroyed', 1),
+            ('zmones', 1),   # Diacritics are ignored
+            ('the', 2),
+            ('"', 0),
+            ]
+
+        for search_string, expected_count in inputs:
+            url = reverse('list-of-quotes')
+            query = {'search': search_string}
+            response = self.client.get(url, query)
+            payload = response.json()
+            quote_count = len(payload['results'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(quote_count, expected_count, msg=f'params: {search_string}')
+
+    def test_get_request_full_text_search_results_are_ordered_by_rank(self):
+        url = reverse('list-of-quotes')
+        query = {'search': 'the'}
+        response = self.client.get(url, query)
+        payload = response.json()
+        self.assertEqual([q['id'] for q in payload['results']], [4, 1])   # "the" occurs twice in quote #4
+
     @unittest.skip('Test fixtures have no quotes that would contain dates')
     def test_get_request_can_search_quotes_by_exact_year(self):
         raise NotImplementedError
@@ -201,6 +260,48 @@ class TestQuotesResource(APITestCase):
 
 
 
+class TestQuotesQueryCount(APITestCase):
+    ''' Test whether tags of quotes are read without extra queries (see
+        <Quote.tag_list>), i.e. the number of queries does not depend on the
+        number of quotes in the response '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'tags.json',
+        ]
+
+    def add_tagged_quotes(self, count):
+        tags = list(Tag.objects.all())
+
+        for i in range(count):
+            quote = Quote.objects.create(text=f'Quote #{i}', author_id=1, book_id=1, language='English')
+            for tag in tags[:i % len(tags) + 1]:
+                QuoteTag.objects.create(quote=quote, tag=tag)
+
+    def test_quote_list_query_count_does_not_depend_on_page_size(self):
+        for count in [1, 5, REST_FRAMEWORK['PAGE_SIZE']]:
+            Quote.objects.all().delete()
+            self.add_tagged_quotes(count)
+
+            with self.assertNumQueries(3):   # Data version, count, quotes
+                response = self.client.get(reverse('list-of-quotes'))
+
+            payload = response.json()
+            self.assertEqual(len(payload['results']), count)
+            self.assertTrue(all(payload['results'][i]['tags'] for i in range(count)))
+
+    def test_quote_details_query_count(self):
+        self.add_tagged_quotes(5)
+        quote = Quote.objects.last()
+
+        with self.assertNumQueries(2):   # Data version, quote
+            response = self.client.get(f"{reverse('list-of-quotes')}{quote.id}/")
+
+        self.assertEqual(len(response.json()['tags']), 5)
+
+
+
 class TestTagsResource(APITestCase):
     fixtures = ['tags.json', ]
 
@@ -229,6 +330,24 @@ class TestTagsResource(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(tag_count, 1)
 
+    def test_get_request_search_of_tags_ignores_case(self):
+        inputs = [
+            ('starts_with', 'WIS', 1),   # search type, search string, expected number of tags
+            ('starts_with', 'denm', 1),
+            ('starts_with', 'Denmarks', 0),
+            ('contains', 'DOM', 1),
+            ('contains', 'mark', 1),
+            ]
+
+        for search_type, input_, expected_count in inputs:
+            url = reverse('list-of-tags')
+            query = {search_type: input_}
+            response = self.client.get(url, query)
+            payload = response.json()
+            tag_count = len(payload['results'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(tag_count, expected_count, msg=f'params: {search_type}, {input_}')
+
     def test_get_request_can_search_tags_by_similar_name_of_similarity_lte_2(self):
         url = reverse('list-of-tags')
         query = {'similar_to': 'wise'}
@@ -266,6 +385,9 @@ class TestRandomQuotesResource(APITestCase):
         'quote_tags.json',
         ]
 
+    def setUp(self):
+        invalidate_quote_ids()   # Tests roll back their changes without sending signals
+
     def test_get_request_can_fetch_random_quote(self):
         response = self.client.get(reverse('random-quote-details'))
         payload = response.json()
@@ -273,6 +395,58 @@ class TestRandomQuotesResource(APITestCase):
         self.assertIsInstance(payload, dict)
         self.assertIsInstance(payload['id'], int)
 
+    def test_get_request_can_fetch_multiple_distinct_random_quotes(self):
+        for count in [1, 3, 4, 10]:
+            url = reverse('random-quote-details')
+            query = {'count': count}
+            response = self.client.get(url, query)
+            payload = response.json()
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(payload, list)
+            self.assertEqual(len(payload), min(count, 4))
+            self.assertEqual(len({q['id'] for q in payload}), min(count, 4))
+
+    def test_get_request_with_invalid_count_returns_no_quotes(self):
+        for count in ['', 'abc', -1, 0]:
+            response = self.client.get(reverse('random-quote-details'), {'count': count})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), [])
+
+    def test_get_request_with_seed_returns_the_same_quotes(self):
+        url = reverse('random-quote-details')
+        query = {'count': 2, 'seed': 'abc'}
+        payloads = [self.client.get(url, query).json() for _ in range(5)]
+        self.assertTrue(all(payload == payloads[0] for payload in payloads))
+
+    def test_random_quotes_are_fetched_with_fixed_number_of_queries(self):
+        self.client.get(reverse('random-quote-details'))   # Load quote ids
+
+        with self.assertNumQueries(2):   # Data version, quote
+            self.client.get(reverse('random-quote-details'))
+
+        with self.assertNumQueries(2):   # Data version, quotes
+            self.client.get(reverse('random-quote-details'), {'count': 4})
+
+    def test_deleted_quotes_are_never_returned(self):
+        self.client.get(reverse('random-quote-details'))   # Load quote ids
+
+        with connection.cursor() as cursor:   # Delete quotes without sending signals, like another process would do
+            cursor.execute('DELETE FROM api_app_quotetag WHERE quote_id IN (1, 2, 3)')
+            cursor.execute('DELETE FROM api_app_quote WHERE id IN (1, 2, 3)')
+
+        response = self.client.get(reverse('random-quote-details'), {'count': 4})
+        self.assertEqual([q['id'] for q in response.json()], [4])
+
+    def test_quotes_added_by_other_processes_are_returned(self):
+        self.client.get(reverse('random-quote-details'))   # Load quote ids
+
+        quote = Quote.objects.get(pk=1)
+        Quote.objects.bulk_create([Quote(text='New quote', author_id=quote.author_id, book_id=quote.book_id, language='English')])   # No signals
+        DataVersion.bump()
+
+        response = self.client.get(reverse('random-quote-details'), {'count': 10})
+        self.assertIn('New quote', [q['text'] for q in response.json()])
+
 
 
 class TestPagination(APITestCase):
@@ -297,6 +471,371 @@ class TestPagination(APITestCase):
 
 
 
+class TestCursorPagination(APITestCase):
+    ''' Test cursor pagination, which is enabled with "pagination=cursor"
+        query parameter '''
+
+    item_count = REST_FRAMEWORK['PAGE_SIZE'] * 2 + 5
+
+    def setUp(self):
+        for i in range(self.item_count):
+            RandomAuthorFactory(last_name=f'Name{i % 7}')   # Many authors share the same last name
+
+        self.expected_ids = list(Author.objects.order_by('last_name', 'id').values_list('id', flat=True))
+
+    def test_cursor_pagination_walks_through_all_items_forwards_and_backwards(self):
+        url = reverse('list-of-authors')
+        page = self.client.get(url, {'pagination': 'cursor'}).json()
+        self.assertNotIn('count', page)
+        self.assertIsNone(page['previous'])
+        pages = [page]
+
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).json())
+
+        ids = [author['id'] for page in pages for author in page['results']]
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(len(pages), 3)
+
+        page = pages[-1]
+        backward_ids = [author['id'] for author in page['results']]
+
+        while page['previous']:
+            page = self.client.get(page['previous']).json()
+            backward_ids = [author['id'] for author in page['results']] + backward_ids
+
+        self.assertEqual(backward_ids, self.expected_ids)
+
+    def test_cursor_pagination_does_not_count_items(self):
+        url = reverse('list-of-authors')
+        page = self.client.get(url, {'pagination': 'cursor'}).json()
+
+        with self.assertNumQueries(2):   # Data version, authors
+            self.client.get(page['next'])
+
+    def test_invalid_cursor_triggers_404_response(self):
+        url = reverse('list-of-authors')
+        response = self.client.get(url, {'pagination': 'cursor', 'cursor': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_used_by_default(self):
+        page = self.client.get(reverse('list-of-authors')).json()
+        self.assertEqual(page['count'], self.item_count)
+
+
+
+class TestConditionalRequests(APITestCase):
+    ''' Test whether responses can be validated with ETag and Last-Modified
+        headers, which change whenever any resource is saved or deleted '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    urls = [
+        reverse('list-of-authors'),
+        reverse('list-of-books'),
+        reverse('list-of-quotes'),
+        reverse('list-of-tags'),
+        reverse('author-details', args=[1]),
+        reverse('book-details', args=[1]),
+        reverse('quote-details', args=[1]),
+        reverse('tag-details', args=[1]),
+        f"{reverse('random-quote-details')}?seed=1",
+        ]
+
+    def test_unchanged_resources_are_not_fetched_again(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            with self.assertNumQueries(1):   # Data version only
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, msg=url)
+
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, msg=url)
+
+    def test_changed_resources_are_fetched_again(self):
+        for model in [Author, Book, Quote, Tag, QuoteTag]:
+            etag = self.client.get(reverse('list-of-quotes'))['ETag']
+            model.objects.first().save()
+            response = self.client.get(reverse('list-of-quotes'), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, msg=model.__name__)
+            self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        QuoteTag.objects.first().delete()
+        response = self.client.get(reverse('list-of-quotes'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unseeded_random_quotes_are_not_conditional(self):
+        response = self.client.get(reverse('random-quote-details'))
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+
+
+class TestResponseCache(APITestCase):
+    ''' Test whether rendered responses are reused until any resource
+        changes '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def setUp(self):
+        response_cache.clear_local()
+
+    def test_repeated_requests_are_served_from_cache(self):
+        url = reverse('list-of-quotes')
+        response = self.client.get(url, {'author': 2, 'tags': 3})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(1):   # Data version only
+            cached_response = self.client.get(url, {'tags': 3, 'author': 2})   # Order of parameters does not matter
+
+        self.assertEqual(cached_response['X-Cache'], 'HIT')
+        self.assertEqual(cached_response.content, response.content)
+        self.assertEqual(cached_response['Content-Type'], response['Content-Type'])
+
+    def test_cached_responses_are_invalidated_when_resources_change(self):
+        url = reverse('list-of-tags')
+        self.client.get(url)
+        Tag.objects.create(name='love')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['results']), 6)
+
+    def test_error_responses_and_unseeded_random_quotes_are_not_cached(self):
+        for url in [f"{reverse('list-of-tags')}100/", reverse('random-quote-details')]:
+            self.client.get(url)
+            response = self.client.get(url)
+            self.assertNotEqual(response.get('X-Cache', None), 'HIT', msg=url)
+
+    @override_settings(
+        CACHES={'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        API_RESPONSE_CACHE={'SHARED_CACHE': 'shared'})
+    def test_responses_are_shared_through_django_cache(self):
+        url = reverse('list-of-books')
+        response = self.client.get(url)
+        response_cache.clear_local()   # Imitate another process
+        cached_response = self.client.get(url)
+        self.assertEqual(cached_response['X-Cache'], 'HIT')
+        self.assertEqual(cached_response.content, response.content)
+
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+    def test_cache_can_be_disabled(self):
+        self.client.get(reverse('list-of-books'))
+        response = self.client.get(reverse('list-of-books'))
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_cache_stats_are_available_to_admins_only(self):
+        url = reverse('response-cache-stats')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        self.client.get(reverse('list-of-books'))
+        self.client.get(reverse('list-of-books'))
+        stats = self.client.get(url).json()
+        self.assertGreaterEqual(stats['hits'], 1)
+        self.assertGreaterEqual(stats['misses'], 1)
+        self.assertIn('evictions', stats)
+
+
+
+class TestExpand(APITestCase):
+    ''' Test embedding of related items with "expand" query parameter '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def setUp(self):
+        response_cache.clear_local()
+
+    def assert_expanded(self, item, expected_fields):
+        for field in ['author', 'book']:
+            if field not in item:
+                continue
+
+            if field in expected_fields:
+                self.assertEqual(item[field], self.client.get(reverse(f'{field}-details', args=[item[field]['id']])).json())
+            else:
+                self.assertIsInstance(item[field], str)   # Hyperlink
+
+    def test_related_items_are_embedded_without_extra_queries(self):
+        cases = [
+            ('list-of-quotes', [], 3, 'author,book'),
+            ('list-of-books', [], 3, 'author'),
+            ('quote-details', [1], 2, 'author,book'),
+            ('book-details', [1], 2, 'author'),
+            ]
+
+        for url_name, args, query_count, expand in cases:
+            url = reverse(url_name, args=args)
+
+            with self.assertNumQueries(query_count):
+                response = self.client.get(url, {'expand': expand})
+
+            items = response.json()['results'] if 'results' in response.json() else [response.json()]
+            self.assertTrue(items)
+
+            for item in items:
+                self.assert_expanded(item, expand.split(','))
+
+    def test_only_requested_fields_are_expanded(self):
+        for expand in ['author', 'book', 'tags', 'unknown,book', '']:
+            response = self.client.get(reverse('list-of-quotes'), {'expand': expand})
+
+            for item in response.json()['results']:
+                self.assert_expanded(item, [field for field in expand.split(',') if field in ('author', 'book')])
+
+    def test_random_quotes_can_be_expanded(self):
+        response = self.client.get(reverse('random-quote-details'), {'count': 3, 'expand': 'author,book'})
+
+        for item in response.json():
+            self.assert_expanded(item, ['author', 'book'])
+
+
+class TestSparseFieldsets(APITestCase):
+    ''' Test trimming items down to the fields listed in "fields" query
+        parameter '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def setUp(self):
+        response_cache.clear_local()
+
+    def test_only_requested_fields_are_returned_and_fetched(self):
+        cases = [
+            ('list-of-quotes', [], 'id,text', 3),   # Data version, count, quotes
+            ('list-of-quotes', [], 'text,tags', 3),
+            ('quote-details', [1], 'id,rating', 2),
+            ('random-quote-details', [], 'id,language', 3),   # Data version, quote ids, quote
+            ('list-of-authors', [], 'last_name', 3),
+            ('author-details', [1], 'first_name,last_name', 2),
+            ('list-of-books', [], 'title,year', 3),
+            ('book-details', [1], 'isbn', 2),
+            ('list-of-tags', [], 'name', 3),
+            ('tag-details', [1], 'id', 2),
+            ]
+
+        for url_name, args, fields, query_count in cases:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(url_name, args=args), {'fields': fields})
+
+            self.assertEqual(len(queries), query_count, msg=url_name)
+            item = response.json()['results'][0] if 'results' in response.json() else response.json()
+            self.assertEqual(list(item), fields.split(','), msg=url_name)
+
+            select = queries[-1]['sql'].split(' FROM ')[0]
+            fetched_columns = {column.split('.')[1].strip('"') for column in select[len('SELECT '):].split(', ')}
+            fetched_fields = {'tags' if column == 'tag_list' else column for column in fetched_columns}
+            self.assertLessEqual(fetched_fields - {'id', 'text', 'last_name', 'title', 'name'}, set(fields.split(',')), msg=url_name)
+
+    def test_fields_can_be_expanded(self):
+        response = self.client.get(reverse('quote-details', args=[1]), {'fields': 'id,author', 'expand': 'author,book'})
+        self.assertEqual(list(response.json()), ['id', 'author'])
+        self.assertEqual(response.json()['author'], self.client.get(reverse('author-details', args=[response.json()['author']['id']])).json())
+
+        response = self.client.get(reverse('list-of-quotes'), {'fields': 'id', 'expand': 'author'})
+        self.assertEqual(list(response.json()['results'][0]), ['id'])
+
+    def test_unknown_fields_are_ignored(self):
+        response = self.client.get(reverse('list-of-quotes'), {'fields': 'id,unknown'})
+        self.assertEqual(list(response.json()['results'][0]), ['id'])
+
+        response = self.client.get(reverse('list-of-quotes'), {'fields': 'unknown'})   # All the fields
+        self.assertEqual(response.json(), self.client.get(reverse('list-of-quotes')).json())
+
+    def test_cursor_pagination_works_with_any_fields(self):
+        response = self.client.get(reverse('list-of-quotes'), {'fields': 'id', 'pagination': 'cursor', 'page_size': 2})
+        next_response = self.client.get(response.json()['next'])
+        ids = [item['id'] for item in response.json()['results'] + next_response.json()['results']]
+        self.assertEqual(ids, list(Quote.objects.order_by('text', 'id').values_list('id', flat=True)))
+
+
+class TestExport(APITestCase):
+    ''' Test NDJSON exports of all the items of every resource '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def get_lines(self, url_name, query_params=None, **extra):
+        response = self.client.get(reverse(url_name), query_params or {}, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        return [json.loads(line) for line in content.splitlines()]
+
+    def get_all_results(self, url_name, query_params=None):
+        return self.client.get(reverse(url_name), dict(query_params or {}, page_size=100)).json()['results']
+
+    def test_exports_contain_the_same_items_as_lists(self):
+        for resource in ['authors', 'books', 'tags']:
+            self.assertEqual(self.get_lines(f'export-of-{resource}'), self.get_all_results(f'list-of-{resource}'))
+
+    def test_quotes_are_exported_with_authors_books_and_tags(self):
+        quotes = self.get_lines('export-of-quotes')
+        self.assertEqual(len(quotes), Quote.objects.count())
+
+        for quote, listed_quote in zip(quotes, self.get_all_results('list-of-quotes')):
+            self.assertEqual(quote['id'], listed_quote['id'])
+            self.assertEqual(quote['tags'], listed_quote['tags'])
+            self.assertEqual(quote['author'], self.client.get(listed_quote['author']).json())
+            self.assertEqual(quote['book'], self.client.get(listed_quote['book']).json())
+
+    def test_exports_accept_the_same_filters_as_lists(self):
+        cases = [
+            ('quotes', {'tags': '3'}),
+            ('quotes', {'author': 2, 'contains': 'a'}),
+            ('quotes', {'search': 'be'}),
+            ('quotes', {'date': 'invalid'}),
+            ('books', {'year': 1952}),
+            ('tags', {'similar_to': 'wisdon'}),
+            ]
+
+        for resource, query_params in cases:
+            exported_ids = [item['id'] for item in self.get_lines(f'export-of-{resource}', query_params)]
+            listed_ids = [item['id'] for item in self.get_all_results(f'list-of-{resource}', query_params)]
+            self.assertEqual(exported_ids, listed_ids, msg=f'{resource} {query_params}')
+
+    @override_settings(API_STREAMING={'EXPORT_CHUNK_SIZE': 1})
+    def test_quotes_are_exported_in_chunks(self):
+        with self.assertNumQueries(2):   # Data version, quotes (fetched lazily, with authors, books and tags)
+            quotes = self.get_lines('export-of-quotes')
+
+        self.assertEqual([quote['id'] for quote in quotes], [quote['id'] for quote in self.get_all_results('list-of-quotes')])
+
+    def test_exports_are_negotiated_with_json_accept_header(self):
+        self.assertEqual(len(self.get_lines('export-of-tags', HTTP_ACCEPT='application/json')), Tag.objects.count())
+
+
 class TestResourceNotFoundResponse(APITestCase):
     ''' Test whether selected resources respond with custom "404 Not Found"
         message when non-existent resource id is used '''
@@ -0,0 +1,105 @@
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from api_app.caching import response_cache
+from api_app.urls import get_urlpatterns
+
+
+
+class AsyncURLConf:
+    urlpatterns = [path('api/v1/', include(get_urlpatterns(asynchronous=True)))]
+
+
+CASES = [
+    ('list-of-authors', [], [{}, {'contains': 'a'}, {'page': 'last'}, {'pagination': 'cursor'}]),
+    ('list-of-books', [], [{}, {'author': 1}, {'expand': 'author'}, {'fields': 'id,title'}]),
+    ('list-of-quotes', [], [{}, {'tags': '3,5'}, {'search': 'be'}, {'pagination': 'cursor'}, {'page_size': 2, 'page': 2},
+        {'expand': 'author,book'}, {'fields': 'id,tags'}, {'fields': 'text'}]),
+    ('list-of-tags', [], [{}, {'starts_with': 'wis'}, {'similar_to': 'wisdon'}]),
+    ('author-details', [1], [{}, {'fields': 'last_name'}]),
+    ('book-details', [1], [{}, {'expand': 'author'}]),
+    ('quote-details', [1], [{}, {'expand': 'book'}, {'fields': 'id,text'}]),
+    ('tag-details', [1], [{}]),
+    ('random-quote-details', [], [{'seed': 42}, {'seed': 42, 'count': 3}, {'seed': 42, 'count': 'x'}]),
+    ]
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class AsyncViewTests(TestCase):
+    ''' Async views share filters, pagination and serializers with the sync
+        views, so their responses must be exactly the same '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    async def test_responses_are_the_same_as_of_sync_views(self):
+        for url_name, args, params_list in CASES:
+            url = reverse(url_name, args=args)
+
+            for params in params_list:
+                with self.subTest(url=url, params=params):
+                    expected = await self.async_client.get(url, params)
+
+                    with override_settings(ROOT_URLCONF=AsyncURLConf):
+                        actual = await self.async_client.get(url, params)
+
+                    self.assertEqual(actual.status_code, expected.status_code)
+                    self.assertEqual(actual.content, expected.content)
+                    self.assertEqual(actual['ETag'], expected['ETag'])
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_missing_item_is_not_found(self):
+        response = await self.async_client.get(reverse('quote-details', args=[999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'message': 'Resource not found'})
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_current_data_is_not_modified(self):
+        response = await self.async_client.get(reverse('list-of-quotes'))
+        headers = {'If-None-Match': response['ETag']}   # AsyncClient takes names of ASGI headers, not of WSGI environ
+        response = await self.async_client.get(reverse('list-of-quotes'), **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf, API_RESPONSE_CACHE={'ENABLED': True})
+    async def test_responses_are_cached(self):
+        response_cache.clear_local()
+        first = await self.async_client.get(reverse('list-of-tags'))
+        second = await self.async_client.get(reverse('list-of-tags'))
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.content, second.content)
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class ASGIStreamingTests(TestCase):
+    ''' ASGI handler of Django 4.0 iterates streamed content in the event loop,
+        where the ORM can not be used, so sync views must not query the
+        database while the content is sent '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    async def test_exports(self):
+        for url_name in ['export-of-authors', 'export-of-books', 'export-of-quotes', 'export-of-tags']:
+            with self.subTest(url_name=url_name):
+                expected = await sync_to_async(lambda: b''.join(self.client.get(reverse(url_name)).streaming_content))()
+                response = await self.async_client.get(reverse(url_name))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), expected)
+
+    async def test_large_pages_are_not_streamed(self):
+        response = await self.async_client.get(reverse('list-of-quotes'), {'page_size': 600})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertGreater(len(response.json()['results']), 0)
@@ -0,0 +1,72 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_app.backends.sqlite3.base import DatabaseWrapper
+from api_app.models import DataVersion
+
+
+
+class ConnectionTests(TestCase):
+    def get_pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connections_can_change_data(self):
+        self.assertEqual(self.get_pragma('query_only'), 0)
+
+    def test_data_version_is_read_without_writing(self):
+        DataVersion.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(DataVersion.current().version, 0)
+
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('SELECT'))
+        self.assertFalse(DataVersion.objects.exists())
+
+        DataVersion.bump()
+        self.assertGreater(DataVersion.current().version, 0)
+
+
+class SnapshotDatabaseTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'snapshot.sqlite3'
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            conn.execute('INSERT INTO item VALUES (1)')
+
+        conn.close()
+
+    def connect(self, **options):
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': self.path, 'OPTIONS': options}, alias='snapshot')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_immutable_database_is_read_only(self):
+        with self.connect(immutable=True).cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+            with self.assertRaises(DatabaseError):
+                cursor.execute('INSERT INTO item VALUES (2)')
+
+    def test_read_only_connection_can_not_change_data(self):
+        with self.connect(read_only=True).cursor() as cursor:
+            with self.assertRaises(DatabaseError):
+                cursor.execute('DELETE FROM item')
+
+    def test_pragmas_are_set(self):
+        with self.connect(pragmas={'journal_mode': 'wal', 'cache_size': -1024}).cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1024)
@@ -0,0 +1,52 @@
+from django.test import TestCase
+
+from api_app.benchmarks import dataset, endpoints
+from api_app.models import Author, Quote, QuoteTag, Tag
+
+
+
+class DatasetTests(TestCase):
+    def test_generated_dataset_is_searchable_and_has_popular_tags(self):
+        tag_ids = dataset.generate(500, seed=1)
+        self.assertEqual(Quote.objects.count(), 500)
+        self.assertEqual(Author.objects.count(), 5)
+        self.assertGreater(QuoteTag.objects.count(), 1000)
+
+        popular_tag_count = QuoteTag.objects.filter(tag_id=tag_ids[0]).count()
+        rare_tag_count = QuoteTag.objects.filter(tag_id=tag_ids[-1]).count()
+        self.assertGreater(popular_tag_count, rare_tag_count)
+
+        author = Author.objects.first()
+        self.assertEqual(author.last_name_folded, author.last_name.casefold())
+
+        word = Quote.objects.first().text.split()[0]
+        response = self.client.get('/api/v1/quotes/', {'search': word})
+        self.assertGreater(response.json()['count'], 0)
+
+
+class BaselineComparisonTests(TestCase):
+    baseline = {
+        'quotes': {'latency_ms': 10.0, 'queries': 4, 'peak_memory_kb': 100.0},
+        'tags': {'latency_ms': 2.0, 'queries': 2, 'peak_memory_kb': 20.0},
+    }
+
+    def test_results_within_tolerance_are_not_regressions(self):
+        results = {
+            'quotes': {'latency_ms': 12.0, 'queries': 4, 'peak_memory_kb': 80.0},
+            'tags': {'latency_ms': 1.0, 'queries': 1, 'peak_memory_kb': 20.0},
+            'authors': {'latency_ms': 100.0, 'queries': 10, 'peak_memory_kb': 100.0},   # Not in baseline
+        }
+        self.assertEqual(endpoints.compare(results, self.baseline, tolerance=0.25), [])
+
+    def test_slower_or_chattier_results_are_regressions(self):
+        results = {
+            'quotes': {'latency_ms': 13.0, 'queries': 4, 'peak_memory_kb': 100.0},
+            'tags': {'latency_ms': 2.0, 'queries': 3, 'peak_memory_kb': 30.0},
+        }
+        regressions = endpoints.compare(results, self.baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 3)
+
+    def test_p95_is_nearest_rank(self):
+        self.assertEqual(endpoints.get_percentile([3.0, 1.0, 5.0, 2.0, 4.0], 95), 5.0)
+        self.assertEqual(endpoints.get_percentile([3.2, 2.9], 95), 3.2)
+        self.assertEqual(endpoints.get_percentile(list(range(1, 101)), 95), 95)
@@ -0,0 +1,124 @@
+from collections import Counter
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api_app import snapshot
+from api_app.facets import facet_cache
+from api_app.models import Quote
+from api_app.tests.test_async_views import AsyncURLConf
+
+
+
+FACETS = 'tags,language,author,rating,year'
+
+FILTERS = [{}, {'contains': 'the'}, {'search': 'be'}, {'tags': '3'}, {'author': 1}, {'date': 'x'}]
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class FacetTests(TestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def setUp(self):
+        facet_cache.clear()   # Data versions repeat in rolled back test transactions
+        snapshot.clear_snapshot()
+
+    def get_facets(self, params):
+        response = self.client.get(reverse('list-of-quotes'), {**params, 'facets': FACETS})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['facets']
+
+    def get_expected_counts(self, quotes):
+        counts = {
+            'tags': Counter((tag['id'], tag['name']) for quote in quotes for tag in quote.tag_list),
+            'language': Counter(quote.language for quote in quotes),
+            'author': Counter((quote.author_id, str(quote.author)) for quote in quotes),
+            'rating': Counter(quote.rating for quote in quotes),
+            'year': Counter(quote.book.year for quote in quotes),
+        }
+        return {name: sorted(counter.values(), reverse=True) for name, counter in counts.items()}
+
+    def test_counts_of_all_quotes(self):
+        facets = self.get_facets({})
+        expected = self.get_expected_counts(Quote.objects.all())
+        self.assertEqual({name: [entry['count'] for entry in entries] for name, entries in facets.items()}, expected)
+        self.assertEqual(list(facets['tags'][0]), ['id', 'name', 'count'])
+        self.assertEqual(list(facets['language'][0]), ['value', 'count'])
+
+        author = next(entry for entry in facets['author'] if entry['id'] == 1)
+        self.assertEqual(author['name'], str(Quote.objects.filter(author_id=1).first().author))
+
+    def test_counts_of_filtered_quotes(self):
+        facets = self.get_facets({'tags': '3'})
+        expected = self.get_expected_counts(Quote.objects.tagged_with_all([3]))
+        self.assertEqual([entry['count'] for entry in facets['language']], expected['language'])
+        self.assertEqual(facets['tags'][0], {'id': 3, 'name': 'wisdom', 'count': Quote.objects.tagged_with_all([3]).count()})
+
+        self.assertEqual(self.get_facets({'date': 'x'}), {name: [] for name in FACETS.split(',')})
+
+    def test_facets_are_added_before_results_of_every_kind_of_page(self):
+        for params in [{}, {'pagination': 'cursor'}, {'page_size': 1000}]:   # Page numbers, cursor, streamed
+            with self.subTest(params=params):
+                response = self.client.get(reverse('list-of-quotes'), {**params, 'facets': 'language'})
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                self.assertIn(b'"facets":{"language":[', content)
+                self.assertTrue(content.index(b'"facets"') < content.index(b'"results"'))
+
+    def test_unknown_and_missing_facets(self):
+        response = self.client.get(reverse('list-of-quotes'), {'facets': 'language,x,language'})
+        self.assertEqual(list(response.json()['facets']), ['language'])
+        self.assertNotIn('facets', self.client.get(reverse('list-of-quotes')).json())
+        self.assertNotIn('facets', self.client.get(reverse('list-of-quotes'), {'facets': 'x'}).json())
+
+    def test_counts_are_computed_with_a_query_per_facet(self):
+        with self.assertNumQueries(3 + 6):   # Data version, count, quotes, a GROUP BY query per facet and tag names
+            self.get_facets({'contains': 'the'})
+
+    def test_counts_are_cached_by_filters(self):
+        self.get_facets({'contains': 'the'})
+
+        with self.assertNumQueries(3):   # Data version, count, quotes
+            self.client.get(reverse('list-of-quotes'), {'contains': 'the', 'facets': FACETS, 'page_size': 1, 'page': 2, 'fields': 'id'})
+
+        with self.assertNumQueries(3 + 6):
+            self.get_facets({'contains': 'be'})
+
+    def test_cached_counts_follow_changes(self):
+        before = self.get_facets({})
+        Quote.objects.filter(language='English').first().delete()
+        after = self.get_facets({})
+        self.assertEqual(sum(entry['count'] for entry in after['language']), sum(entry['count'] for entry in before['language']) - 1)
+
+    def test_only_the_highest_counts_are_returned(self):
+        tags = self.get_facets({})['tags']
+
+        with self.settings(API_FACETS={'MAX_VALUES': 2}):
+            self.assertEqual(self.get_facets({})['tags'], tags[:2])
+
+    def test_snapshot_counts_are_the_same(self):
+        for params in FILTERS:
+            with self.subTest(params=params):
+                expected = self.get_facets(params)
+                facet_cache.clear()
+
+                with self.settings(API_SNAPSHOT={'ENABLED': True, 'CHECK_INTERVAL': 0}):
+                    self.assertEqual(self.get_facets(params), expected)
+
+                facet_cache.clear()
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_async_view_counts_are_the_same(self):
+        for params in FILTERS:
+            with self.subTest(params=params):
+                with self.settings(ROOT_URLCONF='config.urls'):
+                    expected = await self.async_client.get(reverse('list-of-quotes'), {**params, 'facets': FACETS})
+
+                facet_cache.clear()
+                actual = await self.async_client.get(reverse('list-of-quotes'), {**params, 'facets': FACETS})
+                self.assertEqual(actual.json(), expected.json())
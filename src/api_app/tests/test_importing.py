@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_app import search, tag_lists
+from api_app.importing import COLUMNS, QuoteImporter
+from api_app.models import Author, Book, DataVersion, Quote, QuoteTag, Tag
+
+
+
+ROWS = [
+    {'text': 'Brevity is the soul of wit.', 'language': 'English', 'tags': ['wit', 'wisdom'], 'rating': '5',
+        'author_first_name': 'William', 'author_last_name': 'Shakespeare', 'book_title': 'The Tragedy of Hamlet, Prince of Denmark'},
+    {'text': 'The sea was angry that day.', 'language': 'English', 'tags': ['sea', 'sea'], 'date': '2020-01-02',
+        'author_first_name': 'Jonas', 'author_last_name': 'Jonaitis', 'author_date_of_birth': '1950-05-01', 'author_nationality': 'Lithuanian',
+        'book_title': 'Jūra', 'book_year': '1990', 'book_publisher': 'Vaga'},
+    {'text': 'Calm seas never made a skilled sailor.', 'language': 'English', 'tags': ['Sailing'],
+        'author_first_name': 'Jonas', 'author_last_name': 'Jonaitis', 'book_title': 'Jūra'},
+    ]
+
+
+class ImportQuotesCommandTests(TestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'tags.json',
+        ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_ndjson(self, rows):
+        path = self.directory / 'quotes.ndjson'
+        path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+        return path
+
+    def write_csv(self, rows):
+        path = self.directory / 'quotes.csv'
+
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, COLUMNS)
+            writer.writeheader()
+            writer.writerows({**row, 'tags': ','.join(row['tags'])} for row in rows)
+
+        return path
+
+    def import_quotes(self, path, **options):
+        stdout = io.StringIO()
+        call_command('import_quotes', str(path), stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def assert_imported(self):
+        quotes = {quote.text: quote for quote in Quote.objects.all()}
+        self.assertEqual(len(quotes), 3)
+
+        hamlet_quote = quotes['Brevity is the soul of wit.']
+        self.assertEqual(hamlet_quote.author_id, 1)   # Existing author and book are reused
+        self.assertEqual(hamlet_quote.book_id, 1)
+        self.assertEqual(hamlet_quote.rating, 5)
+        self.assertEqual(hamlet_quote.length_in_words, 6)
+        self.assertEqual([tag['name'] for tag in hamlet_quote.tag_list], ['wisdom', 'wit'])   # Ordered by tag id
+
+        sea_quote = quotes['The sea was angry that day.']
+        self.assertEqual(str(sea_quote.date), '2020-01-02')
+        self.assertEqual(sea_quote.tag_list, [{'id': 1, 'name': 'sea'}])   # Duplicate tags are dropped
+        self.assertEqual(sea_quote.book_id, quotes['Calm seas never made a skilled sailor.'].book_id)
+
+        self.assertEqual(Author.objects.filter(last_name='Jonaitis').get().last_name_folded, 'jonaitis')
+        self.assertEqual(Book.objects.filter(title='Jūra').count(), 1)
+        self.assertEqual(Tag.objects.filter(name__in=['wit', 'Sailing']).count(), 2)
+        self.assertEqual(QuoteTag.objects.count(), 4)
+        self.assertEqual(list(tag_lists.iter_stale_tag_lists()), [])
+
+        if search.is_available():
+            self.assertEqual(set(search.filter_quotes(Quote.objects.all(), 'sailor').values_list('id', flat=True)), {quotes['Calm seas never made a skilled sailor.'].id})
+
+    def test_ndjson_is_imported(self):
+        version = DataVersion.current().version
+        output = self.import_quotes(self.write_ndjson(ROWS), batch_size=2)
+        self.assert_imported()
+        self.assertIn('rows/s', output)
+        self.assertGreater(DataVersion.current().version, version)
+
+    def test_csv_is_imported(self):
+        self.import_quotes(self.write_csv(ROWS))
+        self.assert_imported()
+
+    def test_batches_take_a_fixed_number_of_queries(self):
+        query_counts = []
+
+        for count in [5, 50]:
+            rows = [(i, {**ROWS[1], 'author_last_name': f'Author{count}', 'text': f'Quote #{i}', 'tags': [f'tag{count}-{i}']}) for i in range(count)]
+            importer = QuoteImporter(batch_size=count)
+
+            with CaptureQueriesContext(connection) as queries:
+                list(importer.import_rows(rows))
+
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_invalid_row_is_reported_with_its_line(self):
+        rows = [ROWS[0], {**ROWS[1], 'author_last_name': 'Petraitis', 'author_date_of_birth': 'unknown'}]
+
+        with self.assertRaisesRegex(CommandError, 'Line 2: invalid "author_date_of_birth"'):
+            self.import_quotes(self.write_ndjson(rows), batch_size=1)
+
+        self.assertEqual(Quote.objects.count(), 1)   # The batch before the invalid row is imported
+        self.assertFalse(Author.objects.filter(last_name='Petraitis').exists())
+
+    def test_row_which_is_not_an_object_is_reported_with_its_line(self):
+        path = self.directory / 'quotes.ndjson'
+        path.write_text(json.dumps(ROWS[0]) + '\n[1, 2]\n', encoding='utf-8')
+
+        with self.assertRaisesRegex(CommandError, 'Line 2: row must be a JSON object'):
+            self.import_quotes(path)
+
+    def test_tags_which_are_not_names_are_reported_with_their_line(self):
+        with self.assertRaisesRegex(CommandError, 'Line 2: "tags" must be a list of names'):
+            self.import_quotes(self.write_ndjson([ROWS[0], {**ROWS[1], 'tags': [1, None]}]))
+
+    def test_fields_which_are_not_strings_are_reported_with_their_line(self):
+        for name, value in [('text', 5), ('book_title', ['Jūra']), ('author_last_name', {'name': 'Jonaitis'}), ('language', True)]:
+            with self.subTest(name=name):
+                with self.assertRaisesRegex(CommandError, f'Line 2: "{name}" must be a string'):
+                    self.import_quotes(self.write_ndjson([ROWS[0], {**ROWS[1], name: value}]))
@@ -0,0 +1,73 @@
+import re
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api_app.caching import response_cache
+
+
+
+SERVER_TIMING_METRIC = re.compile(r'^(\w+);dur=([\d.]+)(;desc="(\d+) queries")?$')
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class PerformanceInstrumentationTests(APITestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def parse_server_timing(self, header):
+        metrics = {}
+
+        for metric in header.split(', '):
+            match = SERVER_TIMING_METRIC.match(metric)
+            self.assertIsNotNone(match, msg=metric)
+            metrics[match.group(1)] = (float(match.group(2)), match.group(4))
+
+        return metrics
+
+    @override_settings(API_PERFORMANCE={'SAMPLE_RATE': 1.0})
+    def test_responses_have_server_timing_header(self):
+        urls = [
+            reverse('list-of-quotes'),
+            reverse('quote-details', args=[1]),
+            reverse('random-quote-details'),
+            reverse('list-of-tags'),
+            ]
+
+        for url in urls:
+            response = self.client.get(url)
+            metrics = self.parse_server_timing(response['Server-Timing'])
+            self.assertEqual(list(metrics), ['db', 'queryset', 'serialize', 'render', 'total'], msg=url)
+            self.assertGreater(int(metrics['db'][1]), 0, msg=url)
+
+            for stage in ['queryset', 'serialize', 'render']:
+                self.assertGreater(metrics[stage][0], 0, msg=f'{url} {stage}')
+                self.assertLessEqual(metrics[stage][0], metrics['total'][0], msg=f'{url} {stage}')
+
+    @override_settings(API_PERFORMANCE={'SAMPLE_RATE': 1.0})
+    def test_timings_are_logged(self):
+        with self.assertLogs('api_app.performance', level='INFO') as logs:
+            self.client.get(reverse('list-of-quotes'))
+
+        record = logs.records[0]
+        self.assertEqual(record.path, reverse('list-of-quotes'))
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.queries, 3)   # Data version, count, quotes
+        self.assertGreater(record.serialize_ms, 0)
+
+    @override_settings(API_PERFORMANCE={'SAMPLE_RATE': 0.0})
+    def test_requests_out_of_sample_are_not_instrumented(self):
+        response = self.client.get(reverse('list-of-quotes'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(API_PERFORMANCE={'SAMPLE_RATE': 1.0})
+    async def test_async_requests_are_instrumented_without_queries(self):
+        response = await self.async_client.get(reverse('list-of-quotes'))
+        metrics = self.parse_server_timing(response['Server-Timing'])
+        self.assertEqual(list(metrics), ['queryset', 'serialize', 'render', 'total'])
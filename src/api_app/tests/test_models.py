@@ -39,3 +39,31 @@ class ModelStringRepresentationTests(TestCase):
         quote_tag = QuoteTag.objects.get(pk=1)
         self.assertEqual(str(quote_tag), '[prince] [William Shakespeare] To be or not to be, that is the question.')
 
+
+
+
+class QuoteQuerySetTests(TestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'quote_tags.json',
+        'tags.json',
+        ]
+
+    def test_tagged_with_all(self):
+        inputs = [
+            ([3], {1, 2, 3, 4}),   # tag ids, ids of quotes tagged with all of them
+            ([3, 5], {4}),
+            ([3, 3, 5], {4}),
+            ([1, 2], set()),
+            ([2, 3, 4], {1}),
+            ([100], set()),
+            ]
+
+        for tag_ids, quote_ids in inputs:
+            quotes = Quote.objects.tagged_with_all(tag_ids)
+            self.assertEqual(set(quotes.values_list('id', flat=True)), quote_ids, msg=f'params: {tag_ids}')
+
+        with self.assertNumQueries(1):
+            list(Quote.objects.tagged_with_all([3, 5]).filter(author_id=3))
@@ -0,0 +1,94 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+
+from api_app import views
+
+
+
+# (view, query parameters, whether sorting of results is expected). Filters
+# that narrow results down by a subquery or an index range (tags, full-text
+# search, tag prefix) sort only the matches, the rest must use an index which
+# is already ordered
+
+CASES = [
+    (views.AuthorList, {}, False),
+    (views.AuthorList, {'contains': 'liam'}, False),
+    (views.BookList, {}, False),
+    (views.BookList, {'year': 1952}, False),
+    (views.BookList, {'isbn': '0684801221'}, False),
+    (views.BookList, {'author': 2}, False),
+    (views.BookList, {'author': 2, 'year': 1952}, False),
+    (views.BookList, {'contains': 'old'}, False),
+    (views.QuoteList, {}, False),
+    (views.QuoteList, {'author': 1}, False),
+    (views.QuoteList, {'book': 1}, False),
+    (views.QuoteList, {'date': '2020-01-01'}, False),
+    (views.QuoteList, {'tags': '3', 'author': 1}, False),
+    (views.QuoteList, {'tags': '3,5'}, True),
+    (views.QuoteList, {'search': 'cat'}, True),
+    (views.TagList, {}, False),
+    (views.TagList, {'starts_with': 'wis'}, True),
+    (views.TagList, {'contains': 'dom'}, False),
+    ]
+
+TABLE_SCAN = re.compile(r'^SCAN \w+$')   # Full scan of a table (not of an index)
+
+
+class QueryPlanTests(TestCase):
+    ''' Run EXPLAIN QUERY PLAN on querysets of list views to make sure that
+        filters and orderings are backed by indexes '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def get_queryset(self, view_class, query_params):
+        view = view_class()
+        view.request = Request(RequestFactory().get('/', query_params))
+        view.format_kwarg = None
+        return view, view.get_queryset()
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[3] for row in cursor.fetchall()]
+
+    def assert_uses_indexes(self, queryset, sorting_expected, msg):
+        plan = self.explain(queryset)
+        msg = f'{msg}: {plan}'
+
+        self.assertFalse([step for step in plan if TABLE_SCAN.match(step)], msg=msg)
+
+        if not sorting_expected:
+            self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], msg=msg)
+
+    def test_list_views_use_indexes(self):
+        for view_class, query_params, sorting_expected in CASES:
+            view, queryset = self.get_queryset(view_class, query_params)
+            self.assert_uses_indexes(queryset, sorting_expected, msg=f'{view_class.__name__} {query_params}')
+
+    def test_list_views_use_indexes_with_cursor_pagination(self):
+        for view_class, query_params, sorting_expected in CASES:
+            view, queryset = self.get_queryset(view_class, query_params)
+            field = view.ordering
+            queryset = queryset.order_by(field, 'id').filter(Q(**{f'{field}__gt': 'a'}) | Q(**{field: 'a', 'id__gt': 1}))
+            self.assert_uses_indexes(queryset, sorting_expected, msg=f'{view_class.__name__} {query_params}')
+
+    def test_filters_use_index_searches(self):
+        for view_class, query_params, sorting_expected in CASES:
+            if not query_params or 'contains' in query_params:   # Substring search has to go through all the items
+                continue
+
+            view, queryset = self.get_queryset(view_class, query_params)
+            plan = self.explain(queryset)
+            self.assertTrue(plan[0].startswith('SEARCH'), msg=f'{view_class.__name__} {query_params}: {plan}')
@@ -0,0 +1,118 @@
+import datetime
+import decimal
+from collections import OrderedDict
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api_app.renderers import FastJSONRenderer
+
+
+
+DATA = OrderedDict([
+    ('id', 1),
+    ('text', 'Ąžuolas   "quoted" \\ 🦉'),
+    ('date', datetime.date(2022, 5, 1)),
+    ('created', datetime.datetime(2022, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)),
+    ('time', datetime.time(8, 15)),
+    ('price', decimal.Decimal('12.50')),
+    ('rating', 4.5),
+    ('message', gettext_lazy('Not found.')),
+    ('counts', {1: 'one', 2: 'two'}),
+    ('tags', [{'id': 1, 'name': 'wisdom'}, {'id': 2, 'name': None}]),
+    ])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_is_the_same_as_of_json_renderer(self):
+        for data in [DATA, [DATA, DATA], [], {}, 'text', None]:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_standard_library_is_used_without_orjson(self):
+        with mock.patch('api_app.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(DATA), JSONRenderer().render(DATA))
+
+    def test_indented_output_is_the_same_as_of_json_renderer(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(FastJSONRenderer().render(DATA, media_type), JSONRenderer().render(DATA, media_type))
+
+    def test_streamed_output_is_the_same_as_rendered_at_once(self):
+        renderer = FastJSONRenderer()
+        items = [DATA] * 5
+
+        for chunks in [[items[:2], items[2:4], items[4:]], [[], items, []], []]:
+            data = OrderedDict([('count', 5), ('results', [])])
+            content = b''.join(renderer.render_stream(data, chunks))
+            expected = OrderedDict([('count', 5), ('results', [item for chunk in chunks for item in chunk])])
+            self.assertEqual(content, renderer.render(expected))
+
+    def test_results_must_be_the_last_item_of_streamed_data(self):
+        data = OrderedDict([('results', []), ('count', 0)])
+
+        with self.assertRaises(ValueError):
+            list(FastJSONRenderer().render_stream(data, []))
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False}, API_STREAMING={'STREAMING_PAGE_SIZE': 2, 'CHUNK_SIZE': 1})
+class StreamingTests(APITestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def get_content(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_large_pages_are_streamed(self):
+        cases = [
+            ('list-of-quotes', {'page_size': 2}),
+            ('list-of-quotes', {'page_size': 3, 'page': 2}),
+            ('list-of-quotes', {'page_size': 20, 'tags': '3'}),
+            ('list-of-quotes', {'page_size': 50, 'contains': 'xyz'}),
+            ('list-of-authors', {'page_size': 2}),
+            ('list-of-books', {'page_size': 4}),
+            ('list-of-tags', {'page_size': 10}),
+            ]
+
+        for url_name, query_params in cases:
+            response = self.client.get(reverse(url_name), query_params)
+            self.assertTrue(response.streaming, msg=f'{url_name} {query_params}')
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+            with override_settings(API_STREAMING={'STREAMING_PAGE_SIZE': None}):
+                expected_response = self.client.get(reverse(url_name), query_params)
+
+            self.assertFalse(expected_response.streaming)
+            self.assertEqual(self.get_content(response), expected_response.content, msg=f'{url_name} {query_params}')
+
+    def test_small_pages_cursor_pages_and_lists_of_instances_are_not_streamed(self):
+        cases = [
+            ('list-of-quotes', {'page_size': 1}),
+            ('list-of-quotes', {'page_size': 2, 'pagination': 'cursor'}),
+            ('list-of-tags', {'page_size': 2, 'similar_to': 'wisdon'}),
+            ]
+
+        for url_name, query_params in cases:
+            response = self.client.get(reverse(url_name), query_params)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.streaming, msg=f'{url_name} {query_params}')
+
+    def test_page_size_can_be_requested(self):
+        response = self.client.get(reverse('list-of-quotes'), {'page_size': 1})
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIn('page_size=1', response.json()['next'])
+
+        response = self.client.get(reverse('list-of-quotes'), {'page_size': 3, 'pagination': 'cursor'})
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_invalid_page_of_streamed_list_is_not_found(self):
+        response = self.client.get(reverse('list-of-quotes'), {'page_size': 2, 'page': 1000})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,58 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from api_app import search
+from api_app.models import Quote
+
+
+
+class QuoteSearchIndexTests(TestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        ]
+
+    def search(self, search_string):
+        match_expression = search.build_match_expression(search_string)
+        return set(search.filter_quotes(Quote.objects.all(), match_expression).values_list('id', flat=True))
+
+    def test_match_expression_builder(self):
+        inputs = [
+            ('cat', '"cat"'),   # search string, FTS5 query
+            ('cat dog', '"cat" "dog"'),
+            ('"the cat"', '"the cat"'),
+            ('cat*', '"cat"*'),
+            ('"cat" OR (dog', '"cat" "OR" "dog"'),
+            ('" * -', None),
+            ('', None),
+            ]
+
+        for search_string, match_expression in inputs:
+            self.assertEqual(search.build_match_expression(search_string), match_expression, msg=f'params: {search_string}')
+
+    def test_index_is_updated_when_quote_is_saved(self):
+        quote = Quote.objects.get(pk=1)
+        quote.editors_comment = 'Hamlet speaks to himself'
+        quote.save()
+        self.assertEqual(self.search('himself'), {1})
+
+        quote.text = 'Something is rotten in the state of Denmark.'
+        quote.save()
+        self.assertEqual(self.search('question'), set())
+        self.assertEqual(self.search('rotten'), {1})
+
+    def test_index_is_updated_when_quote_is_deleted(self):
+        Quote.objects.get(pk=4).delete()
+        self.assertEqual(self.search('cat'), set())
+
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+
+        self.assertEqual(self.search('cat'), set())
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.search('cat'), {4})
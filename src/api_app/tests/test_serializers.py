@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+
+from api_app import views
+from api_app.benchmarks import dataset
+from api_app.models import Author, Book, Quote, Tag
+from api_app.serializers import (
+    AuthorSerializer, AuthorValuesSerializer, BookSerializer, BookValuesSerializer,
+    QuoteSerializer, QuoteValuesSerializer, TagSerializer, TagValuesSerializer)
+
+
+
+SERIALIZERS = [
+    (Author, AuthorSerializer, AuthorValuesSerializer),
+    (Book, BookSerializer, BookValuesSerializer),
+    (Quote, QuoteSerializer, QuoteValuesSerializer),
+    (Tag, TagSerializer, TagValuesSerializer),
+    ]
+
+LIST_VIEWS = [
+    ('list-of-authors', views.AuthorList, [{}, {'contains': 'a'}, {'page': 'last'}, {'pagination': 'cursor'}]),
+    ('list-of-books', views.BookList, [{}, {'author': 1}, {'contains': 'the'}, {'year': 1952}, {'expand': 'author'}]),
+    ('list-of-quotes', views.QuoteList, [{}, {'tags': '3,5'}, {'search': 'be'}, {'author': 1}, {'pagination': 'cursor'}, {'contains': 'xyz'},
+        {'expand': 'author,book'}, {'expand': 'book', 'tags': '3'},
+        {'fields': 'id,tags'}, {'fields': 'text,author', 'expand': 'author,book'}, {'fields': 'id', 'pagination': 'cursor'}]),
+    ('list-of-tags', views.TagList, [{}, {'starts_with': 'wis'}, {'similar_to': 'wisdon'}, {'pagination': 'cursor'}, {'fields': 'name'}]),
+    ]
+
+
+class ValuesSerializerTests(APITestCase):
+    ''' <ValuesSerializer> is a fast path of list views, so its output must be
+        exactly the same as of the model serializers '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def setUp(self):
+        self.context = {'request': Request(RequestFactory().get('/'))}
+
+    def assert_same_output(self, model, serializer_class, values_serializer_class):
+        queryset = model.objects.order_by('id')
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=self.context).data)
+        actual = JSONRenderer().render(values_serializer_class(values_serializer_class.values(queryset), many=True, context=self.context).data)
+        self.assertEqual(actual, expected, msg=model.__name__)
+
+    def test_output_is_the_same_as_of_model_serializers(self):
+        for model, serializer_class, values_serializer_class in SERIALIZERS:
+            self.assert_same_output(model, serializer_class, values_serializer_class)
+
+    def test_output_is_the_same_for_generated_data(self):
+        dataset.generate(300, seed=2)   # Unicode, nulls, quotes without tags, etc.
+
+        for model, serializer_class, values_serializer_class in SERIALIZERS:
+            self.assert_same_output(model, serializer_class, values_serializer_class)
+
+    def test_tags_are_read_without_extra_queries(self):
+        rows = QuoteValuesSerializer.values(Quote.objects.order_by('id'))
+
+        with self.assertNumQueries(1):   # Quotes only, tags are denormalized
+            data = QuoteValuesSerializer(rows, many=True, context=self.context).data
+
+        self.assertTrue(any(item['tags'] for item in data))
+
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+    def test_list_views_respond_the_same_as_with_model_serializers(self):
+        for url_name, view_class, cases in LIST_VIEWS:
+            for query_params in cases:
+                response = self.client.get(reverse(url_name), query_params)
+
+                with mock.patch.object(view_class, 'values_serializer_class', None):
+                    expected_response = self.client.get(reverse(url_name), query_params)
+
+                self.assertEqual(response.status_code, 200, msg=f'{url_name} {query_params}')
+                self.assertEqual(response.content, expected_response.content, msg=f'{url_name} {query_params}')
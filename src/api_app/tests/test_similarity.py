@@ -0,0 +1,48 @@
+from django.test import TestCase
+
+from api_app.models import DataVersion, Tag
+from api_app.similarity import TagSimilarityIndex, get_tag_index
+from api_app.utils import levenshtein_distance
+
+
+
+class TagSimilarityIndexTests(TestCase):
+    names = ['wisdom', 'wise', 'wiser', 'wit', 'w', 'war', 'peace', 'kultura', 'kulturizmas', 'kalba', 'Denmark', 'denim']
+
+    def brute_force(self, substring, max_distance):
+        ''' Reference implementation (previously used by <TagList> view) '''
+
+        items = [(levenshtein_distance(substring, name[:len(substring)]), name) for name in self.names if name[0] == substring[0]]
+        return sorted(item for item in items if item[0] <= max_distance)
+
+    def test_index_finds_the_same_tags_as_brute_force_search(self):
+        index = TagSimilarityIndex(enumerate(self.names))
+        inputs = ['w', 'wi', 'wise', 'wisdoms', 'wax', 'kultur', 'kalbos', 'Danish', 'denmark', 'peaceful', 'x']
+
+        for substring in inputs:
+            for max_distance in range(4):
+                found = [(distance, name) for distance, name, id in index.find_similar(substring, max_distance)]
+                self.assertEqual(found, self.brute_force(substring, max_distance), msg=f'params: {substring}, {max_distance}')
+
+    def test_index_is_invalidated_when_tags_change(self):
+        tag = Tag.objects.create(name='wisdom')
+        version = DataVersion.current().version
+        self.assertEqual(get_tag_index(version).size, 1)
+        self.assertEqual(get_tag_index(version).find_similar('wise', 2), [(1, 'wisdom', tag.id)])
+
+        with self.assertNumQueries(0):   # Index is reused
+            get_tag_index(version).find_similar('wise', 2)
+
+        tag.name = 'wiser'
+        tag.save()
+        self.assertEqual(get_tag_index(DataVersion.current().version).find_similar('wise', 2), [(0, 'wiser', tag.id)])
+
+        tag.delete()
+        self.assertEqual(get_tag_index(DataVersion.current().version).find_similar('wise', 2), [])
+
+    def test_index_is_invalidated_by_changes_of_other_processes(self):
+        self.assertEqual(get_tag_index(DataVersion.current().version).size, 0)
+
+        Tag.objects.bulk_create([Tag(name='wisdom')])   # No signals, like a change made by another process
+        DataVersion.bump()
+        self.assertEqual(get_tag_index(DataVersion.current().version).size, 1)
@@ -0,0 +1,194 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api_app import snapshot
+from api_app.models import Author, DataVersion, Quote, Tag
+from api_app.tests import test_api
+
+
+
+# Run the API tests with responses served from the snapshot instead of the
+# ORM. Tests that count ORM queries do not apply
+
+SNAPSHOT_SETTINGS = {'ENABLED': True, 'CHECK_INTERVAL': 0}
+SKIP_QUERY_COUNT = unittest.skip('Snapshot serves requests without these ORM queries')
+
+
+class SnapshotTestMixin:
+    def setUp(self):
+        snapshot.clear_snapshot()   # Data versions repeat in rolled back test transactions
+        super().setUp()
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotAuthorsResource(SnapshotTestMixin, test_api.TestAuthorsResource):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotBooksResource(SnapshotTestMixin, test_api.TestBooksResource):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotQuotesResource(SnapshotTestMixin, test_api.TestQuotesResource):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotQuotesQueryCount(SnapshotTestMixin, test_api.TestQuotesQueryCount):
+    test_quote_list_query_count_does_not_depend_on_page_size = SKIP_QUERY_COUNT(
+        test_api.TestQuotesQueryCount.test_quote_list_query_count_does_not_depend_on_page_size)
+    test_quote_details_query_count = SKIP_QUERY_COUNT(
+        test_api.TestQuotesQueryCount.test_quote_details_query_count)
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotTagsResource(SnapshotTestMixin, test_api.TestTagsResource):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotRandomQuotesResource(SnapshotTestMixin, test_api.TestRandomQuotesResource):
+    test_random_quotes_are_fetched_with_fixed_number_of_queries = SKIP_QUERY_COUNT(
+        test_api.TestRandomQuotesResource.test_random_quotes_are_fetched_with_fixed_number_of_queries)
+
+    @unittest.skip('Changes made without signals are noticed when the data version or VERSION_FILE changes')
+    def test_deleted_quotes_are_never_returned(self):
+        pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotPagination(SnapshotTestMixin, test_api.TestPagination):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotCursorPagination(SnapshotTestMixin, test_api.TestCursorPagination):
+    test_cursor_pagination_does_not_count_items = SKIP_QUERY_COUNT(
+        test_api.TestCursorPagination.test_cursor_pagination_does_not_count_items)
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotConditionalRequests(SnapshotTestMixin, test_api.TestConditionalRequests):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotResponseCache(SnapshotTestMixin, test_api.TestResponseCache):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotExpand(SnapshotTestMixin, test_api.TestExpand):
+    test_related_items_are_embedded_without_extra_queries = SKIP_QUERY_COUNT(
+        test_api.TestExpand.test_related_items_are_embedded_without_extra_queries)
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotSparseFieldsets(SnapshotTestMixin, test_api.TestSparseFieldsets):
+    test_only_requested_fields_are_returned_and_fetched = SKIP_QUERY_COUNT(
+        test_api.TestSparseFieldsets.test_only_requested_fields_are_returned_and_fetched)
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotExport(SnapshotTestMixin, test_api.TestExport):
+    pass
+
+
+@override_settings(API_SNAPSHOT=SNAPSHOT_SETTINGS)
+class TestSnapshotResourceNotFoundResponse(SnapshotTestMixin, test_api.TestResourceNotFoundResponse):
+    pass
+
+
+
+@override_settings(API_SNAPSHOT={'ENABLED': True, 'CHECK_INTERVAL': 60}, API_RESPONSE_CACHE={'ENABLED': False})
+class TestSnapshot(SnapshotTestMixin, APITestCase):
+    ''' Test whether the snapshot serves requests without querying the
+        database and whether it is reloaded when data changes '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def test_requests_are_served_without_queries(self):
+        urls = [
+            reverse('list-of-quotes') + '?tags=3&expand=author,book',
+            reverse('list-of-books') + '?fields=title,year',
+            reverse('list-of-tags') + '?similar_to=kultur',
+            reverse('author-details', args=[1]),
+            reverse('random-quote-details') + '?count=3&seed=1',
+            ]
+
+        self.client.get(urls[0])   # Load the snapshot
+
+        for url in urls:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, msg=url)
+
+    def test_snapshot_is_reloaded_when_data_changes(self):
+        url = reverse('author-details', args=[1])
+        self.client.get(url)
+
+        author = Author.objects.get(pk=1)
+        author.last_name = 'Changed'
+        author.save()   # Signals make the next request check the snapshot
+
+        self.assertEqual(self.client.get(url).json()['last_name'], 'Changed')
+
+    def test_snapshot_is_reloaded_when_data_version_changes(self):
+        url = reverse('tag-details', args=[1])
+        self.client.get(url)
+
+        with connection.cursor() as cursor:   # Changed by another process, without signals
+            cursor.execute("UPDATE api_app_tag SET name = 'changed' WHERE id = 1")
+
+        DataVersion.bump()
+        snapshot.invalidate_snapshot()   # As if CHECK_INTERVAL has passed
+        self.assertEqual(self.client.get(url).json()['name'], 'changed')
+
+    def test_snapshot_is_reloaded_when_version_file_changes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        version_file = Path(directory.name) / 'version'
+        version_file.touch()
+        url = reverse('tag-details', args=[1])
+
+        with override_settings(API_SNAPSHOT={**SNAPSHOT_SETTINGS, 'VERSION_FILE': version_file}):
+            self.client.get(url)
+
+            with connection.cursor() as cursor:
+                cursor.execute("UPDATE api_app_tag SET name = 'changed' WHERE id = 1")
+
+            self.assertNotEqual(self.client.get(url).json()['name'], 'changed')
+            os.utime(version_file, ns=(0, 0))
+            self.assertEqual(self.client.get(url).json()['name'], 'changed')
+
+    def test_full_text_search_is_served_by_orm(self):
+        quote = Quote.objects.first()
+        word = quote.text.split()[0]
+        snapshot_response = self.client.get(reverse('list-of-quotes'), {'search': word})
+
+        with override_settings(API_SNAPSHOT={'ENABLED': False}):
+            orm_response = self.client.get(reverse('list-of-quotes'), {'search': word})
+
+        self.assertEqual(snapshot_response.json(), orm_response.json())
+
+    def test_text_search_works_like_sqlite(self):
+        column = snapshot.TextColumn([Tag(id=1, name='xABy'), Tag(id=2, name='A.B'), Tag(id=3, name='Ą'), Tag(id=4, name=None)], 'name')
+        self.assertEqual(column.search('ab'), {1})
+        self.assertEqual(column.search('a.b'), {2})
+        self.assertEqual(column.search('ą'), set())   # LIKE ignores case of ASCII characters only
+        self.assertEqual(column.search('b'), {1, 2})
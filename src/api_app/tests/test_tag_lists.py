@@ -0,0 +1,95 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from api_app import tag_lists
+from api_app.models import Quote, QuoteTag, Tag
+
+
+
+class TagListTests(TestCase):
+    ''' Test whether denormalized tag lists of quotes follow changes of
+        <QuoteTag> and <Tag> '''
+
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'quote_tags.json',   # Before tags, so tag lists must be fixed when tags are loaded
+        'tags.json',
+        ]
+
+    def get_tag_list(self, quote_id):
+        return Quote.objects.get(pk=quote_id).tag_list
+
+    def assert_no_drift(self):
+        self.assertEqual(list(tag_lists.iter_stale_tag_lists()), [])
+
+    def test_fixtures_have_tag_lists(self):
+        self.assertEqual(self.get_tag_list(1), [{'id': 2, 'name': 'prince'}, {'id': 3, 'name': 'wisdom'}, {'id': 4, 'name': 'Denmark'}])
+        self.assert_no_drift()
+
+    def test_tag_lists_follow_quote_tags(self):
+        QuoteTag.objects.create(quote_id=1, tag_id=1)
+        self.assertEqual([tag['id'] for tag in self.get_tag_list(1)], [1, 2, 3, 4])
+
+        QuoteTag.objects.filter(quote_id=1, tag_id=3).get().delete()
+        self.assertEqual([tag['id'] for tag in self.get_tag_list(1)], [1, 2, 4])
+
+        quote_tag = QuoteTag.objects.get(quote_id=1, tag_id=1)
+        quote_tag.quote_id = 2
+        quote_tag.save()
+        self.assertEqual([tag['id'] for tag in self.get_tag_list(1)], [2, 4])
+        self.assertIn({'id': 1, 'name': 'sea'}, self.get_tag_list(2))
+        self.assert_no_drift()
+
+    def test_tag_lists_follow_tags(self):
+        tag = Tag.objects.get(pk=4)
+        tag.name = 'Danmark'
+        tag.save()
+        self.assertIn({'id': 4, 'name': 'Danmark'}, self.get_tag_list(1))
+
+        tag.delete()
+        self.assertNotIn(4, [tag['id'] for tag in self.get_tag_list(1)])
+        self.assert_no_drift()
+
+    def test_saved_quote_keeps_its_tags(self):
+        quote = Quote.objects.get(pk=1)
+        QuoteTag.objects.create(quote=quote, tag_id=1)   # <quote> has the old tag list
+        quote.rating = 5
+        quote.save()
+        self.assertEqual(len(self.get_tag_list(1)), 4)
+        self.assertEqual(len(quote.tag_list), 4)
+
+    def test_copied_quote_has_no_tags(self):
+        quote = Quote.objects.get(pk=1)
+        quote.pk = None
+        quote.save()
+        self.assertNotEqual(quote.pk, 1)
+        self.assertEqual(self.get_tag_list(quote.pk), [])
+        self.assertEqual(len(self.get_tag_list(1)), 3)
+        self.assert_no_drift()
+
+    def test_deleted_quote_can_be_saved_again(self):
+        quote = Quote.objects.get(pk=1)
+        Quote.objects.filter(pk=1).delete()
+        quote.save()
+        self.assertEqual(self.get_tag_list(1), [])   # Its tags were deleted with it
+        self.assert_no_drift()
+
+    def test_drift_is_reported_and_fixed(self):
+        with connection.cursor() as cursor:   # Changed without signals
+            cursor.execute('DELETE FROM api_app_quotetag WHERE quote_id = 1')
+
+        stale = [tag_list for batch in tag_lists.iter_stale_tag_lists() for tag_list in batch.items()]
+        self.assertEqual([(quote_id, actual) for quote_id, (stored, actual) in stale], [(1, [])])
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_tag_lists', check=True, stdout=io.StringIO())
+
+        call_command('rebuild_tag_lists', stdout=io.StringIO())
+        self.assertEqual(self.get_tag_list(1), [])
+        call_command('rebuild_tag_lists', check=True, stdout=io.StringIO())
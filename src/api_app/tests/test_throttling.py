@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from api_app.shedding import LoadSheddingMiddleware, get_queue_time
+from api_app.tests.test_async_views import AsyncURLConf
+from api_app.throttling import LocalBuckets, SharedBuckets, local_buckets
+
+
+
+class TokenBucketTests(TestCase):
+    def assert_buckets_work(self, buckets):
+        self.assertEqual(buckets.take('a', 3, rate=1, burst=5, now=100), 0)
+        self.assertEqual(buckets.take('a', 2, rate=1, burst=5, now=100), 0)
+        self.assertEqual(buckets.take('a', 2, rate=1, burst=5, now=100), 2)   # Empty, 2 seconds until there are 2 tokens
+        self.assertEqual(buckets.take('b', 5, rate=1, burst=5, now=100), 0)   # Buckets of other clients are separate
+        self.assertEqual(buckets.take('a', 2, rate=1, burst=5, now=102), 0)
+        self.assertEqual(buckets.take('a', 5, rate=1, burst=5, now=1000), 0)   # Refilled, but not over the burst
+
+    def test_local_buckets(self):
+        self.assert_buckets_work(LocalBuckets(max_buckets=10))
+
+    def test_shared_buckets(self):
+        cache = caches['default']
+        cache.clear()
+        self.assert_buckets_work(SharedBuckets(cache))
+
+    def test_least_recently_used_buckets_are_dropped(self):
+        buckets = LocalBuckets(max_buckets=2)
+        buckets.take('a', 1, rate=1, burst=5, now=0)
+        buckets.take('b', 1, rate=1, burst=5, now=0)
+        buckets.take('a', 1, rate=1, burst=5, now=0)
+        buckets.take('c', 1, rate=1, burst=5, now=0)
+        self.assertEqual(list(buckets.buckets), ['a', 'c'])
+
+
+@override_settings(
+    API_RESPONSE_CACHE={'ENABLED': False},
+    API_THROTTLING={'ENABLED': True, 'RATE': 1, 'BURST': 10, 'COSTS': {'similar_to': 5, 'contains': 3}})
+class ThrottleTests(TestCase):
+    fixtures = [
+        'authors.json',
+        'books.json',
+        'quotes.json',
+        'tags.json',
+        'quote_tags.json',
+        ]
+
+    def setUp(self):
+        local_buckets.clear()
+        patcher = mock.patch('api_app.throttling.time.time', return_value=1000.0)
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_statuses(self, url, params, count):
+        return [self.client.get(url, params).status_code for _ in range(count)]
+
+    def test_cheap_requests(self):
+        self.assertEqual(self.get_statuses(reverse('quote-details', args=[1]), {}, 11), [200] * 10 + [429])
+
+    def test_expensive_requests(self):
+        self.assertEqual(self.get_statuses(reverse('list-of-tags'), {'similar_to': 'wisdon'}, 3), [200, 200, 429])
+
+        self.time.return_value += 1   # One token
+        self.assertEqual(self.get_statuses(reverse('list-of-quotes'), {'contains': 'x'}, 1), [429])
+        self.assertEqual(self.get_statuses(reverse('list-of-quotes'), {'contains': ''}, 1), [200])   # Empty parameter is not a filter
+
+    def test_exports_are_expensive(self):
+        self.assertEqual(self.get_statuses(reverse('export-of-quotes'), {}, 2), [200, 429])   # Cost is capped at the burst
+
+    def test_throttled_response(self):
+        self.get_statuses(reverse('list-of-tags'), {'contains': 'wis'}, 3)
+        response = self.client.get(reverse('list-of-tags'), {'contains': 'wis'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(response.json(), {'message': 'Too many requests', 'retry_after': 2})
+
+        self.time.return_value += 2
+        self.assertEqual(self.client.get(reverse('list-of-tags'), {'contains': 'wis'}).status_code, 200)
+
+    def test_clients_are_throttled_separately(self):
+        url = reverse('list-of-tags')
+        self.assertEqual([self.client.get(url, {'similar_to': 'a'}, REMOTE_ADDR='10.0.0.1').status_code for _ in range(3)], [200, 200, 429])
+        self.assertEqual(self.client.get(url, {'similar_to': 'a'}, REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_async_views_are_throttled(self):
+        statuses = [(await self.async_client.get(reverse('list-of-tags'), {'similar_to': 'a'})).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': True})
+    def test_cached_responses_are_not_throttled(self):
+        self.assertEqual(self.get_statuses(reverse('list-of-tags'), {'similar_to': 'a'}, 5), [200] * 5)
+
+
+class DisabledThrottleTests(TestCase):
+    def test_throttling_and_shedding_are_disabled_in_debug_mode(self):
+        self.assertEqual(self.get_statuses(), [200] * 200)
+
+    def get_statuses(self):
+        return [self.client.get(reverse('list-of-tags'), {'similar_to': str(i)}).status_code for i in range(200)]
+
+
+class LoadSheddingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    @override_settings(API_LOAD_SHEDDING={'ENABLED': True, 'MAX_IN_FLIGHT': 1, 'RETRY_AFTER': 3})
+    def test_requests_over_max_in_flight_are_shed(self):
+        responses = []
+
+        def get_response(request):
+            if not responses:   # The first request is still in flight while the second one comes
+                responses.append(middleware(self.factory.get('/')))
+            return HttpResponse('OK')
+
+        middleware = LoadSheddingMiddleware(get_response)
+        self.assertEqual(middleware(self.factory.get('/')).status_code, 200)
+        self.assertEqual(responses[0].status_code, 503)
+        self.assertEqual(responses[0]['Retry-After'], '3')
+        self.assertEqual(middleware.in_flight, 0)
+        self.assertEqual(middleware.shed, 1)
+        self.assertEqual(middleware(self.factory.get('/')).status_code, 200)
+
+    @override_settings(API_LOAD_SHEDDING={'ENABLED': True, 'MAX_IN_FLIGHT': 1}, API_RESPONSE_CACHE={'ENABLED': False})
+    def test_streamed_responses_are_in_flight_until_closed(self):
+        response = self.client.get(reverse('export-of-quotes'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(self.client.get(reverse('list-of-tags')).status_code, 503)
+
+        b''.join(response.streaming_content)   # Test client closes the response when its content is consumed
+        self.assertEqual(self.client.get(reverse('list-of-tags')).status_code, 200)
+
+    @override_settings(API_LOAD_SHEDDING={'ENABLED': True, 'MAX_QUEUE_TIME': 1.0})
+    def test_requests_queued_for_too_long_are_shed(self):
+        middleware = LoadSheddingMiddleware(lambda request: HttpResponse('OK'))
+
+        with mock.patch('api_app.shedding.time.time', return_value=1000.0):
+            self.assertEqual(middleware(self.factory.get('/', HTTP_X_REQUEST_START='t=999.5')).status_code, 200)
+            self.assertEqual(middleware(self.factory.get('/', HTTP_X_REQUEST_START='t=998.5')).status_code, 503)
+            self.assertEqual(middleware(self.factory.get('/', HTTP_X_REQUEST_START='998500')).status_code, 503)   # Milliseconds
+            self.assertEqual(middleware(self.factory.get('/', HTTP_X_REQUEST_START='x')).status_code, 200)
+
+    @override_settings(API_LOAD_SHEDDING={'ENABLED': True, 'MAX_IN_FLIGHT': 0})
+    def test_shed_requests_do_not_reach_views(self):
+        response = self.client.get(reverse('list-of-tags'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'message': 'Service is overloaded', 'retry_after': 1})
+
+    @override_settings(API_LOAD_SHEDDING={'ENABLED': True, 'MAX_IN_FLIGHT': 0})
+    async def test_async_requests_are_shed(self):
+        response = await self.async_client.get(reverse('list-of-tags'))
+        self.assertEqual(response.status_code, 503)
+
+    def test_queue_time(self):
+        request = self.factory.get('/', HTTP_X_REQUEST_START='t=1699999999000000')   # Microseconds
+        self.assertAlmostEqual(get_queue_time(request, 1700000000.0), 1.0, places=3)
+        self.assertIsNone(get_queue_time(self.factory.get('/'), 1700000000.0))
@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from api_app.utils import levenshtein_distance
+from api_app.utils import fold, levenshtein_distance, prefix_upper_bound
 
 
 
@@ -30,3 +30,24 @@ class LevensteinDistanceTests(TestCase):
 
 
     
+
+
+class SearchNormalizationTests(TestCase):
+    def test_fold(self):
+        inputs = [
+            ('', ''),   # string, folded string
+            (None, ''),
+            ('Vydūnas', 'vydunas'),
+            ('ŽMONĖS', 'zmones'),
+            ('Straße', 'strasse'),
+            ('Ernest Miller', 'ernest miller'),
+            ]
+
+        for string, folded in inputs:
+            self.assertEqual(fold(string), folded, msg=f'params: {string}')
+
+    def test_prefix_upper_bound(self):
+        for prefix in ['a', 'wis', 'kopūst']:
+            upper_bound = prefix_upper_bound(prefix)
+            self.assertGreater(upper_bound, prefix + '\U0010FFFF')
+            self.assertFalse(upper_bound.startswith(prefix))
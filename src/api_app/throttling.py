@@ -0,0 +1,136 @@
+''' Token bucket throttle of API requests. Every client (IP address, see
+    BaseThrottle.get_ident()) has a bucket of BURST tokens which refills at
+    RATE tokens per second. A request takes tokens according to its cost, so
+    expensive filters (e.g. "contains" or "similar_to") use up the bucket
+    sooner than detail or random requests. Throttled requests get "429 Too
+    Many Requests" with "Retry-After" header.
+
+    Buckets are kept in memory of the process, or in a shared Django cache
+    (SHARED_CACHE) so all the processes throttle a client together. Cached
+    responses and "304 Not Modified" responses are served before throttles are
+    checked (see <CachedResponseMixin> and <ConditionalGetMixin>), so they cost
+    nothing '''
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'RATE': 10.0,   # Tokens added to a bucket per second
+    'BURST': 100,   # Size of a bucket, i.e. number of cheap requests a client can make at once
+    'COSTS': {'similar_to': 10, 'contains': 5, 'search': 5, 'tags': 3},   # Costs of requests with these query parameters (the highest one applies)
+    'MAX_BUCKETS': 100000,   # Buckets kept in memory (per process), the least recently used ones are dropped
+    'SHARED_CACHE': None,   # Alias of Django cache (see CACHES setting) shared by all processes, e.g. 'default'
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'API_THROTTLING', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + max(now - updated, 0) * rate)   # Clocks of processes may differ a little
+
+
+class LocalBuckets:
+    ''' Token buckets of a process. A full bucket is the same as a missing
+        one, so buckets of clients which went away can be dropped at any
+        time '''
+
+    def __init__(self, max_buckets):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()   # Key: [tokens, time of the last update]
+        self.lock = threading.Lock()
+
+    def take(self, key, cost, rate, burst, now):
+        ''' Take <cost> tokens from the bucket of <key>. Returns 0 if there
+            were enough tokens, otherwise seconds until there will be '''
+
+        with self.lock:
+            bucket = self.buckets.get(key, None)
+
+            if bucket is None:
+                bucket = self.buckets[key] = [burst, now]
+
+                if len(self.buckets) > self.max_buckets:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+                bucket[0] = refill(bucket[0], bucket[1], now, rate, burst)
+                bucket[1] = now
+
+            if bucket[0] < cost:
+                return (cost - bucket[0]) / rate
+
+            bucket[0] -= cost
+            return 0
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SharedBuckets:
+    ''' Token buckets in a Django cache. Reading and writing a bucket is not
+        atomic, so concurrent requests of the same client may take a few
+        tokens more than they should. It is the price of a single round trip
+        to the cache per request '''
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, key, cost, rate, burst, now):
+        key = f'throttle:{key}'
+        tokens, updated = self.cache.get(key, None) or (burst, now)
+        tokens = refill(tokens, updated, now, rate, burst)
+
+        if tokens < cost:
+            return (cost - tokens) / rate
+
+        timeout = math.ceil((burst - tokens + cost) / rate) + 1   # Then the bucket is full again, so it can expire
+        self.cache.set(key, (tokens - cost, now), timeout)
+        return 0
+
+
+local_buckets = LocalBuckets(get_setting('MAX_BUCKETS'))
+
+
+def get_buckets():
+    alias = get_setting('SHARED_CACHE')
+    return SharedBuckets(caches[alias]) if alias else local_buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    ''' Throttle of API views (see DEFAULT_THROTTLE_CLASSES). Cost of a
+        request is the <throttle_cost> of its view (1 by default) or the cost
+        of its most expensive query parameter (see COSTS setting), whichever
+        is higher '''
+
+    def __init__(self):
+        self.delay = None
+
+    def get_cost(self, request, view):
+        costs = get_setting('COSTS')
+        params = request.query_params
+        return max([getattr(view, 'throttle_cost', 1)] + [cost for param, cost in costs.items() if params.get(param)])
+
+    def allow_request(self, request, view):
+        if not get_setting('ENABLED'):
+            return True
+
+        rate = get_setting('RATE')
+        burst = get_setting('BURST')
+        cost = min(self.get_cost(request, view), burst)   # Otherwise, the request could never be made
+        self.delay = get_buckets().take(self.get_ident(request), cost, rate, burst, time.time())
+        return self.delay == 0
+
+    def wait(self):
+        return self.delay
@@ -1,18 +1,34 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 
 
-urlpatterns = [
-    path('authors/', views.AuthorList.as_view(), name='list-of-authors'),
-    path('books/', views.BookList.as_view(), name='list-of-books'),
-    path('quotes/', views.QuoteList.as_view(), name='list-of-quotes'),
-    path('tags/', views.TagList.as_view(), name='list-of-tags'),
-    path('authors/<int:pk>/', views.AuthorDetails.as_view(), name='author-details'),
-    path('books/<int:pk>/', views.BookDetails.as_view(), name='book-details'),
-    path('quotes/<int:pk>/', views.QuoteDetails.as_view(), name='quote-details'),
-    path('tags/<int:pk>/', views.TagDetails.as_view(), name='tag-details'),
-    path('quotes/random/', views.RandomQuoteDetails.as_view(), name='random-quote-details'),
+def get_urlpatterns(asynchronous=False):
+    ''' List, detail and random endpoints are served by async views (see
+        "async_views.py") if <asynchronous> is set. It only pays off when the
+        API is served by an ASGI server '''
 
-]
\ No newline at end of file
+    endpoints = async_views if asynchronous else views
+
+    return [
+        path('authors/', endpoints.AuthorList.as_view(), name='list-of-authors'),
+        path('books/', endpoints.BookList.as_view(), name='list-of-books'),
+        path('quotes/', endpoints.QuoteList.as_view(), name='list-of-quotes'),
+        path('tags/', endpoints.TagList.as_view(), name='list-of-tags'),
+        path('authors/<int:pk>/', endpoints.AuthorDetails.as_view(), name='author-details'),
+        path('books/<int:pk>/', endpoints.BookDetails.as_view(), name='book-details'),
+        path('quotes/<int:pk>/', endpoints.QuoteDetails.as_view(), name='quote-details'),
+        path('tags/<int:pk>/', endpoints.TagDetails.as_view(), name='tag-details'),
+        path('quotes/random/', endpoints.RandomQuoteDetails.as_view(), name='random-quote-details'),
+        path('export/authors.ndjson', views.AuthorExport.as_view(), name='export-of-authors'),
+        path('export/books.ndjson', views.BookExport.as_view(), name='export-of-books'),
+        path('export/quotes.ndjson', views.QuoteExport.as_view(), name='export-of-quotes'),
+        path('export/tags.ndjson', views.TagExport.as_view(), name='export-of-tags'),
+        path('stats/response-cache/', views.ResponseCacheStats.as_view(), name='response-cache-stats'),
+
+    ]
+
+
+urlpatterns = get_urlpatterns(getattr(settings, 'API_ASYNC_VIEWS', False))
@@ -1,5 +1,8 @@
+import unicodedata
+
 import numpy
 
+from rest_framework.exceptions import Throttled
 from rest_framework.views import exception_handler
 
 
@@ -33,13 +36,32 @@ def levenshtein_distance(substring, string):
 # TODO: Consider other string similarity metrics, e.g. "Damerau–Levenshtein distance", etc.
 
 
+def fold(string):
+    ''' Normalize string for case-insensitive and accent-insensitive search,
+        e.g. "Vydūnas" -> "vydunas" '''
+
+    string = unicodedata.normalize('NFKD', (string or '').casefold())
+    return ''.join(c for c in string if not unicodedata.combining(c))
+
+
+def prefix_upper_bound(prefix):
+    ''' The smallest string that is greater than all the strings that start
+        with <prefix>. Searching for strings in range [prefix, upper bound)
+        can use an index, unlike LIKE 'prefix%' '''
+
+    return prefix[:-1] + chr(min(ord(prefix[-1]) + 1, 0x10FFFF))
+
+
 def custom_exception_handler(exc, context):
     ''' Custom exception handler that overwrites payload of NotFound response
         of DRF '''
     
     response = exception_handler(exc, context)
 
-    if response is not None:
+    if isinstance(exc, Throttled):   # See "throttling.py"
+        response.data = {'message': 'Too many requests', 'retry_after': exc.wait}
+
+    elif response is not None:
         response.data = {'message': 'Resource not found'}
 
     return response
@@ -1,29 +1,36 @@
 import datetime
-import random
 
 from django.db.models import Q
 from django.http import Http404
 from rest_framework import status
 from rest_framework.exceptions import NotFound
 from rest_framework.generics import GenericAPIView, ListAPIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-
+from rest_framework.views import APIView
+
+from . import search
+from .caching import response_cache
+from .facets import QUOTE_FACETS
+from .instrumentation import InstrumentedViewMixin, measure
+from .mixins import (
+    CachedResponseMixin, ConditionalGetMixin, ExpandMixin, ExportMixin, FacetsMixin, SnapshotMixin, SparseFieldsetMixin,
+    ValuesListMixin)
 from .models import Author, Book, Quote, QuoteTag, Tag
-from .serializers import AuthorSerializer, BookSerializer, QuoteSerializer, TagSerializer
-from .utils import levenshtein_distance
-
+from .sampling import get_quote_ids, invalidate_quote_ids, sample_quote_ids
+from .serializers import (
+    AuthorSerializer, AuthorValuesSerializer, BookSerializer, BookValuesSerializer,
+    QuoteSerializer, QuoteValuesSerializer, TagSerializer, TagValuesSerializer)
+from .similarity import get_tag_index
+from .snapshot import get_request_snapshot, intersect
+from .utils import fold, prefix_upper_bound
 
 
-def get_object(model, pk):
-    try:
-        return model.objects.get(pk=pk)
-    
-    except model.DoesNotExist:
-        raise NotFound()
 
-
-class AuthorList(ListAPIView):
+class AuthorList(ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, SparseFieldsetMixin, SnapshotMixin, InstrumentedViewMixin, ListAPIView):
     serializer_class = AuthorSerializer
+    values_serializer_class = AuthorValuesSerializer   # Fast path for pages of items
+    ordering = 'last_name'   # Items are ordered by this field (and by id in case of cursor pagination)
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -32,12 +39,12 @@ class AuthorList(ListAPIView):
         authors = Author.objects
 
         if 'contains' in self.request.query_params:
-            substr = self.request.query_params.get('contains', None)   # TODO: Search should ignore case?
+            substr = fold(self.request.query_params.get('contains', None))   # Search ignores case and accents
             if substr:
                 authors = authors.filter(
-                    Q(first_name__contains=substr) |
-                    Q(middle_name__contains=substr) |
-                    Q(last_name__contains=substr))
+                    Q(first_name_folded__contains=substr) |
+                    Q(middle_name_folded__contains=substr) |
+                    Q(last_name_folded__contains=substr))
             else:
                 authors = authors.none()
 
@@ -48,20 +55,42 @@ class AuthorList(ListAPIView):
         if not hasattr(authors, 'query'):   # Return full list of Authors in case no filtering is applied
             authors = Author.objects.all()
 
-        return authors.order_by('last_name')
+        return authors.order_by(self.ordering)
+
+    def get_snapshot_items(self, snapshot):
+        authors = snapshot.authors
+        ids = None
 
+        if 'contains' in self.request.query_params:
+            substr = fold(self.request.query_params.get('contains', None))
+            if substr:
+                fields = ['first_name_folded', 'middle_name_folded', 'last_name_folded']
+                ids = set().union(*(authors.search(field, substr) for field in fields))
+            else:
+                ids = set()
 
-class AuthorDetails(GenericAPIView):
+        return authors.select(ids)
+
+
+class AuthorDetails(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, SnapshotMixin, InstrumentedViewMixin, GenericAPIView):
     serializer_class = AuthorSerializer
+    values_serializer_class = AuthorValuesSerializer   # Serializes records of the snapshot
+    queryset = Author.objects.all()
 
     def get(self, request, pk, format=None):
-        author = get_object(Author, pk)
-        serializer = AuthorSerializer(author, context={'request': request})
-        return Response(serializer.data)
+        with measure(request, 'queryset'):
+            author = self.get_item(pk)
+
+        with measure(request, 'serialize'):
+            data = self.serialize(author)
 
+        return Response(data)
 
-class BookList(ListAPIView):
+
+class BookList(ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, SparseFieldsetMixin, ExpandMixin, SnapshotMixin, InstrumentedViewMixin, ListAPIView):
     serializer_class = BookSerializer
+    values_serializer_class = BookValuesSerializer   # Fast path for pages of items
+    ordering = 'title'   # Items are ordered by this field (and by id in case of cursor pagination)
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -70,11 +99,11 @@ class BookList(ListAPIView):
         books = Book.objects
 
         if 'contains' in self.request.query_params:
-            substr = self.request.query_params.get('contains', None)
+            substr = fold(self.request.query_params.get('contains', None))
             if substr:
                 books = books.filter(
-                    Q(title__contains=substr) |
-                    Q(subtitle__contains=substr))
+                    Q(title_folded__contains=substr) |
+                    Q(subtitle_folded__contains=substr))
             else:
                 books = books.none()
 
@@ -108,20 +137,51 @@ class BookList(ListAPIView):
         if not hasattr(books, 'query'):
             books = Book.objects.all()
 
-        return books.order_by('title')
+        return books.order_by(self.ordering)
+
+    def get_snapshot_items(self, snapshot):
+        books = snapshot.books
+        ids = None
 
+        if 'contains' in self.request.query_params:
+            substr = fold(self.request.query_params.get('contains', None))
+            if substr:
+                ids = books.search('title_folded', substr) | books.search('subtitle_folded', substr)
+            else:
+                ids = set()
+
+        for param, field in [('year', 'year'), ('isbn', 'isbn'), ('author', 'author_id')]:
+            if param in self.request.query_params:
+                value = self.request.query_params.get(param, None)
+                try:
+                    ids = intersect(ids, books.find(field, value if param == 'isbn' else int(value))) if value else set()
+                except ValueError as e:
+                    ids = set()
+
+        return books.select(ids)
 
-class BookDetails(GenericAPIView):
+
+class BookDetails(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, ExpandMixin, SnapshotMixin, InstrumentedViewMixin, GenericAPIView):
     serializer_class = BookSerializer
+    values_serializer_class = BookValuesSerializer   # Serializes records of the snapshot
+    queryset = Book.objects.all()
 
     def get(self, request, pk, format=None):
-        book = get_object(Book, pk)
-        serializer = BookSerializer(book, context={'request': request})
-        return Response(serializer.data)
+        with measure(request, 'queryset'):
+            book = self.get_item(pk)
+
+        with measure(request, 'serialize'):
+            data = self.serialize(book)
+
+        return Response(data)
 
 
-class QuoteList(ListAPIView):
+class QuoteList(ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, SparseFieldsetMixin, ExpandMixin, SnapshotMixin, FacetsMixin, InstrumentedViewMixin, ListAPIView):
     serializer_class = QuoteSerializer
+    values_serializer_class = QuoteValuesSerializer   # Fast path for pages of items
+    ordering = 'text'   # Items are ordered by this field (and by id in case of cursor pagination)
+    facets = QUOTE_FACETS   # Counted for the filtered quotes, e.g. quotes/?search=sea&facets=tags,author
+    filter_params = ['contains', 'search', 'date', 'author', 'book', 'tags']
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -136,6 +196,18 @@ class QuoteList(ListAPIView):
             else:
                 quotes = quotes.none()
 
+        ordering = [self.ordering]
+
+        if 'search' in self.request.query_params:   # Full-text search, e.g. 'quotes/?search="not made" defea*'
+            search_string = self.request.query_params.get('search', None)
+            match_expression = search.build_match_expression(search_string or '')
+            if match_expression and search.is_available():
+                quotes = search.filter_quotes(quotes, match_expression)
+                quotes = search.annotate_rank(quotes, match_expression)
+                ordering = ['search_rank', 'text']   # Most relevant quotes first
+            else:
+                quotes = quotes.none()
+
         if 'date' in self.request.query_params:
             date = self.request.query_params.get('date', None)
             if date:
@@ -173,24 +245,8 @@ class QuoteList(ListAPIView):
                 try:
                     # Get submitted tag ids as list. Find all quotes that are
                     # tagged with *ALL* of these tags
-
-                    # TODO: Find a way to refactor the code to make it simpler
-
                     submitted_tag_ids = {int(t) for t in tags.split(',')}   # For example, {10, 6}
-                    quote_tag_matches = QuoteTag.objects.filter(tag_id__in=submitted_tag_ids).values_list('quote_id', 'tag_id')   # <QuerySet [(4, 6), (8, 6), (4, 10)]>
-                    quote_ids = {qt[0] for qt in quote_tag_matches}   # {8, 4}
-                    tags_by_quote = {id: set() for id in quote_ids}   # {8: set(), 4: set()}
-
-                    for q_id, t_id in quote_tag_matches:   # {8: {6}, 4: {10, 6}}
-                        tags_by_quote[q_id].add(t_id)
-
-                    matching_quote_ids = []
-
-                    for q_id, t_ids in  tags_by_quote.items():
-                        if t_ids == submitted_tag_ids:   # {10, 6} == {10, 6}
-                            matching_quote_ids.append(q_id)
-
-                    quotes = quotes.filter(id__in=matching_quote_ids)
+                    quotes = quotes.tagged_with_all(submitted_tag_ids)
 
                 except ValueError as e:
                     quotes = quotes.none()
@@ -201,20 +257,64 @@ class QuoteList(ListAPIView):
         if not hasattr(quotes, 'query'):
             quotes = Quote.objects.all()
 
-        return quotes.order_by('text')
+        return quotes.order_by(*ordering)
 
+    def get_snapshot_items(self, snapshot):
+        if 'search' in self.request.query_params:   # Full-text search is served by the ORM
+            return None
 
-class QuoteDetails(GenericAPIView):
+        quotes = snapshot.quotes
+        ids = None
+
+        if 'contains' in self.request.query_params:
+            substr = self.request.query_params.get('contains', None)
+            ids = quotes.search('text', substr) if substr else set()
+
+        if 'date' in self.request.query_params:
+            date = self.request.query_params.get('date', None)
+            try:
+                date = datetime.datetime.strptime(date, '%Y-%m-%d').date() if date else None
+                ids = intersect(ids, quotes.find('date', date)) if date else set()
+            except ValueError as e:
+                ids = set()
+
+        for param, field in [('author', 'author_id'), ('book', 'book_id')]:
+            if param in self.request.query_params:
+                value = self.request.query_params.get(param, None)
+                try:
+                    ids = intersect(ids, quotes.find(field, int(value))) if value else set()
+                except ValueError as e:
+                    ids = set()
+
+        if 'tags' in self.request.query_params:
+            tags = self.request.query_params.get('tags', None)
+            try:
+                ids = intersect(ids, snapshot.tagged_with_all(int(t) for t in tags.split(','))) if tags else set()
+            except ValueError as e:
+                ids = set()
+
+        return quotes.select(ids)
+
+
+class QuoteDetails(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, ExpandMixin, SnapshotMixin, InstrumentedViewMixin, GenericAPIView):
     serializer_class = QuoteSerializer
+    values_serializer_class = QuoteValuesSerializer   # Serializes records of the snapshot
+    queryset = Quote.objects.all()
 
     def get(self, request, pk, format=None):
-        quote = get_object(Quote, pk)
-        serializer = QuoteSerializer(quote, context={'request': request})
-        return Response(serializer.data)
+        with measure(request, 'queryset'):
+            quote = self.get_item(pk)
+
+        with measure(request, 'serialize'):
+            data = self.serialize(quote)
+
+        return Response(data)
 
 
-class TagList(ListAPIView):
+class TagList(ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, SparseFieldsetMixin, SnapshotMixin, InstrumentedViewMixin, ListAPIView):
     serializer_class = TagSerializer
+    values_serializer_class = TagValuesSerializer   # Fast path for pages of items
+    ordering = 'name'   # Items are ordered by this field (and by id in case of cursor pagination)
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -227,16 +327,16 @@ class TagList(ListAPIView):
         tags = Tag.objects
 
         if 'starts_with' in self.request.query_params:
-            substr = self.request.query_params.get('starts_with', None)
+            substr = fold(self.request.query_params.get('starts_with', None))
             if substr:
-                tags = tags.filter(name__startswith=substr)
+                tags = tags.filter(name_folded__gte=substr, name_folded__lt=prefix_upper_bound(substr))   # Index range scan
             else:
                 tags = tags.none()
 
         if 'contains' in self.request.query_params:
-            substr = self.request.query_params.get('contains', None)
+            substr = fold(self.request.query_params.get('contains', None))
             if substr:
-                tags = tags.filter(name__contains=substr)
+                tags = tags.filter(name_folded__contains=substr)
             else:
                 tags = tags.none()
 
@@ -244,27 +344,20 @@ class TagList(ListAPIView):
             substr = self.request.query_params.get('similar_to', None)
 
             if substr:
-                selected_items = []
-
-                for tag_obj in tags.all():
-
-                    # Only consider tags that start with the same letter as search substring
-                    if tag_obj.name[0] == substr[0]:
-
-                        # Only compare a part (the beginning) of tag string, which
-                        # is sliced to the same length as search substring (this
-                        # approach gives more relevant results)
-                        selected_items.append((tag_obj, levenshtein_distance(substr, tag_obj.name[:len(substr)])))
-
-                # Sort by similarity (smallest Levenshtein distance first) and
-                # then alphabetically (affects only the tags that have the same
-                # similarity value)
-                selected_items.sort(key=lambda item: (item[1], item[0].name))
-
-                # Drop tags that have Levenshtein distance > 3 to get more relevant results
-                selected_items = [item for item in selected_items if item[1] <= 2]
-
-                tags = [item[0] for item in selected_items]   # Strip away tag similarity values
+                # Only consider tags that start with the same letter as search
+                # substring. Only compare a part (the beginning) of tag string,
+                # which is sliced to the same length as search substring (this
+                # approach gives more relevant results). Drop tags that have
+                # Levenshtein distance > 2 to get more relevant results. Items
+                # are sorted by similarity (smallest Levenshtein distance first)
+                # and then alphabetically
+                selected_items = get_tag_index(self.get_data_version(self.request).version).find_similar(substr, max_distance=2)
+
+                if hasattr(tags, 'query'):   # Respect other filters (if any have been applied)
+                    filtered_ids = set(tags.filter(id__in=[id for _, _, id in selected_items]).values_list('id', flat=True))
+                    selected_items = [item for item in selected_items if item[2] in filtered_ids]
+
+                tags = [Tag(id=id, name=name) for distance, name, id in selected_items]   # Strip away tag similarity values
                 return tags
 
             else:
@@ -273,24 +366,138 @@ class TagList(ListAPIView):
         if not hasattr(tags, 'query'):
             tags = Tag.objects.all()
 
-        return tags.order_by('name')
+        return tags.order_by(self.ordering)
+
+    def get_snapshot_items(self, snapshot):
+        tags = snapshot.tags
+        ids = None
+
+        if 'starts_with' in self.request.query_params:
+            substr = fold(self.request.query_params.get('starts_with', None))
+            ids = set(tags.find_range('name_folded', substr, prefix_upper_bound(substr))) if substr else set()
+
+        if 'contains' in self.request.query_params:
+            substr = fold(self.request.query_params.get('contains', None))
+            ids = intersect(ids, tags.search('name_folded', substr)) if substr else set()
+
+        if 'similar_to' in self.request.query_params:
+            substr = self.request.query_params.get('similar_to', None)
+            if substr:
+                selected_items = snapshot.tag_index.find_similar(substr, max_distance=2)   # The same order as get_queryset()
+                return [tags.get(id) for distance, name, id in selected_items if ids is None or id in ids]
+            else:
+                ids = set()
+
+        return tags.select(ids)
 
 
-class TagDetails(GenericAPIView):
+class TagDetails(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, SnapshotMixin, InstrumentedViewMixin, GenericAPIView):
     serializer_class = TagSerializer
+    values_serializer_class = TagValuesSerializer   # Serializes records of the snapshot
+    queryset = Tag.objects.all()
 
     def get(self, request, pk, format=None):
-        tag = get_object(Tag, pk)
-        serializer = TagSerializer(tag, context={'request': request})
-        return Response(serializer.data)
+        with measure(request, 'queryset'):
+            tag = self.get_item(pk)
+
+        with measure(request, 'serialize'):
+            data = self.serialize(tag)
+
+        return Response(data)
 
 
-class RandomQuoteDetails(GenericAPIView):
+class RandomQuoteDetails(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, ExpandMixin, SnapshotMixin, InstrumentedViewMixin, GenericAPIView):
     serializer_class = QuoteSerializer
+    values_serializer_class = QuoteValuesSerializer   # Serializes records of the snapshot
+    max_count = 100   # Max number of quotes that can be requested at once
+
+    def is_deterministic(self, request):
+        return bool(request.GET.get('seed', None))   # Only seeded random quotes are the same on every request
+
+    def get(self, request, format=None):
+        ''' Returns a random quote or, if "count" is given, a list of distinct
+            random quotes, e.g. quotes/random/?count=10. The same "seed" gives
+            the same quotes, e.g. quotes/random/?count=10&seed=42 '''
+
+        count, seed = self.get_count_and_seed(request)
+
+        with measure(request, 'queryset'):
+            random_quotes = self.get_random_quotes(1 if count is None else count, seed)
+
+        return self.get_random_response(request, random_quotes, count)
+
+    def get_count_and_seed(self, request):
+        ''' <count> is None if a single quote (not a list) is requested '''
+
+        seed = request.query_params.get('seed', None) or None
+
+        if 'count' not in request.query_params:
+            return None, seed
+
+        try:
+            count = min(int(request.query_params.get('count', None)), self.max_count)
+        except ValueError as e:
+            count = 0
+
+        return max(count, 0), seed
+
+    def get_random_response(self, request, random_quotes, count):
+        if count is not None:
+            with measure(request, 'serialize'):
+                data = self.serialize(random_quotes, many=True)
+
+            return Response(data)
+
+        if not random_quotes:
+            raise NotFound()
+
+        with measure(request, 'serialize'):
+            data = self.serialize(random_quotes[0])
+
+        return Response(data)
+
+    def get_random_quotes(self, count, seed):
+        snapshot = get_request_snapshot(self.request)
+
+        if snapshot is not None:
+            return [snapshot.quotes.get(pk) for pk in sample_quote_ids(count, seed, snapshot.quote_ids)]
+
+        data_version = self.get_data_version(self.request).version
+
+        for attempt in range(2):
+            random_pks = sample_quote_ids(count, seed, get_quote_ids(data_version))
+            quotes_by_pk = self.filter_queryset(Quote.objects.all()).in_bulk(random_pks)
+
+            if len(quotes_by_pk) == len(random_pks):
+                break
+
+            invalidate_quote_ids()   # Some quotes have been deleted after the data version was read, reload ids and retry
+
+        return [quotes_by_pk[pk] for pk in random_pks if pk in quotes_by_pk]
+
+
+class AuthorExport(ExportMixin, AuthorList):
+    pass
+
+
+class BookExport(ExportMixin, BookList):
+    pass
+
+
+class QuoteExport(ExportMixin, QuoteList):
+    def get_expand(self):
+        return ['author', 'book']   # Authors and books are always embedded
+
+
+class TagExport(ExportMixin, TagList):
+    pass
+
+
+class ResponseCacheStats(APIView):
+    ''' Counters of response cache of the process that serves the request.
+        Helps to choose the size of the cache '''
+
+    permission_classes = [IsAdminUser]
 
     def get(self, request, format=None):
-        pks = Quote.objects.values_list('pk', flat=True)
-        random_pk = random.choice(pks)
-        random_quote = Quote.objects.get(pk=random_pk)
-        serializer = QuoteSerializer(random_quote, context={'request': request})
-        return Response(serializer.data)
+        return Response(response_cache.stats())
@@ -1,3 +1,4 @@
+import os
 from dotenv import dotenv_values
 from pathlib import Path
 
@@ -8,10 +9,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 
 # Store sensitive configuration data in a separate ".gitignor'ed" file to avoid
-# adding that data to code repository
+# adding that data to code repository. Environment variables take precedence
+# (e.g. SECRET_KEY of test runs is set in "tox.ini")
 
 env_config = dotenv_values('../.env')
-SECRET_KEY = env_config.get('SECRET_KEY', '')
+SECRET_KEY = os.environ.get('SECRET_KEY') or env_config.get('SECRET_KEY', '')
 
 
 DEBUG = True
@@ -37,6 +39,8 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'api_app.instrumentation.PerformanceMiddleware',   # Keep it first to measure the whole request
+    'api_app.shedding.LoadSheddingMiddleware',   # Before the rest, so shed requests are cheap
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -71,10 +75,22 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
+# SQLite backend which sets "pragmas" on every new connection (see
+# "api_app/backends/sqlite3/base.py"). Connections are kept open by every
+# thread. Set "read_only" option for processes that only serve the API (it
+# applies to every connection of the process), and "immutable" to serve a
+# snapshot database which never changes
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api_app.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': None,
+        'OPTIONS': {
+            'pragmas': {},
+            'read_only': False,
+            'immutable': False,
+        },
     }
 }
 
@@ -115,20 +131,118 @@ STATIC_URL = '/static/'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api_app.renderers.FastJSONRenderer',   # Uses orjson if it is installed
     ),
 
     'DEFAULT_PARSER_CLASSES': (
         'rest_framework.parsers.JSONParser',
     ),
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api_app.pagination.ListPagination',   # Page numbers or cursors (?pagination=cursor)
     'PAGE_SIZE': 25,
 
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api_app.throttling.TokenBucketThrottle',   # See API_THROTTLING
+    ),
+
     'EXCEPTION_HANDLER': 'api_app.utils.custom_exception_handler',
 }
 
 
+# Cache of rendered API responses. Every process keeps an LRU cache of
+# MAX_ENTRIES responses. Set SHARED_CACHE to an alias of CACHES to share
+# responses between processes as well
+
+API_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024,
+    'SHARED_CACHE': None,
+    'TIMEOUT': 300,
+}
+
+
+# Pages of list endpoints with STREAMING_PAGE_SIZE items or more (see
+# "page_size" query parameter) are streamed in chunks of CHUNK_SIZE items, so
+# memory use does not grow with the size of a page. Exports are streamed in
+# chunks of EXPORT_CHUNK_SIZE items
+
+API_STREAMING = {
+    'STREAMING_PAGE_SIZE': 500,
+    'CHUNK_SIZE': 200,
+    'EXPORT_CHUNK_SIZE': 1000,
+}
+
+
+# Serve list, detail and random endpoints with async views (see
+# "api_app/async_views.py"). Enable it only when the API is served by an ASGI
+# server (see "config/asgi.py"), under WSGI async views run in a new event loop
+# on every request
+
+API_ASYNC_VIEWS = False
+
+
+# Serve list, detail and random endpoints from an in-memory snapshot of all the
+# resources (see "api_app/snapshot.py") instead of querying the database. It
+# is reloaded when the data changes, checked at most every CHECK_INTERVAL
+# seconds. Touch VERSION_FILE (if set) to reload it after the database file
+# has been replaced
+
+API_SNAPSHOT = {
+    'ENABLED': False,
+    'CHECK_INTERVAL': 1.0,
+    'VERSION_FILE': None,
+}
+
+
+# Per-request performance instrumentation (see "api_app/instrumentation.py").
+# Timings of a sample of requests are added to "Server-Timing" header and
+# logged to "api_app.performance" logger
+
+API_PERFORMANCE = {
+    'SAMPLE_RATE': 1.0 if DEBUG else 0.01,
+    'SERVER_TIMING': True,
+    'LOG': True,
+}
+
+
+# Faceted counts of quotes (see "api_app/facets.py"), e.g.
+# quotes/?facets=tags,language. Every facet lists MAX_VALUES values with the
+# highest counts. Every process caches MAX_ENTRIES counts by filters
+
+API_FACETS = {
+    'MAX_VALUES': 100,
+    'MAX_ENTRIES': 1024,
+}
+
+
+# Token bucket throttle of clients (see "api_app/throttling.py"). A bucket of
+# BURST tokens refills at RATE tokens per second. Requests with query
+# parameters listed in COSTS take more tokens than the others. Set SHARED_CACHE
+# to an alias of CACHES to throttle clients across processes
+
+API_THROTTLING = {
+    'ENABLED': not DEBUG,
+    'RATE': 10.0,
+    'BURST': 100,
+    'COSTS': {'similar_to': 10, 'contains': 5, 'search': 5, 'tags': 3},
+    'MAX_BUCKETS': 100000,
+    'SHARED_CACHE': None,
+}
+
+
+# Load shedding (see "api_app/shedding.py"). Requests over MAX_IN_FLIGHT
+# requests in flight per process, or waiting longer than MAX_QUEUE_TIME seconds
+# according to "X-Request-Start" header of the front server, get "503 Service
+# Unavailable" with "Retry-After" header
+
+API_LOAD_SHEDDING = {
+    'ENABLED': not DEBUG,
+    'MAX_IN_FLIGHT': 64,
+    'MAX_QUEUE_TIME': None,
+    'RETRY_AFTER': 1,
+}
+
+
 # Enable CORS headers. It is needed to enable 3rd parties to build frontends
 # on top of this API (CORS allows API resources to be accessed from other
 # domains than the API domain)